@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""A class implementing an AC-compatible recursive path ordering"""
+from .precedence import Relation, as_precedence
+from .utils import Operator, to_operator, Comparison
+
+from matchpy import Expression, Operation
+from collections import Counter
+
+from typing import (Dict, Iterable, List, Optional, Tuple,  # noqa: F401
+                    Union)
+
+
+class _Node(object):
+    """A flattened term, with equal (up to AC) subterms sharing an id"""
+    __slots__ = ('id', 'head', 'args', 'variable', 'variables', 'ac')
+
+    def __init__(self, id: int, head: Optional[Operator],
+                 args: Tuple['_Node', ...], variable: Optional[str],
+                 ac: bool) -> None:
+        self.id = id
+        self.head = head
+        self.args = args
+        self.variable = variable
+        self.ac = ac
+        self.variables = (frozenset([variable]) if variable is not None
+                          else frozenset().union(*(a.variables
+                                                   for a in args)))
+
+
+def _is_ac(op: Optional[Operator]) -> bool:
+    return (isinstance(op, type) and issubclass(op, Operation)
+            and op.associative and op.commutative)
+
+
+def _is_commutative(op: Optional[Operator]) -> bool:
+    return (isinstance(op, type) and issubclass(op, Operation)
+            and op.commutative)
+
+
+_Key = Tuple[Union[Operator, str, None], Tuple[int, ...]]
+
+
+class _Comparison(object):
+    """The state of one top-level comparison: flattened terms,
+    shared by their AC-equality class, and a table of results"""
+
+    def __init__(self, order: 'ACPathOrdering') -> None:
+        self.order = order
+        self.nodes = {}  # type: Dict[_Key, _Node]
+        self.memo = {}  # type: Dict[Tuple[int, int], bool]
+
+    def node(self, head: Optional[Operator], args: Iterable[_Node],
+             variable: Optional[str] = None) -> _Node:
+        """The node for head(args), flattened if head is AC"""
+        ac = _is_ac(head)
+        if ac:
+            flat = []  # type: List[_Node]
+            for a in args:
+                if a.head == head:
+                    flat.extend(a.args)
+                else:
+                    flat.append(a)
+            args = flat
+        args = tuple(args)
+        if _is_commutative(head):
+            args = tuple(sorted(args, key=lambda a: a.id))
+        key = (variable if head is None else head,
+               tuple(a.id for a in args))  # type: _Key
+        ret = self.nodes.get(key)
+        if ret is None:
+            ret = _Node(len(self.nodes), head, args, variable, ac)
+            self.nodes[key] = ret
+        return ret
+
+    def convert(self, term: Expression) -> _Node:
+        head = to_operator(term)
+        if head is None:
+            return self.node(None, (), term.variable_name)
+        operands = term.operands if isinstance(term, Operation) else []
+        return self.node(head, [self.convert(a) for a in operands])
+
+    def greater_op(self, f: Optional[Operator],
+                   g: Optional[Operator]) -> bool:
+        return self.order.op_gt.greater(f, g)
+
+    def gt(self, s: _Node, t: _Node) -> bool:
+        key = (s.id, t.id)
+        ret = self.memo.get(key)
+        if ret is None:
+            ret = self._gt(s, t)
+            self.memo[key] = ret
+        return ret
+
+    def ge(self, s: _Node, t: _Node) -> bool:
+        return s is t or self.gt(s, t)
+
+    def _gt(self, s: _Node, t: _Node) -> bool:
+        if s.head is None or s is t:
+            return False
+        if t.head is None:
+            return t.variable in s.variables
+        if any(self.ge(a, t) for a in s.args):
+            return True
+        f, g = s.head, t.head
+        if f != g:
+            return (self.greater_op(f, g)
+                    and all(self.gt(s, b) for b in t.args))
+        if not s.ac:
+            if _is_commutative(f):
+                return self.multiset_gt(s.args, t.args)
+            return (self.lex_gt(s.args, t.args)
+                    and all(self.gt(s, b) for b in t.args))
+
+        if any(self.ge(emb, t) for emb in self.emb_small(s)):
+            return True
+        if not all(self.gt(s, emb) for emb in self.emb_small(t)):
+            return False
+        if not self.multiset_ge(self.no_small_head(s),
+                                self.no_small_head(t)):
+            return False
+        if self.multiset_gt(self.big_head(s), self.big_head(t)):
+            return True
+        count = self.count_compare(s, t)
+        if count == Comparison.GREATER:
+            return True
+        return (count == Comparison.EQUAL
+                and self.multiset_gt(s.args, t.args))
+
+    def lex_gt(self, s_args: Tuple[_Node, ...],
+               t_args: Tuple[_Node, ...]) -> bool:
+        for s_i, t_i in zip(s_args, t_args):
+            if s_i is not t_i:
+                return self.gt(s_i, t_i)
+        return len(s_args) > len(t_args)
+
+    def multiset_gt(self, s_args: Iterable[_Node],
+                    t_args: Iterable[_Node]) -> bool:
+        """The multiset extension of the ordering"""
+        s_count = Counter(s_args)
+        t_count = Counter(t_args)
+        s_rest = list((s_count - t_count).elements())
+        t_rest = list((t_count - s_count).elements())
+        return bool(s_rest) and all(any(self.gt(a, b) for a in s_rest)
+                                    for b in t_rest)
+
+    def multiset_ge(self, s_args: List[_Node], t_args: List[_Node]) -> bool:
+        return (Counter(s_args) == Counter(t_args)
+                or self.multiset_gt(s_args, t_args))
+
+    def emb_small(self, s: _Node) -> List[_Node]:
+        """s with one argument whose head is below s's replaced by
+        one of that argument's own arguments"""
+        ret = []
+        for k, a in enumerate(s.args):
+            if a.head is not None and self.greater_op(s.head, a.head):
+                rest = s.args[:k] + s.args[k + 1:]
+                for b in a.args:
+                    ret.append(self.node(s.head, rest + (b,)))
+        return ret
+
+    def no_small_head(self, s: _Node) -> List[_Node]:
+        return [a for a in s.args
+                if a.head is None or not self.greater_op(s.head, a.head)]
+
+    def big_head(self, s: _Node) -> List[_Node]:
+        return [a for a in s.args
+                if a.head is not None and self.greater_op(a.head, s.head)]
+
+    @staticmethod
+    def count_compare(s: _Node, t: _Node) -> Comparison:
+        """Compare the numbers of arguments of s and t for every
+        instance, where a variable argument may become any number
+        of arguments.
+
+        :returns: GREATER or EQUAL if that holds for every instance
+        (EQUAL meaning >=), INCOMPARABLE otherwise"""
+        coefficients = Counter()  # type: Counter
+        constant = 0
+        for sign, args in ((1, s.args), (-1, t.args)):
+            for a in args:
+                if a.head is None:
+                    coefficients[a.variable] += sign
+                else:
+                    constant += sign
+        if any(c < 0 for c in coefficients.values()):
+            return Comparison.INCOMPARABLE
+        # Every variable stands for at least one argument
+        least = constant + sum(coefficients.values())
+        if least > 0:
+            return Comparison.GREATER
+        if least == 0:
+            return Comparison.EQUAL
+        return Comparison.INCOMPARABLE
+
+
+class ACPathOrdering(object):
+    """Implement Rubio's fully syntactic AC-compatible recursive
+    path ordering.
+
+    Rubio, Albert. "A Fully Syntactic AC-RPO."
+    Information and Computation 178.2 (2002): 515–533.
+
+    Terms are compared with associative-commutative operations
+    flattened and their operands taken as multisets, so terms equal
+    up to AC are equal under the ordering, and s > t implies
+    that every AC-variant of s is greater than every AC-variant of t.
+    It reduces to the lexicographic path ordering on terms without
+    AC operations (commutative ones compare operands as multisets).
+
+    For s = f(s_1, ... s_n) with f AC, and t = f(t_1, ... t_m), s > t if
+    - Some s' in EmbSmall(s) has s' >= t, or
+    - s > t' for all t' in EmbSmall(t), NoSmallHead(s) >=[mul]
+    NoSmallHead(t) and either BigHead(s) >[mul] BigHead(t), or
+    #(s) > #(t), or #(s) >= #(t) and {s_1, ... s_n} >[mul] {t_1, ... t_m}.
+
+    Here EmbSmall(s) replaces an argument of s with a head less than f
+    by one of its own arguments, NoSmallHead(s) is the arguments whose
+    heads aren't less than f, BigHead(s) those whose heads are greater,
+    and #(s) counts arguments, with variables standing for any number.
+    The precedence should be total, as for :cls:`LexPathOrdering`."""
+
+    def __init__(self, op_gt: Relation) -> None:
+        """:param op_gt: Total order (will be transitively closed over)
+        on the operators, or a :cls:`Precedence`. Send in >"""
+        self.op_gt = as_precedence(op_gt)
+
+    def compare(self, s: Expression, t: Expression) -> Comparison:
+        """Compare s and t, up to AC"""
+        comparison = _Comparison(self)
+        s_node = comparison.convert(s)
+        t_node = comparison.convert(t)
+        if s_node is t_node:
+            return Comparison.EQUAL
+        if comparison.gt(s_node, t_node):
+            return Comparison.GREATER
+        if comparison.gt(t_node, s_node):
+            return Comparison.LESS
+        return Comparison.INCOMPARABLE
+
+    def __call__(self, s: Expression, t: Expression) -> bool:
+        """Order under the AC recursive path ordering"""
+        comparison = _Comparison(self)
+        return comparison.gt(comparison.convert(s), comparison.convert(t))
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Benchmarks of completion on standard problems.
+
+Run them with ``python -m knuth_bendix.benchmarks``, which can store
+the results as JSON and compare them with an earlier run's.
+The kernels that completion is made of are timed separately,
+by :mod:`knuth_bendix.benchmarks.kernels`."""
+from .problems import PROBLEMS, Problem, random_problem  # noqa: F401
+from .runner import (run_problem, run_suite, compare,  # noqa: F401
+                     format_results, profiling_overhead, format_overheads)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Command-line benchmark runner"""
+from .problems import PROBLEMS, random_problem
+from .runner import (run_suite, compare, format_results,
+                     profiling_overhead, format_overheads)
+
+import argparse
+import json
+import sys
+
+from typing import List
+
+
+def main(argv: List[str]) -> int:
+    """Run the benchmarks, store and compare the results.
+
+    :param argv: command-line arguments
+    :returns: 1 if there were regressions against the baseline, else 0"""
+    arg_parser = argparse.ArgumentParser(
+        prog=argv[0],
+        description='Time the completion of standard problems.')
+    arg_parser.add_argument(
+        'problems', nargs='*', metavar='PROBLEM',
+        help='problems to run (default: all of them)')
+    arg_parser.add_argument(
+        '-l', '--list', action='store_true',
+        help='list the problems and exit')
+    arg_parser.add_argument(
+        '--random', type=int, default=0, metavar='N',
+        help='also run N problems of random rules, with seeds 0 to N-1')
+    arg_parser.add_argument(
+        '-r', '--repeat', type=int, default=3,
+        help='completions of each problem to take the fastest of')
+    arg_parser.add_argument(
+        '--no-memory', action='store_true',
+        help="don't measure peak memory use")
+    arg_parser.add_argument(
+        '--profile-overhead', action='store_true',
+        help='instead, time each problem with and without profiling '
+        'and show how much slower profiling makes it')
+    arg_parser.add_argument(
+        '-o', '--output', metavar='FILE',
+        help='write the results to FILE as JSON')
+    arg_parser.add_argument(
+        '--label', help='name for this run, stored with the results')
+    arg_parser.add_argument(
+        '-c', '--compare', metavar='FILE',
+        help='compare with the results in FILE')
+    arg_parser.add_argument(
+        '-t', '--threshold', type=float, default=0.1,
+        help='slowdown that counts as a regression, as a fraction '
+        '(default: %(default)s)')
+    args = arg_parser.parse_args(args=argv[1:])
+
+    if args.list:
+        for name, problem in PROBLEMS.items():
+            print('{:<24}{}'.format(name, problem.description))
+        return 0
+    unknown = [name for name in args.problems if name not in PROBLEMS]
+    if unknown:
+        arg_parser.error('unknown problems: ' + ', '.join(unknown))
+
+    # Random problems replace the standard ones unless those are named
+    names = args.problems
+    if not names and not args.random:
+        names = list(PROBLEMS)
+    problems = ([PROBLEMS[name] for name in names]
+                + [random_problem(seed) for seed in range(args.random)])
+    if args.profile_overhead:
+        print(format_overheads(profiling_overhead(p, args.repeat)
+                               for p in problems))
+        return 0
+    results = run_suite(problems, args.repeat, not args.no_memory,
+                        args.label)
+    print(format_results(results))
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        for line in regressions:
+            print('Regression:', line)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Micro-benchmarks of the kernels that completion spends its time in.
+
+Each kernel is timed on inputs of growing size, giving a table of time
+against size, so that a kernel that scales badly (such as enumerating
+AC unifiers, or recursing in path orderings) shows up directly.
+A sweep stops early once one call takes longer than a time limit.
+
+Run them with ``python -m knuth_bendix.benchmarks.kernels``."""
+from ..knuth_bendix_ordering import KnuthBendixOrdering
+from ..lex_path_ordering import LexPathOrdering
+from ..rewrite_rule import RewriteRule, RewriteRuleList
+from ..selection import subexpression_count
+from ..unification import unify_expressions, ac_operand_lists
+from .problems import times, i, e, plus
+
+import matchpy
+from matchpy import Expression, Operation, Arity, Symbol
+from collections import OrderedDict
+import argparse
+import json
+import sys
+import time
+
+from typing import (Any, Callable, Dict, List, Optional,  # noqa: F401
+                    Sequence, Tuple)
+
+Row = Dict[str, Any]
+
+
+class Kernel(object):
+    """Something to time on inputs of growing size"""
+
+    def __init__(self, name: str, description: str,
+                 setup: Callable[[int], Callable[[], Any]],
+                 sizes: Sequence[int]) -> None:
+        """:param setup: Makes the call to time for a size
+        :param sizes: The sizes to sweep over by default"""
+        self.name = name
+        self.description = description
+        self.setup = setup
+        self.sizes = sizes
+
+
+def _variables(prefix: str, n: int) -> List[Expression]:
+    return [matchpy.make_dot_variable('{}{}'.format(prefix, k))
+            for k in range(n)]
+
+
+def _constants(prefix: str, n: int) -> List[Expression]:
+    return [Symbol('{}{}'.format(prefix, k)) for k in range(n)]
+
+
+def _right_comb(leaves: Sequence[Expression]) -> Expression:
+    """leaves[0] * (leaves[1] * (... * leaves[-1]))"""
+    ret = leaves[-1]
+    for leaf in reversed(leaves[:-1]):
+        ret = times(leaf, ret)
+    return ret
+
+
+def _left_comb(leaves: Sequence[Expression]) -> Expression:
+    """((leaves[0] * leaves[1]) * ...) * leaves[-1]"""
+    ret = leaves[0]
+    for leaf in leaves[1:]:
+        ret = times(ret, leaf)
+    return ret
+
+
+def _unify_syntactic(n: int) -> Callable[[], Any]:
+    """A product of n variables against a product of n inverses"""
+    left = _right_comb(_variables('x', n))
+    right = _right_comb([i(y) for y in _variables('y', n)])
+    return lambda: unify_expressions(left, right)
+
+
+def _ac_problem(n: int) -> Tuple[Operation, Operation]:
+    """A sum of n variables against a sum of two variables and a constant,
+    which has more unifiers the more variables there are"""
+    y, z = _variables('y', 2)
+    return (plus(*_variables('x', n)), plus(y, z, Symbol('a')))
+
+
+def _unify_ac(n: int) -> Callable[[], Any]:
+    left, right = _ac_problem(n)
+    return lambda: unify_expressions(left, right)
+
+
+def _ac_operand_lists(n: int) -> Callable[[], Any]:
+    left, right = _ac_problem(n)
+    return lambda: ac_operand_lists(left, right)
+
+
+group_order = {(i, times), (times, e)}
+
+
+def _kbo(depth: int) -> Callable[[], Any]:
+    """Associating a product of depth + 1 variables to the right,
+    which KBO decides by its lexicographic step"""
+    leaves = _variables('x', depth + 1)
+    s, t = _left_comb(leaves), _right_comb(leaves)
+    order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1, group_order)
+    return lambda: order(s, t)
+
+
+def _lpo(depth: int) -> Callable[[], Any]:
+    """As for :func:`_kbo`, under LPO"""
+    leaves = _variables('x', depth + 1)
+    s, t = _left_comb(leaves), _right_comb(leaves)
+    order = LexPathOrdering(group_order)
+    return lambda: order(s, t)
+
+
+def _apply_all_rules(n: int) -> Callable[[], Any]:
+    """n rules g_k(a) -> a, normalizing a product of 8 of their redexes"""
+    a = Symbol('a')
+    ops = [Operation.new('g{}'.format(k), Arity.unary) for k in range(n)]
+    rules = RewriteRuleList(*(RewriteRule(g(a), a) for g in ops))
+    term = _right_comb([ops[k % n](a) for k in range(8)])
+    return lambda: rules.apply_all(term)
+
+
+x, y = _variables('', 2)
+group_rules = RewriteRuleList(
+    RewriteRule(times(x, e), x),
+    RewriteRule(times(e, x), x),
+    RewriteRule(times(i(x), x), e),
+    RewriteRule(times(x, i(x)), e),
+    RewriteRule(times(times(x, y), matchpy.make_dot_variable('2')),
+                times(x, times(y, matchpy.make_dot_variable('2')))),
+    RewriteRule(i(e), e),
+    RewriteRule(times(i(x), times(x, y)), y),
+    RewriteRule(times(x, times(i(x), y)), y),
+    RewriteRule(i(i(x)), x),
+    RewriteRule(i(times(y, x)), times(i(x), i(y))))
+"""The complete system for groups"""
+
+
+def _apply_all_terms(n: int) -> Callable[[], Any]:
+    """The complete system for groups, normalizing an inverted
+    left-associated product of n constants"""
+    term = i(_left_comb(_constants('a', n)))
+    return lambda: group_rules.apply_all(term)
+
+
+KERNELS = OrderedDict((k.name, k) for k in [
+    Kernel('unify_syntactic', "unify_expressions, syntactic, by operands",
+           _unify_syntactic, [2, 4, 8, 16, 32, 64]),
+    Kernel('unify_ac', "unify_expressions, AC, by operands",
+           _unify_ac, [2, 3, 4, 5, 6, 7]),
+    Kernel('ac_operand_lists', "ac_operand_lists, by operands",
+           _ac_operand_lists, [2, 3, 4, 5, 6, 7]),
+    Kernel('kbo', "KnuthBendixOrdering.__call__, by depth",
+           _kbo, [2, 4, 8, 16, 32]),
+    Kernel('lpo', "LexPathOrdering.__call__, by depth",
+           _lpo, [2, 4, 6, 8, 10, 12]),
+    Kernel('apply_all_rules', "RewriteRuleList.apply_all, by rules",
+           _apply_all_rules, [1, 4, 16, 64, 256]),
+    Kernel('apply_all_terms', "RewriteRuleList.apply_all, by term size",
+           _apply_all_terms, [2, 4, 8, 16, 32]),
+])
+"""All the kernels, by name"""
+
+
+def time_call(call: Callable[[], Any],
+              min_time: float = 0.1) -> Tuple[float, Any]:
+    """Time :param:`call`, repeating it until that takes
+    at least :param:`min_time` seconds
+
+    :returns: Seconds per call, and what the call returned"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            result = call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / number, result
+        number *= 2 if elapsed <= 0 else max(2, min(
+            10, int(min_time / elapsed) + 1))
+
+
+def _output_size(result: Any) -> Optional[int]:
+    """How big a kernel's output is, if that means anything"""
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, Expression):
+        return subexpression_count(result)
+    return None
+
+
+def sweep(kernel: Kernel, sizes: Optional[Sequence[int]] = None,
+          min_time: float = 0.1, max_time: float = 2.0) -> List[Row]:
+    """Time :param:`kernel` at each size
+
+    :param sizes: Defaults to the kernel's own
+    :param min_time: As for :func:`time_call`
+    :param max_time: Skip the larger sizes once a call takes this long
+    :returns: For each size, the size, seconds per call, the ratio
+    to the previous size's time, and the size of the kernel's output
+    (such as the number of unifiers)"""
+    rows = []  # type: List[Row]
+    for size in kernel.sizes if sizes is None else sizes:
+        seconds, result = time_call(kernel.setup(size), min_time)
+        ratio = seconds / rows[-1]['seconds'] if rows else None
+        rows.append({'size': size, 'seconds': seconds, 'ratio': ratio,
+                     'output': _output_size(result)})
+        if seconds > max_time:
+            break
+    return rows
+
+
+def format_sweep(kernel: Kernel, rows: List[Row]) -> str:
+    """The result of :func:`sweep` as a table"""
+    lines = ['{} ({})'.format(kernel.name, kernel.description),
+             '{:>8}{:>14}{:>9}{:>9}'.format('Size', 'Seconds', 'Ratio',
+                                            'Output')]
+    for row in rows:
+        lines.append('{:>8}{:>14.3e}{:>9}{:>9}'.format(
+            row['size'], row['seconds'],
+            '' if row['ratio'] is None else '{:.2f}'.format(row['ratio']),
+            '' if row['output'] is None else row['output']))
+    return '\n'.join(lines)
+
+
+def main(argv: List[str]) -> int:
+    """Sweep the kernels and print the tables
+
+    :param argv: command-line arguments"""
+    arg_parser = argparse.ArgumentParser(
+        prog=argv[0],
+        description='Time completion kernels on growing inputs.')
+    arg_parser.add_argument(
+        'kernels', nargs='*', metavar='KERNEL',
+        help='kernels to sweep (default: all of them): '
+        + ', '.join(KERNELS))
+    arg_parser.add_argument(
+        '-s', '--sizes', type=lambda s: [int(n) for n in s.split(',')],
+        help='comma-separated sizes to use instead of the defaults')
+    arg_parser.add_argument(
+        '--min-time', type=float, default=0.1,
+        help='seconds to repeat each call for (default: %(default)s)')
+    arg_parser.add_argument(
+        '--max-time', type=float, default=2.0,
+        help='stop a sweep once a call takes this long '
+        '(default: %(default)s)')
+    arg_parser.add_argument(
+        '-o', '--output', metavar='FILE',
+        help='write the tables to FILE as JSON')
+    args = arg_parser.parse_args(args=argv[1:])
+
+    unknown = [name for name in args.kernels if name not in KERNELS]
+    if unknown:
+        arg_parser.error('unknown kernels: ' + ', '.join(unknown))
+    results = OrderedDict()  # type: Dict[str, List[Row]]
+    for name in args.kernels or list(KERNELS):
+        kernel = KERNELS[name]
+        results[name] = sweep(kernel, args.sizes, args.min_time,
+                              args.max_time)
+        print(format_sweep(kernel, results[name]))
+        print()
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""The standard completion problems that are benchmarked.
+
+Problems that don't finish in reasonable time are cut off by a rule
+limit, which (unlike a time limit) does the same work on every run."""
+from ..ac_path_ordering import ACPathOrdering
+from ..budget import CompletionBudget
+from ..knuth_bendix_ordering import KnuthBendixOrdering
+from ..lex_path_ordering import LexPathOrdering
+from ..random_terms import RandomTerms
+from ..rewrite_system import GtOrder
+
+from matchpy import (Expression, Operation, Arity, make_dot_variable,
+                     Symbol)
+from collections import OrderedDict
+
+from typing import Any, Dict, List, Optional, Tuple  # noqa: F401
+
+Equation = Tuple[Expression, Expression]
+
+
+class Problem(object):
+    """Equations to complete, with the ordering to complete them with"""
+
+    def __init__(self, name: str, description: str,
+                 equations: List[Equation], order: GtOrder[Expression],
+                 max_rules: Optional[int] = None,
+                 options: Optional[Dict[str, Any]] = None) -> None:
+        """:param max_rules: If given, stop the completion once
+        it has more rules than this
+        :param options: Passed on to :meth:`RewriteSystem.complete`"""
+        self.name = name
+        self.description = description
+        self.equations = equations
+        self.order = order
+        self.max_rules = max_rules
+        self.options = options or {}
+
+    def budget(self) -> Optional[CompletionBudget]:
+        """A fresh budget for one run, if the problem needs one"""
+        if self.max_rules is None:
+            return None
+        return CompletionBudget(max_rules=self.max_rules)
+
+
+x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
+
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+i = Operation.new('i', Arity.unary)
+e = Symbol('e')
+
+plus = Operation.new('+', Arity.polyadic, 'plus', infix=True,
+                     associative=True, commutative=True)
+neg = Operation.new('-', Arity.unary, 'neg')
+zero = Symbol('0')
+f = Operation.new('f', Arity.unary)
+
+transpose = Operation.new('transpose', Arity.unary)
+
+group = [(times(times(x, y), z), times(x, times(y, z))),
+         (times(e, x), x),
+         (times(i(x), x), e)]
+
+abelian_group = [(plus(x, zero), x),
+                 (plus(x, neg(x)), zero)]
+
+ring = abelian_group + [
+    (times(times(x, y), z), times(x, times(y, z))),
+    (times(x, plus(y, z)), plus(times(x, y), times(x, z))),
+    (times(plus(x, y), z), plus(times(x, z), times(y, z)))]
+
+transposes = [(transpose(transpose(x)), x),
+              (transpose(times(x, y)), times(transpose(y), transpose(x)))]
+
+# Problems with AC plus use the AC-compatible path ordering
+PROBLEMS = OrderedDict((p.name, p) for p in [
+    Problem('group_kbo', "Groups, under KBO",
+            group,
+            KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                                {(i, times), (times, e)})),
+    Problem('group_lpo', "Groups, under LPO",
+            group,
+            LexPathOrdering({(i, times), (times, e)})),
+    Problem('abelian_group', "Abelian groups with AC plus "
+            "(Peterson and Stickel)",
+            abelian_group,
+            ACPathOrdering({(neg, plus), (plus, zero)})),
+    Problem('abelian_group_hom', "Abelian groups with an endomorphism "
+            "(Peterson and Stickel)",
+            abelian_group + [(f(plus(x, y)), plus(f(x), f(y)))],
+            ACPathOrdering({(f, neg), (neg, plus), (plus, zero)})),
+    Problem('ring', "Rings with AC plus, up to 16 rules "
+            "(Peterson and Stickel)",
+            ring,
+            ACPathOrdering({(times, neg), (neg, plus), (plus, zero)}),
+            max_rules=16),
+    Problem('linear_algebra_simple', "Transposes, from E/simple.p",
+            transposes,
+            KnuthBendixOrdering({transpose: 0, times: 0}, 1,
+                                {(transpose, times)})),
+    # Without transposes distributing over sums, completion
+    # runs into pairs that can't be oriented
+    Problem('linear_algebra_test', "Matrix sums, products and transposes, "
+            "from E/test.p",
+            ring[2:] + transposes
+            + [(transpose(plus(x, y)), plus(transpose(x), transpose(y)))],
+            ACPathOrdering({(transpose, times), (times, plus)})),
+])
+"""All the problems, by name"""
+
+
+def random_problem(seed: int, n_rules: int = 3, size: int = 6,
+                   max_rules: int = 30) -> Problem:
+    """Random rules over the operators of groups, oriented by KBO
+
+    :param seed: Picks the rules
+    :param n_rules: How many rules to start with
+    :param size: Nodes in the left side of each rule
+    :param max_rules: Where to cut the completion off"""
+    order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                                {(i, times), (times, e)})
+    terms = RandomTerms([times, i, e], seed=seed)
+    rules = terms.rules(n_rules, size, order)
+    return Problem('random_{}'.format(seed),
+                   "{} random rules of size {} (seed {})".format(
+                       n_rules, size, seed),
+                   [(r.left, r.right) for r in rules], order,
+                   max_rules=max_rules)
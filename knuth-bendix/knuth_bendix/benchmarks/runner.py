@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Timing completions, and comparing the timings between runs.
+
+Each problem is completed a number of times and the fastest time
+is kept. Peak memory is measured by :mod:`tracemalloc` in one more run,
+since tracing allocations slows the completion down."""
+from .. import metadata
+from ..budget import CompletionStatus
+from ..rewrite_system import RewriteSystem
+from .problems import Problem
+
+import platform
+import time
+import tracemalloc
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple  # noqa: F401
+
+RESULTS_FORMAT = 1
+"""Version of the layout of :func:`run_suite`'s results"""
+
+Result = Dict[str, Any]
+
+
+def _complete(problem: Problem, **options: Any) ->\
+        Tuple[RewriteSystem, CompletionStatus]:
+    system = RewriteSystem.from_equations(problem.order, problem.equations)
+    status = system.complete(problem.order, budget=problem.budget(),
+                             **dict(problem.options, **options))
+    return system, status
+
+
+def run_problem(problem: Problem, repeat: int = 1,
+                memory: bool = True) -> Result:
+    """Time the completion of :param:`problem`
+
+    :param repeat: How many times to complete it
+    :param memory: Whether to measure peak memory use
+    :returns: The name of the problem, how the completion ended,
+    the number of rules, the fastest and all the times in seconds,
+    the peak memory in bytes (or None), and the completion's statistics.
+    Completions that fail have the status 'error' and the error message."""
+    result = {'problem': problem.name, 'seconds': None, 'times': [],
+              'rules': None, 'peak_bytes': None,
+              'stats': None}  # type: Result
+    try:
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            system, status = _complete(problem)
+            result['times'].append(time.perf_counter() - start)
+        if memory:
+            tracemalloc.start()
+            try:
+                _complete(problem)
+                _, result['peak_bytes'] = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    except (ValueError, NotImplementedError) as exc:
+        result.update(status='error', error=str(exc))
+        return result
+    result.update(status=status.value, rules=len(system.rules),
+                  seconds=min(result['times']),
+                  stats=system.stats.as_dict())
+    return result
+
+
+def run_suite(problems: Iterable[Problem], repeat: int = 1,
+              memory: bool = True, label: Optional[str] = None) -> Result:
+    """Run :func:`run_problem` on each of :param:`problems`
+
+    :param label: Recorded with the results, to tell runs apart,
+    such as the commit that was benchmarked
+    :returns: The results, with a description of the run"""
+    return {
+        'format': RESULTS_FORMAT,
+        'label': label,
+        'version': metadata.version,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'results': [run_problem(p, repeat, memory) for p in problems],
+    }
+
+
+def profiling_overhead(problem: Problem, repeat: int = 5) -> Result:
+    """Time the completion of :param:`problem` with and without
+    ``profile=True`` (see :mod:`knuth_bendix.stats`)
+
+    The two kinds of run alternate, so that a machine that slows down
+    or speeds up over time affects both alike.
+
+    :param repeat: How many times to complete it each way
+    :returns: The name of the problem, the fastest time in seconds
+    each way, and how much slower profiling made it, as a fraction"""
+    plain = []  # type: List[float]
+    profiled = []  # type: List[float]
+    for _ in range(max(1, repeat)):
+        for times, profile in [(plain, False), (profiled, True)]:
+            start = time.perf_counter()
+            _complete(problem, profile=profile)
+            times.append(time.perf_counter() - start)
+    return {'problem': problem.name, 'seconds': min(plain),
+            'profiled_seconds': min(profiled),
+            'overhead': min(profiled) / min(plain) - 1}
+
+
+def compare(baseline: Result, current: Result,
+            threshold: float = 0.1) -> List[str]:
+    """Find where :param:`current` is worse than :param:`baseline`.
+
+    :param threshold: How much slower, or larger in memory, a problem
+    may get before it counts as a regression, as a fraction
+    :returns: A description of each regression. Problems that
+    only one of the runs has are ignored."""
+    old_results = {r['problem']: r for r in baseline['results']}
+    ret = []  # type: List[str]
+    for new in current['results']:
+        name = new['problem']
+        old = old_results.get(name)
+        if old is None:
+            continue
+        if old['status'] != new['status']:
+            ret.append("{}: ended with {} instead of {}".format(
+                name, new['status'], old['status']))
+            continue
+        if old['rules'] != new['rules']:
+            ret.append("{}: {} rules instead of {}".format(
+                name, new['rules'], old['rules']))
+        for key, unit in [('seconds', 's'), ('peak_bytes', ' bytes')]:
+            if old[key] is None or new[key] is None:
+                continue
+            if new[key] > old[key] * (1 + threshold):
+                ret.append("{}: {} {:.4g}{} -> {:.4g}{} ({:+.1%})".format(
+                    name, key.replace('_', ' '), old[key], unit,
+                    new[key], unit, new[key] / old[key] - 1))
+    return ret
+
+
+def format_results(results: Result) -> str:
+    """The results of :func:`run_suite` as a table"""
+    lines = ['{:<24}{:<18}{:>7}{:>11}{:>12}'.format(
+        'Problem', 'Status', 'Rules', 'Seconds', 'Peak KiB')]
+    for r in results['results']:
+        lines.append('{:<24}{:<18}{:>7}{:>11}{:>12}'.format(
+            r['problem'], r['status'],
+            '-' if r['rules'] is None else r['rules'],
+            '-' if r['seconds'] is None else '{:.3f}'.format(r['seconds']),
+            '-' if r['peak_bytes'] is None
+            else '{:.0f}'.format(r['peak_bytes'] / 1024)))
+    return '\n'.join(lines)
+
+
+def format_overheads(overheads: Iterable[Result]) -> str:
+    """The results of :func:`profiling_overhead` as a table"""
+    lines = ['{:<24}{:>11}{:>11}{:>10}'.format(
+        'Problem', 'Seconds', 'Profiled', 'Overhead')]
+    for r in overheads:
+        lines.append('{:<24}{:>11.3f}{:>11.3f}{:>10.1%}'.format(
+            r['problem'], r['seconds'], r['profiled_seconds'],
+            r['overhead']))
+    return '\n'.join(lines)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Limits on the resources a completion may use"""
+from .selection import subexpression_count
+
+from matchpy import Expression
+from enum import Enum
+import time
+
+from typing import Callable, Optional
+
+
+class CompletionStatus(Enum):
+    """How a call to complete the system ended"""
+    COMPLETE = 'complete'
+    """The system is confluent"""
+    TIME_LIMIT = 'time limit'
+    RULE_LIMIT = 'rule limit'
+    QUEUE_LIMIT = 'queue limit'
+    TERM_SIZE_LIMIT = 'term size limit'
+
+
+class CompletionBudget(object):
+    """Limits for one call to complete a system.
+
+    Any limit can be left as None for no limit. When one is hit,
+    the completion stops between steps, leaving the system consistent,
+    with its pending critical pairs still queued."""
+
+    def __init__(self, max_seconds: Optional[float] = None,
+                 max_rules: Optional[int] = None,
+                 max_pending: Optional[int] = None,
+                 max_term_size: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """:param max_seconds: Wall-clock time allowed
+        :param max_rules: Most rules the system may have
+        :param max_pending: Most critical pairs that may be waiting
+        :param max_term_size: Most nodes either side of a new rule may have
+        :param clock: Source of the current time, in seconds"""
+        self.max_seconds = max_seconds
+        self.max_rules = max_rules
+        self.max_pending = max_pending
+        self.max_term_size = max_term_size
+        self.clock = clock
+        self.started = clock()
+
+    def start(self) -> None:
+        """Start counting time from now"""
+        self.started = self.clock()
+
+    def check(self, n_rules: int,
+              n_pending: int) -> Optional[CompletionStatus]:
+        """The limit that a system with :param:`n_rules` rules
+        and :param:`n_pending` pending pairs has gone over, if any"""
+        if (self.max_seconds is not None
+                and self.clock() - self.started > self.max_seconds):
+            return CompletionStatus.TIME_LIMIT
+        if self.max_rules is not None and n_rules > self.max_rules:
+            return CompletionStatus.RULE_LIMIT
+        if self.max_pending is not None and n_pending > self.max_pending:
+            return CompletionStatus.QUEUE_LIMIT
+        return None
+
+    def term_too_big(self, term: Expression) -> bool:
+        """Whether :param:`term` is over the term size limit"""
+        return (self.max_term_size is not None
+                and subexpression_count(term) > self.max_term_size)
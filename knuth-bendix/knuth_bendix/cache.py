@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""An on-disk cache of completed rewrite systems.
+
+Entries are keyed by a hash of everything that decides the result
+of a completion: the equations (up to renaming their variables,
+swapping their sides and reordering them), the operations in them,
+the ordering's class and parameters, and the options that change
+which complete system is found.
+
+Entries are written like checkpoints, by renaming a finished file
+into place, so any number of processes can share a cache directory.
+Once the directory is over its size limit, the least recently used
+entries are deleted."""
+from .budget import CompletionStatus
+from .checkpoint import read_checkpoint, write_checkpoint
+from .rewrite_system import (RewriteSystem, GtOrder, ordering_signature,
+                             _Equation)
+from .selection import SelectionStrategy
+from .serialization import describe_operation, encode_term, operators_of
+
+import matchpy
+from matchpy import Expression, Operation
+
+import hashlib
+import json
+import os
+
+from typing import (Any, Dict, Iterable, List, Mapping,  # noqa: F401
+                    Optional, Tuple)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+Equation = Tuple[Expression, Expression]
+
+RESULT_OPTIONS = ('strategy', 'loop', 'unfailing')
+"""Options of :meth:`RewriteSystem.complete` that can change
+which complete system comes out. The others only change how long
+it takes, or whether it finishes at all."""
+
+
+def _canonical_equation(s: Expression, t: Expression) -> List[Any]:
+    """Encode an equation with its variables renamed in order of
+    appearance, and its sides in a fixed order"""
+    encodings = []
+    for left, right in [(s, t), (t, s)]:
+        pair = _Equation(left, right)
+        renaming = matchpy.ManyToOneMatcher._collect_variable_renaming(pair)
+        pair = matchpy.rename_variables(pair, renaming)
+        encodings.append(encode_term(pair))
+    return min(encodings, key=json.dumps)
+
+
+def describe_ordering(order: GtOrder[Expression]) -> Dict[str, Any]:
+    """The parameters of :param:`order`, as JSON-compatible data
+
+    :raises: :cls:`TypeError` if the ordering has no parameters to
+    describe it by, as with arbitrary functions"""
+    cls = type(order)
+    desc = {'class': cls.__module__ + '.' + cls.__qualname__}
+    if hasattr(order, 'weights'):
+        desc['weights'] = sorted([op.name, w]
+                                 for op, w in order.weights.items())
+    if hasattr(order, 'var_weight'):
+        desc['var_weight'] = order.var_weight
+    if hasattr(order, 'op_gt'):
+        desc['op_gt'] = sorted([greater.name, lesser.name]
+                               for greater, lesser in order.op_gt)
+    if len(desc) == 1:
+        raise TypeError("Can't describe an ordering of type {}".format(
+            desc['class']))
+    return desc
+
+
+def _describe_option(value: Any) -> Any:
+    if isinstance(value, SelectionStrategy):
+        return [type(value).__name__,
+                sorted([k, v] for k, v in vars(value).items()
+                       if k != 'step')]
+    return value
+
+
+def cache_key(equations: Iterable[Equation], order: GtOrder[Expression],
+              options: Optional[Mapping[str, Any]] = None) -> str:
+    """The hash that a completion is cached under
+
+    :param options: Keyword arguments for :meth:`RewriteSystem.complete`.
+    Only those in :data:`RESULT_OPTIONS` are part of the key."""
+    equations = list(equations)
+    terms = [side for eq in equations for side in eq]
+    operations = operators_of(terms)
+    options = options or {}
+    data = {
+        'equations': sorted((_canonical_equation(s, t)
+                             for s, t in equations), key=json.dumps),
+        'operations': sorted([name, describe_operation(op)]
+                             for name, op in operations.items()
+                             if isinstance(op, type)
+                             and issubclass(op, Operation)),
+        'order': describe_ordering(order),
+        'options': sorted([k, _describe_option(options[k])]
+                          for k in RESULT_OPTIONS if k in options),
+    }
+    text = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class CompletionCache(object):
+    """A directory of completed systems, shared between processes"""
+
+    def __init__(self, directory: str,
+                 max_bytes: int = 256 * 1024 * 1024) -> None:
+        """:param directory: Where to keep the entries. Created if needed.
+        :param max_bytes: Size the entries may take up before the least
+        recently used ones are deleted"""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.json.gz')
+
+    def get(self, key: str, signature: Optional[Mapping[str, Any]] = None)\
+            -> Optional[RewriteSystem]:
+        """The system stored under :param:`key`, if there is one
+
+        :param signature: Operators to build the rules from"""
+        path = self._path(key)
+        try:
+            state = read_checkpoint(path)
+            system = RewriteSystem.from_checkpoint_state(state, signature)
+        except (OSError, EOFError, ValueError, KeyError):
+            # Missing, evicted while we looked, or unreadable
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return system
+
+    def put(self, key: str, system: RewriteSystem) -> None:
+        """Store :param:`system` under :param:`key`,
+        then make room if the cache is too big"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_checkpoint(path, system.checkpoint_state())
+        self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """Last use, size and path of every entry"""
+        ret = []
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if not entry.name.endswith('.json.gz'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                ret.append((stat.st_mtime, stat.st_size, entry.path))
+        return ret
+
+    def size(self) -> int:
+        """Bytes taken up by the entries"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits
+        in its size limit"""
+        lock_path = os.path.join(self.directory, '.lock')
+        with open(lock_path, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def complete(self, order: GtOrder[Expression],
+                 equations: Iterable[Equation],
+                 **options: Any) -> RewriteSystem:
+        """Complete :param:`equations` under :param:`order`,
+        or load the result of an earlier completion of them.
+
+        :param options: Passed on to :meth:`RewriteSystem.complete`.
+        Runs that don't finish (because of a budget) aren't stored."""
+        equations = list(equations)
+        key = cache_key(equations, order, options)
+        signature = dict(ordering_signature(order))
+        signature.update(operators_of(side for eq in equations
+                                      for side in eq))
+        system = self.get(key, signature)
+        if system is not None:
+            self.hits += 1
+            if system.unfailing:
+                system.equation_order = order
+            return system
+
+        self.misses += 1
+        system = RewriteSystem.from_equations(
+            order, equations, unfailing=options.get('unfailing', False))
+        status = system.complete(order, **options)
+        if status == CompletionStatus.COMPLETE:
+            self.put(key, system)
+        return system
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Periodic snapshots of a completion in progress.
+
+A checkpoint is gzipped JSON holding the state of a
+:cls:`knuth_bendix.rewrite_system.RewriteSystem`: its rules with their ids,
+which rules are extensions of which, and the pending critical pairs
+with the ids of the rules they came from."""
+import collections.abc
+import gzip
+import json
+import os
+import tempfile
+import time
+
+from contextlib import contextmanager
+
+from typing import Any, Callable, Dict, IO, Iterator  # noqa: F401
+
+CHECKPOINT_FORMAT = 2
+"""Version of the checkpoint layout. Bumped on incompatible changes."""
+
+
+@contextmanager
+def atomic_file(path: str) -> Iterator[IO[bytes]]:
+    """A file to write in place of :param:`path`, so that readers
+    see either the old file or the complete new one, never a mix.
+    The new file replaces the old one when the block ends."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory,
+                                    prefix='.' + os.path.basename(path),
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_atomically(path: str, data: bytes) -> None:
+    """Write :param:`data` to :param:`path` as :fn:`atomic_file` does"""
+    with atomic_file(path) as f:
+        f.write(data)
+
+
+def write_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    """Atomically store :param:`state` at :param:`path`
+
+    Values of :param:`state` that are iterators are written
+    as JSON arrays one item at a time, so they needn't fit in memory.
+    Values are written in order, so later ones can be filled in
+    while earlier iterators are consumed."""
+    state = dict(state, format=CHECKPOINT_FORMAT)
+    with atomic_file(path) as raw, \
+            gzip.open(raw, 'wt', encoding='utf-8', compresslevel=6) as f:
+        for n, (key, value) in enumerate(state.items()):
+            f.write('{' if n == 0 else ',')
+            f.write(json.dumps(key))
+            f.write(':')
+            if isinstance(value, collections.abc.Iterator):
+                f.write('[')
+                for k, item in enumerate(value):
+                    if k:
+                        f.write(',')
+                    f.write(json.dumps(item, separators=(',', ':')))
+                f.write(']')
+            else:
+                f.write(json.dumps(value, separators=(',', ':')))
+        f.write('}')
+
+
+def read_checkpoint(path: str) -> Dict[str, Any]:
+    """Load a state written by :fn:`write_checkpoint`
+
+    :raises: :cls:`ValueError` if the file has an unknown format"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('format') != CHECKPOINT_FORMAT:
+        raise ValueError("Unsupported checkpoint format {!r} in {}".format(
+            state.get('format'), path))
+    return state
+
+
+class Checkpointer(object):
+    """Decides when a running completion should be saved, and saves it.
+
+    Checkpoints are at least :param:`interval` seconds apart.
+    Checkpointing a large system can be slow, so the gap
+    also grows to keep writes under :param:`max_overhead`
+    of the time spent completing."""
+
+    def __init__(self, path: str, interval: float = 60.0,
+                 max_overhead: float = 0.05,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """:param path: Where to write the checkpoint
+        :param interval: Minimum number of seconds between checkpoints
+        :param max_overhead: Largest fraction of run time to spend writing
+        :param clock: Source of the current time, in seconds"""
+        if interval < 0:
+            raise ValueError("Checkpoint interval can't be negative")
+        if not 0 < max_overhead <= 1:
+            raise ValueError("Checkpoint overhead must be in (0, 1]")
+        self.path = path
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.clock = clock
+        self.last_write = clock()
+        self.last_cost = 0.0
+        self.writes = 0
+
+    def due(self) -> bool:
+        """Whether enough time has passed for another checkpoint"""
+        gap = max(self.interval, self.last_cost / self.max_overhead)
+        return self.clock() - self.last_write >= gap
+
+    def write(self, make_state: Callable[[], Dict[str, Any]]) -> None:
+        """Write a checkpoint now.
+
+        :param make_state: Produces the state to save. It is timed along
+        with the write, since encoding a big system isn't free either."""
+        start = self.clock()
+        write_checkpoint(self.path, make_state())
+        self.last_write = self.clock()
+        self.last_cost = self.last_write - start
+        self.writes += 1
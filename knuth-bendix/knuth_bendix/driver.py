@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Completing problems read from TPTP files, one at a time or in batches.
+
+Each problem ends in a result record of plain JSON-compatible data,
+so records can be sent back from worker processes and written out
+as they come in. A record has the problem's path, its status
+(a :cls:`CompletionStatus` value, 'timeout' or 'error'), the seconds
+it took, and, unless it failed, the rules and equations of the
+system encoded by :mod:`knuth_bendix.serialization`."""
+from .ac_path_ordering import ACPathOrdering
+from .budget import CompletionBudget, CompletionStatus
+from .events import Observer
+from .knuth_bendix_ordering import KnuthBendixOrdering
+from .lex_path_ordering import LexPathOrdering
+from .rewrite_system import GtOrder, RewriteSystem
+from .selection import STRATEGIES
+from .serialization import TermEncoder, TermDecoder
+from .stats import CompletionStats
+from .synthesis import synthesize_kbo, synthesize_lpo
+from .tptp import Equation, TptpReader
+from .utils import Operator
+
+from matchpy import Expression, Operation, Arity
+from collections import deque
+from multiprocessing.connection import wait
+import multiprocessing
+import time
+
+from typing import (Any, Deque, Dict, Iterable, Iterator, List,  # noqa: F401
+                    Mapping, Optional, Sequence, Tuple)
+
+Record = Dict[str, Any]
+
+ORDERINGS = ('kbo', 'lpo', 'acrpo')
+"""Names of the orderings problems can be completed with"""
+
+TIMEOUT = 'timeout'
+"""Status of a problem whose worker was stopped by its batch timeout"""
+ERROR = 'error'
+"""Status of a problem that couldn't be read, oriented or completed"""
+
+
+def parse_precedence(text: str) -> List[Tuple[str, str]]:
+    """Read a precedence written as chains, such as 'i > * > e, f > g'
+
+    :returns: The pairs of names the chains order"""
+    ret = []  # type: List[Tuple[str, str]]
+    for chain in text.split(','):
+        names = [name.strip() for name in chain.split('>')]
+        if not all(names):
+            raise ValueError("Bad precedence {!r}".format(chain.strip()))
+        ret.extend(zip(names, names[1:]))
+    return ret
+
+
+def parse_weights(text: str) -> Dict[str, int]:
+    """Read weights written as 'name=weight' pairs, such as '*=0, e=1'"""
+    ret = {}  # type: Dict[str, int]
+    for item in text.split(','):
+        name, sep, weight = item.rpartition('=')
+        try:
+            if not sep or not name.strip():
+                raise ValueError()
+            ret[name.strip()] = int(weight)
+        except ValueError:
+            raise ValueError("Bad weight {!r}".format(item.strip()))
+    return ret
+
+
+class ProblemSettings(object):
+    """How to complete the problems in a run.
+
+    Settings are plain data, so they can be sent to worker processes.
+    Operators are referred to by the names in the problem files."""
+
+    def __init__(self, order: str = 'kbo',
+                 weights: Optional[Mapping[str, int]] = None,
+                 var_weight: int = 1,
+                 precedence: Optional[Sequence[Tuple[str, str]]] = None,
+                 ac: Sequence[str] = (),
+                 strategy: str = 'size', loop: str = 'standard',
+                 unfailing: bool = False,
+                 max_seconds: Optional[float] = None,
+                 max_rules: Optional[int] = None,
+                 max_pending: Optional[int] = None,
+                 max_term_size: Optional[int] = None,
+                 profile: bool = False) -> None:
+        """:param order: One of :data:`ORDERINGS`
+        :param weights: Knuth-Bendix ordering weights. Operators that
+        aren't given weigh 1. Only the 'kbo' ordering has weights.
+        :param var_weight: Weight of variables in the Knuth-Bendix ordering
+        :param precedence: Pairs (f, g) with f > g. If neither this nor
+        the weights are given, the Knuth-Bendix and lexicographic path
+        orderings are synthesized to orient the problem's equations
+        (see :mod:`knuth_bendix.synthesis`). The 'acrpo' ordering
+        can't be synthesized, so it needs a precedence.
+        :param ac: Operations that are associative and commutative,
+        which TPTP has no way to declare
+        :param strategy: Name of the selection strategy, in
+        :data:`knuth_bendix.selection.STRATEGIES`
+        :param loop: Passed on to :meth:`RewriteSystem.complete`,
+        as is :param:`unfailing`
+        :param max_seconds: Limits of each problem's
+        :cls:`CompletionBudget`, as are the other max_ parameters
+        :param profile: Record statistics on the completion"""
+        if order not in ORDERINGS:
+            raise ValueError("Unknown ordering {!r}".format(order))
+        if strategy not in STRATEGIES:
+            raise ValueError("Unknown strategy {!r}".format(strategy))
+        if weights is not None and order != 'kbo':
+            raise ValueError("Only the kbo ordering has weights")
+        if precedence is None and order == 'acrpo':
+            raise ValueError("The acrpo ordering needs a precedence")
+        self.order = order
+        self.weights = dict(weights) if weights is not None else None
+        self.var_weight = var_weight
+        self.precedence = list(precedence) if precedence is not None\
+            else None
+        self.ac = list(ac)
+        self.strategy = strategy
+        self.loop = loop
+        self.unfailing = unfailing
+        self.max_seconds = max_seconds
+        self.max_rules = max_rules
+        self.max_pending = max_pending
+        self.max_term_size = max_term_size
+        self.profile = profile
+
+    def signature(self) -> Dict[str, Operator]:
+        """The operators that have to be made before reading a problem"""
+        return {name: Operation.new(name, Arity.polyadic, associative=True,
+                                    commutative=True)
+                for name in self.ac}
+
+    def ordering(self, equations: List[Equation],
+                 operators: Mapping[str, Operator]) -> GtOrder[Expression]:
+        """The ordering to complete :param:`equations` with
+
+        :param operators: The problem's operators by name"""
+        def lookup(name: str) -> Operator:
+            try:
+                return operators[name]
+            except KeyError:
+                raise ValueError("No operator named {}".format(name))
+
+        precedence = None  # type: Optional[List[Tuple[Operator, Operator]]]
+        if self.precedence is not None:
+            precedence = [(lookup(f), lookup(g))
+                          for f, g in self.precedence]
+        if self.order == 'acrpo':
+            if precedence is None:
+                raise ValueError("The acrpo ordering needs a precedence")
+            return ACPathOrdering(precedence)
+        if self.order == 'lpo':
+            if precedence is None:
+                return synthesize_lpo(equations)
+            return LexPathOrdering(precedence)
+        if precedence is None and self.weights is None:
+            return synthesize_kbo(equations)
+        weights = {op: 1 for op in operators.values()}
+        for name, weight in (self.weights or {}).items():
+            weights[lookup(name)] = weight
+        return KnuthBendixOrdering(weights, self.var_weight,
+                                   precedence or [])
+
+    def budget(self) -> CompletionBudget:
+        """A fresh budget for one problem"""
+        return CompletionBudget(max_seconds=self.max_seconds,
+                                max_rules=self.max_rules,
+                                max_pending=self.max_pending,
+                                max_term_size=self.max_term_size)
+
+
+def solve(path: str, settings: ProblemSettings,
+          observers: Iterable[Observer] = ()) -> Record:
+    """Read the equations in the TPTP file at :param:`path`
+    and complete them
+
+    :param observers: Subscribed to the completion's events
+    :returns: The result record. Problems that can't be read or
+    completed have the status 'error' and the error message."""
+    start = time.perf_counter()
+    record = {'problem': path}  # type: Record
+    try:
+        reader = TptpReader(settings.signature())
+        # Axioms such as commutativity for --ac operations hold trivially
+        equations = [(s, t) for s, t in reader.read(path) if s != t]
+        order = settings.ordering(equations, reader.operators)
+        system = RewriteSystem.from_equations(order, equations,
+                                              settings.unfailing)
+        for observer in observers:
+            system.events.subscribe(observer)
+        status = system.complete(order, STRATEGIES[settings.strategy](),
+                                 budget=settings.budget(),
+                                 loop=settings.loop,
+                                 unfailing=settings.unfailing,
+                                 profile=settings.profile)
+    except (ValueError, NotImplementedError, TimeoutError, OSError) as exc:
+        record.update(status=ERROR, error=str(exc),
+                      seconds=time.perf_counter() - start)
+        return record
+    encoder = TermEncoder()
+    record.update(
+        status=status.value, seconds=time.perf_counter() - start,
+        rules=[[encoder.encode(r.left), encoder.encode(r.right)]
+               for r in system.rules],
+        equations=[[encoder.encode(s), encoder.encode(t)]
+                   for s, t in system.equations],
+        operations=encoder.operations)
+    if settings.profile:
+        record['stats'] = system.stats.as_dict()
+    return record
+
+
+def format_record(record: Record) -> str:
+    """A result record as readable text"""
+    lines = ['{}: {} ({:.3f}s)'.format(record['problem'], record['status'],
+                                       record['seconds'])]
+    if 'error' in record:
+        lines.append('Error: ' + record['error'])
+    if 'rules' in record:
+        decoder = TermDecoder(record['operations'])
+        for title, key, sep in [('Rules', 'rules', '->'),
+                                ('Equations', 'equations', '=')]:
+            if key == 'equations' and not record[key]:
+                continue
+            lines.append('{}:'.format(title))
+            for left, right in record[key]:
+                lines.append('{} {} {}'.format(decoder.decode(left), sep,
+                                               decoder.decode(right)))
+    if 'stats' in record:
+        lines.append('Statistics:')
+        lines.append(CompletionStats.from_dict(record['stats']).report())
+    return '\n'.join(lines)
+
+
+def _solve_in_worker(conn: Any, path: str, settings: ProblemSettings) -> None:
+    conn.send(solve(path, settings))
+    conn.close()
+
+
+def run_batch(paths: Iterable[str], settings: ProblemSettings,
+              jobs: Optional[int] = None,
+              timeout: Optional[float] = None) -> Iterator[Record]:
+    """Complete the problems in :param:`paths` in worker processes
+
+    Each problem gets a process of its own, so one that overruns
+    its timeout can be stopped without losing the others.
+
+    :param jobs: Most problems to work on at once.
+    Defaults to the number of CPUs.
+    :param timeout: Seconds after which a problem's worker is stopped,
+    and the problem reported with the status 'timeout'
+    :returns: The result records, in the order the problems finish"""
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    if jobs < 1:
+        raise ValueError("Need at least one job")
+    queue = deque(paths)  # type: Deque[str]
+    running = {}  # type: Dict[Any, Tuple[Any, str, float]]
+    try:
+        while queue or running:
+            while queue and len(running) < jobs:
+                path = queue.popleft()
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(
+                    target=_solve_in_worker, args=(sender, path, settings),
+                    daemon=True)
+                process.start()
+                sender.close()
+                running[receiver] = (process, path, time.monotonic())
+
+            wait_for = None  # type: Optional[float]
+            if timeout is not None:
+                first = min(started for _, _, started in running.values())
+                wait_for = max(0.0, first + timeout - time.monotonic())
+            for receiver in wait(list(running), wait_for):
+                process, path, started = running.pop(receiver)
+                try:
+                    record = receiver.recv()
+                except EOFError:
+                    process.join()
+                    record = {'problem': path, 'status': ERROR,
+                              'error': "Worker exited with code {}".format(
+                                  process.exitcode),
+                              'seconds': time.monotonic() - started}
+                receiver.close()
+                process.join()
+                yield record
+
+            if timeout is not None:
+                now = time.monotonic()
+                for receiver, (process, path, started) in list(
+                        running.items()):
+                    if now - started >= timeout:
+                        del running[receiver]
+                        process.terminate()
+                        process.join()
+                        receiver.close()
+                        yield {'problem': path, 'status': TIMEOUT,
+                               'seconds': now - started}
+    finally:
+        for receiver, (process, _, _) in running.items():
+            process.terminate()
+            process.join()
+            receiver.close()
+
+
+def completed(record: Record) -> bool:
+    """Whether the problem of :param:`record` was completed"""
+    return record['status'] == CompletionStatus.COMPLETE.value
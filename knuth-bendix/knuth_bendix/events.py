@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Events reported by a completion, and ways to observe them.
+
+Each :cls:`EventBus` passes events to the observers subscribed to it.
+The payload of an event is only built when some observer wants it,
+since formatting large terms can take longer than the step it describes.
+With no observers, emitting an event is a single check."""
+from enum import Enum
+import json
+import sys
+
+from typing import (Any, Callable, Dict, IO, List, Optional,  # noqa: F401
+                    Iterable, Union)
+
+Payload = Dict[str, Any]
+Observer = Callable[['Event', Payload], None]
+
+
+class Event(Enum):
+    """What happened. Terms in payloads are given as strings."""
+    RULE_ADDED = 'rule added'
+    """A new rule: its 'id', 'rule' and 'generation'"""
+    RULE_DELETED = 'rule deleted'
+    """A rule left the system: its 'id', 'rule' and the 'reason'"""
+    RULE_SIMPLIFIED = 'rule simplified'
+    """A rule was replaced by a simpler one: 'id' and 'rule' of the old
+    rule, 'new_id' and 'new_rule' of its replacement, and the 'reason'"""
+    EXTENSION_CREATED = 'extension created'
+    """An AC extension of the rule 'parent': its 'id' and 'rule'"""
+    EQUATION_ADDED = 'equation added'
+    """An unorientable equation, 'left' = 'right', was kept"""
+    PAIR_SELECTED = 'pair selected'
+    """A critical pair, 'left' = 'right', was taken from the queue,
+    with the ids of its 'parents' (or None)"""
+    PAIR_JOINED = 'pair joined'
+    """The selected pair normalized to the same term, 'normal_form'"""
+    COMPLETION_FINISHED = 'completion finished'
+    """A call to complete the system ended with 'status',
+    with 'rules' rules in the system"""
+    OCCURS_CHECK_FAILED = 'occurs check failed'
+    """Unification couldn't bind 'variable' to 'replacement',
+    since it would make the binding of 'other' to 'term' cyclic"""
+    REDUNDANT_AC_SOLUTIONS = 'redundant AC solutions'
+    """An AC unification problem between 'left' and 'right' has
+    repeated variables on one side, so it has redundant unifiers"""
+
+
+class EventBus(object):
+    """Observers of one source of events"""
+
+    def __init__(self) -> None:
+        self.observers = {}  # type: Dict[Optional[Event], List[Observer]]
+
+    def subscribe(self, observer: Observer,
+                  events: Optional[Iterable[Event]] = None) -> Observer:
+        """Call :param:`observer` with each event and its payload
+
+        :param events: The events to observe. Defaults to all of them.
+        :returns: :param:`observer`, to unsubscribe it later"""
+        kinds = [None] if events is None else list(events)  # type: List[Optional[Event]] # NOQA
+        for kind in kinds:
+            self.observers.setdefault(kind, []).append(observer)
+        return observer
+
+    def unsubscribe(self, observer: Observer) -> None:
+        """Stop passing events to :param:`observer`"""
+        for kind in list(self.observers):
+            observers = [o for o in self.observers[kind] if o is not observer]
+            if observers:
+                self.observers[kind] = observers
+            else:
+                del self.observers[kind]
+
+    def wants(self, event: Event) -> bool:
+        """Whether any observer would see :param:`event`"""
+        observers = self.observers
+        return bool(observers) and (None in observers or event in observers)
+
+    def emit(self, event: Event, payload: Callable[[], Payload]) -> None:
+        """Report :param:`event` to its observers
+
+        :param payload: Builds the payload. Only called if there are
+        observers, and then only once."""
+        if not self.observers:
+            return
+        observers = (self.observers.get(event, [])
+                     + self.observers.get(None, []))
+        if not observers:
+            return
+        data = payload()
+        for observer in observers:
+            observer(event, data)
+
+
+class JsonLinesSink(object):
+    """An observer writing each event as one line of JSON,
+    with the event's value under 'event' and the payload beside it"""
+
+    def __init__(self, out: Union[str, IO[str]]) -> None:
+        """:param out: A file, or the path of one to create"""
+        if isinstance(out, str):
+            self.file = open(out, 'w', encoding='utf-8')  # type: IO[str]
+            self.owns_file = True
+        else:
+            self.file = out
+            self.owns_file = False
+
+    def __call__(self, event: Event, payload: Payload) -> None:
+        record = {'event': event.value}
+        record.update(payload)
+        self.file.write(json.dumps(record, default=str))
+        self.file.write('\n')
+
+    def close(self) -> None:
+        """Close the file, if this sink opened it"""
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self) -> 'JsonLinesSink':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class TextSink(object):
+    """An observer writing events as readable lines,
+    for watching a completion as it runs"""
+
+    def __init__(self, out: Optional[IO[str]] = None) -> None:
+        """:param out: Where to write. Defaults to standard output."""
+        self.out = out
+
+    def __call__(self, event: Event, payload: Payload) -> None:
+        out = self.out if self.out is not None else sys.stdout
+        fields = ', '.join('{}={}'.format(k, v) for k, v in payload.items())
+        print('{}: {}'.format(event.value.capitalize(), fields), file=out)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Completion by a given-clause loop, in the style of DISCOUNT.
+
+The rules of the system are the active set, and the queue of critical pairs
+is the passive set. An equation is only simplified once it is selected
+(the "given clause"), by normalizing it with the active rules, whose
+matcher serves as the index. When it becomes a new active rule, only the
+active rules that the new rule can rewrite are simplified in turn:
+those with a reducible left side go back to the passive set,
+and those with a reducible right side are renormalized.
+
+This differs from :meth:`RewriteSystem.complete`'s default loop,
+which interreduces the whole system after every new rule."""
+from .budget import CompletionBudget, CompletionStatus
+from .checkpoint import Checkpointer
+from .parallel import OverlapPool
+from .rewrite_rule import RewriteRule, RewriteRuleList
+from .selection import SelectionStrategy
+
+from matchpy import Expression
+
+from typing import (Callable, List, Optional, TYPE_CHECKING)  # noqa: F401
+
+if TYPE_CHECKING:
+    from .rewrite_system import RewriteSystem  # noqa: F401
+
+
+class GivenClauseLoop(object):
+    """One run of given-clause completion on a system"""
+
+    def __init__(self, system: 'RewriteSystem',
+                 order: Callable[[Expression, Expression], bool],
+                 strategy: SelectionStrategy,
+                 checkpoint: Optional[Checkpointer] = None,
+                 pool: Optional[OverlapPool] = None,
+                 budget: Optional[CompletionBudget] = None) -> None:
+        """See :meth:`RewriteSystem.complete` for the parameters"""
+        self.system = system
+        self.order = order
+        self.strategy = strategy
+        self.checkpoint = checkpoint
+        self.pool = pool
+        self.budget = budget
+
+    def _make_passive(self) -> None:
+        """Start a fresh run by moving every rule to the passive set"""
+        system = self.system
+        for r in system.rules:
+            if not system.is_extension(r):
+                system.critical_pairs.push((r.left, r.right))
+        for s, t in system.equations:
+            system.critical_pairs.push((s, t))
+        system.clear_rules()
+        system.equations = []
+        system.ordered_rules = RewriteRuleList()
+        system.pairs_generated = True
+
+    def _backward_simplify(self, new_rule: RewriteRule) -> None:
+        """Simplify the active rules that :param:`new_rule` applies to"""
+        system = self.system
+        new_rules = RewriteRuleList(new_rule)
+        extension = system.extension(new_rule)
+        if extension is not None:
+            new_rules.append(extension)
+
+        to_passive = []  # type: List[RewriteRule]
+        to_renormalize = []  # type: List[RewriteRule]
+        for r in system.rules:
+            if (r is new_rule or r is extension
+                    or system.is_extension(r)):
+                continue
+            if any(True for _ in new_rules.apply_each_once(r.left)):
+                to_passive.append(r)
+            elif any(True for _ in new_rules.apply_each_once(r.right)):
+                to_renormalize.append(r)
+
+        for r in to_passive:
+            system.delete_rule(system.rule_id(r), 'back to passive')
+            system.critical_pairs.push((r.left, r.right))
+        for r in to_renormalize:
+            new_right = system.normalize(r.right)
+            system.replace_rule(system.rule_id(r),
+                                RewriteRule(r.left, new_right),
+                                'normalized right side')
+
+    def run(self) -> CompletionStatus:
+        """Complete the system, or stop once the budget runs out"""
+        system = self.system
+        if not system.pairs_generated:
+            self._make_passive()
+
+        while system.critical_pairs:
+            if self.checkpoint is not None and self.checkpoint.due():
+                self.checkpoint.write(system.checkpoint_state)
+            if self.budget is not None:
+                status = self.budget.check(len(system.rules),
+                                           len(system.critical_pairs))
+                if status is not None:
+                    return status
+
+            s, t = self.strategy.select(system.critical_pairs)
+            parents = system.critical_pairs.last_parents
+            system._pair_selected(s, t, parents)
+            s = system.normalize(s)
+            t = system.normalize(t)
+            # The sides share variables, so renaming one isn't allowed
+            if s == t:
+                system._pair_joined(s)
+                continue
+            if self.budget is not None and (self.budget.term_too_big(s)
+                                            or self.budget.term_too_big(t)):
+                system.critical_pairs.push((s, t), parents)
+                return CompletionStatus.TERM_SIZE_LIMIT
+
+            oriented = system.try_orient(s, t, self.order)
+            if oriented is None:
+                if system.equation_order is None:
+                    system.orient(s, t, self.order)  # Raises the usual error
+                system._keep_equation(s, t, self.pool)
+                continue
+            new_rule = RewriteRule(*oriented)
+            system.stats.pairs_oriented += 1
+            system.append_rule(new_rule, system._generation(parents))
+            self._backward_simplify(new_rule)
+            if system.equations:
+                system._simplify_equations()
+
+            system._add_critical_pairs_with(new_rule, self.pool)
+            extension = system.extension(new_rule)
+            if extension is not None:
+                system._add_critical_pairs_with(extension, self.pool)
+        return CompletionStatus.COMPLETE
@@ -15,12 +15,40 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """A class implementing the Knuth-Bendix ordering"""
-from .unification import equal_mod_renaming
-from .utils import (transitive_closure, PartialOrder,
-                    Operator, to_operator)
+from .precedence import Relation, as_precedence
+from .utils import Operator, to_operator, operands, Comparison
 
 from matchpy import (Expression,  Operation, Symbol)
-from typing import (Mapping, Type, cast)
+from collections import OrderedDict
+import numpy as np  # type: ignore
+from typing import (Dict, Iterable, List, Mapping, Optional,  # noqa: F401
+                    Tuple, Type, cast)
+
+WEIGHT_CACHE_SIZE = 4096
+"""How many term weights a :cls:`KnuthBendixOrdering` remembers"""
+
+_GT, _EQ, _LT = Comparison.GREATER, Comparison.EQUAL, Comparison.LESS
+_NC = Comparison.INCOMPARABLE
+
+
+class _Balance(object):
+    """The weight of one term minus the weight of another, and
+    how many more times each variable occurs in one than in the other"""
+
+    def __init__(self) -> None:
+        self.weight = 0
+        self.variables = {}  # type: Dict[str, int]
+        self.positive = 0
+        """Variables occurring more often in the first term"""
+        self.negative = 0
+        """Variables occurring more often in the second term"""
+
+    def add_variable(self, name: str, count: int) -> None:
+        old = self.variables.get(name, 0)
+        new = old + count
+        self.variables[name] = new
+        self.positive += (new > 0) - (old > 0)
+        self.negative += (new < 0) - (old < 0)
 
 
 # This ordering is from
@@ -40,15 +68,15 @@ class KnuthBendixOrdering(object):
     3. A weight for variables, w, such that, for all constants a, w(a) >= w."""
 
     def __init__(self, weights: Mapping[Operator, int], var_weight: int,
-                 op_gt: PartialOrder[Operator]) -> None:
+                 op_gt: Relation) -> None:
         """:param weights: Weights for all operations and constants.
         :param var_weight: Weight for variables,
         :param op_gt: Partial order (will be transitively closed over)
-        on the operators. Send in >"""
-        self.op_gt = transitive_closure(op_gt)
+        on the operators, or a :cls:`Precedence`. Send in >"""
+        self.op_gt = as_precedence(op_gt, weights)
         self.arities = {}  # type: Mapping[Operator, int]
         for op in weights:
-            if (op, op) in self.op_gt:
+            if self.op_gt.greater(op, op):
                 raise ValueError(">> on operators is reflexive for some reason")  # NOQA
             if (isinstance(op, type) and issubclass(op, Operation)):
                 op = cast(Type[Operation], op)
@@ -58,7 +86,7 @@ class KnuthBendixOrdering(object):
                 # The finicky condition
                 if weights[op] == 0 and self.arities[op] == 1:
                     for op2 in weights:
-                        if op != op2 and (op, op2) not in self.op_gt:
+                        if op != op2 and not self.op_gt.greater(op, op2):
                             raise(ValueError("Unary operator {} with weight 0 failed its ordering requirement".format(op)))  # NOQA
             elif isinstance(op, Symbol):
                 self.arities[op] = 0
@@ -68,58 +96,174 @@ class KnuthBendixOrdering(object):
                 raise TypeError("Unexpected type in weights")
         self.weights = weights
         self.var_weight = var_weight
+        self._weights = OrderedDict()  # type: Dict[int, Tuple[Expression, int]]  # NOQA
 
     def weight(self, term: Expression) -> int:
         """Calculate the weight of the given term under
-        the Knuth-Bendix ordering"""
+        the Knuth-Bendix ordering.
+
+        The weights of the last :data:`WEIGHT_CACHE_SIZE` terms asked about
+        are remembered, since completion compares the same terms often."""
+        key = id(term)
+        cached = self._weights.get(key)
+        if cached is not None and cached[0] is term:
+            self._weights.move_to_end(key)
+            return cached[1]
         ret = self.var_weight * sum(term.variables.multiplicities())
         for t, _ in term.preorder_iter():
             t_prime = to_operator(t)
             if t_prime in self.arities:
                 ret += self.weights[t_prime]
+        # The term is kept alive with its weight, so its id isn't reused
+        self._weights[key] = (term, ret)
+        if len(self._weights) > WEIGHT_CACHE_SIZE:
+            self._weights.popitem(last=False)
         return ret
 
+    def _add(self, term: Expression, sign: int, balance: _Balance) -> None:
+        """Count all of :param:`term` on the side given by :param:`sign`"""
+        balance.weight += sign * self.weight(term)
+        for name, count in term.variables.items():
+            balance.add_variable(name, sign * count)
+
+    def _compare(self, s: Expression, t: Expression,
+                 balance: _Balance) -> Comparison:
+        """Compare s and t, adding both of them to :param:`balance`.
+
+        This is Löchner's linear-time algorithm from
+        "Things to Know when Implementing KBO" (J. Autom. Reasoning, 2006).
+        The weights and variables of both terms are counted in one walk
+        over them, and the comparison of two subterms only looks at
+        their own counts: operands before them compared equal, so
+        they added nothing to :param:`balance`.
+
+        :returns: How s compares to t"""
+        s_head = to_operator(s)
+        t_head = to_operator(t)
+        if s_head is None:
+            balance.add_variable(s.variable_name, 1)
+            balance.weight += self.var_weight
+            if t_head is None:
+                balance.add_variable(t.variable_name, -1)
+                balance.weight -= self.var_weight
+                return _EQ if s.variable_name == t.variable_name else _NC
+            self._add(t, -1, balance)
+            return _LT if s.variable_name in t.variables else _NC
+        if t_head is None:
+            self._add(s, 1, balance)
+            balance.add_variable(t.variable_name, -1)
+            balance.weight -= self.var_weight
+            return _GT if t.variable_name in s.variables else _NC
+
+        s_ops = operands(s)
+        t_ops = operands(t)
+        lex = _NC
+        if s_head == t_head:
+            lex = _EQ
+            for s_i, t_i in zip(s_ops, t_ops):
+                if lex == _EQ:
+                    lex = self._compare(s_i, t_i, balance)
+                else:
+                    self._add(s_i, 1, balance)
+                    self._add(t_i, -1, balance)
+        else:
+            for s_i in s_ops:
+                self._add(s_i, 1, balance)
+            for t_i in t_ops:
+                self._add(t_i, -1, balance)
+        balance.weight += (self.weights.get(s_head, 0)
+                           - self.weights.get(t_head, 0))
+
+        # No variable occurs more often in t than in s, or the other way
+        greater = _GT if balance.negative == 0 else _NC
+        less = _LT if balance.positive == 0 else _NC
+        if balance.weight > 0:
+            return greater
+        if balance.weight < 0:
+            return less
+        if self.op_gt.greater(s_head, t_head):
+            return greater
+        if self.op_gt.greater(t_head, s_head):
+            return less
+        if s_head != t_head or lex == _NC:
+            return _NC
+        if lex == _GT:
+            return greater
+        if lex == _LT:
+            return less
+        return _EQ
+
+    def compare(self, s: Expression, t: Expression) -> Comparison:
+        """Compare s and t under the given Knuth-Bendix ordering"""
+        return self._compare(s, t, _Balance())
+
     def __call__(self, s: Expression, t: Expression) -> bool:
         """Determine whether s > t under the given Knuth-Bendix ordering"""
-        # Fail if more of a variable on the right than on the left
-        if not s.variables >= t.variables:
-            return False
-        w_s = self.weight(s)
-        w_t = self.weight(t)
-        if w_s > w_t:
-            return True
-        elif w_s == w_t:
-            s_head = to_operator(s)
-            t_head = to_operator(t)
-            # The f(f(... f(x))) == x condition
-            if s_head is not None and self.arities[s_head] == 1:
-                s_prime = cast(Operation, s).operands[0]
-                iterating = True
-                while iterating:
-                    new_head = to_operator(s_prime)
-                    if new_head != s_head:
-                        iterating = False
-                    if equal_mod_renaming(s_prime, t):
-                        return True
-                    if isinstance(s_prime, Operation):
-                        s_prime = s_prime.operands[0]
+        return self._compare(s, t, _Balance()) == _GT
+
+    def compare_many(self, pairs: Iterable[Tuple[Expression, Expression]])\
+            -> List[Comparison]:
+        """:meth:`compare` each pair of terms.
+
+        The weights and variable counts of all the terms are found in
+        one pass, which settles every pair with different weights, and
+        every pair where neither side has all the other's variables.
+        Only the rest are compared in full."""
+        pairs = list(pairs)
+        n = len(pairs)
+        # One entry per symbol occurrence
+        pair_of = []  # type: List[int]
+        weight_of = []  # type: List[int]
+        # One entry per variable occurrence, with ids for
+        # each variable of each pair
+        var_ids = {}  # type: Dict[Tuple[int, str], int]
+        var_of = []  # type: List[int]
+        var_sign = []  # type: List[int]
+        for k, pair in enumerate(pairs):
+            for sign, term in zip((1, -1), pair):
+                todo = [term]
+                while todo:
+                    sub = todo.pop()
+                    pair_of.append(k)
+                    if isinstance(sub, Operation):
+                        weight_of.append(
+                            sign * self.weights.get(type(sub), 0))
+                        todo.extend(sub.operands)
+                    elif isinstance(sub, Symbol):
+                        weight_of.append(sign * self.weights.get(sub, 0))
                     else:
-                        iterating = False
+                        key = (k, sub.variable_name)
+                        var_of.append(var_ids.setdefault(key, len(var_ids)))
+                        var_sign.append(sign)
+                        weight_of.append(sign * self.var_weight)
+
+        weight = np.bincount(np.array(pair_of, dtype=np.intp),
+                             weights=np.array(weight_of, dtype=float),
+                             minlength=n)
+        balance = np.bincount(np.array(var_of, dtype=np.intp),
+                              weights=np.array(var_sign, dtype=float),
+                              minlength=len(var_ids))
+        var_pair = np.fromiter((k for k, _ in var_ids), dtype=np.intp,
+                               count=len(var_ids))
+        fewest = np.zeros(n)
+        most = np.zeros(n)
+        np.minimum.at(fewest, var_pair, balance)
+        np.maximum.at(most, var_pair, balance)
+        # No variable occurs more often on the right (or left)
+        s_covers = fewest >= 0
+        t_covers = most <= 0
 
-            if s_head != t_head:
-                return (s_head, t_head) in self.op_gt
+        greater = s_covers & (weight > 0)
+        less = t_covers & (weight < 0)
+        tied = (weight == 0) & (s_covers | t_covers)
+        ret = []  # type: List[Comparison]
+        for k, (s, t) in enumerate(pairs):
+            if greater[k]:
+                ret.append(_GT)
+            elif less[k]:
+                ret.append(_LT)
+            elif tied[k]:
+                ret.append(self.compare(s, t))
             else:
-                if s_head is None or isinstance(s_head, Symbol):
-                    return False
-                elif isinstance(s, Operation) and isinstance(t, Operation):
-                    for i in range(0, self.arities[s_head]):
-                        if equal_mod_renaming(s.operands[i], t.operands[i]):
-                            continue
-                        if self(s.operands[i], t.operands[i]):
-                            return True
-                        else:
-                            return False
-                else:
-                    raise(TypeError("Ok, this is literally impossible. type(s_head) == {}, type(t_head) == {}".format(  # NOQA
-                                    type(s_head), type(t_head))))
-        return False
+                ret.append(_NC)
+        return ret
@@ -15,11 +15,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """A class implementing the lexicographic path ordering"""
-from .utils import (transitive_closure, PartialOrder,
-                    Operator, to_operator, operands)
+from .precedence import Relation, as_precedence
+from .utils import to_operator, operands, Comparison
 
-from matchpy import (Expression)
-from typing import List
+from matchpy import Expression
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple  # noqa: F401
+
+_Memo = Dict[Tuple[int, int], bool]
+"""Results of comparing pairs of subterms, by their identities"""
 
 
 class LexPathOrdering(object):
@@ -32,6 +36,7 @@ class LexPathOrdering(object):
     they float over.
 
     The ordering is as follows.
+    - s > x for a variable x if x occurs in s but isn't s
     - If s_i >= t for any i, then f(s_1, s_2, ... s_m) > t
     - s >= s for all s
     - If f > g and f(s_1, s_2, .. s_m) > t_i for all i
@@ -45,24 +50,79 @@ class LexPathOrdering(object):
     If not (a_i >= b_i) while scanning, a is not >[lex] b.
     If b runs out of elements before a while searching, a is >[lex] b"""
 
-    def __init__(self, op_gt: PartialOrder[Operator]) -> None:
+    def __init__(self, op_gt: Relation,
+                 cache_size: Optional[int] = None) -> None:
         """:param op_gt: Total order (will be transitively closed over)
-        on the operators. Send in >"""
-
-        self.op_gt = transitive_closure(op_gt)
-
-    def _lex_gt(self, s_ops: List[Expression],
-                t_ops: List[Expression]) -> bool:
+        on the operators, or a :cls:`Precedence`. Send in >
+        :param cache_size: If given, remember the results of up to this
+        many top-level comparisons, dropping the least recently used.
+        Completion compares the same pairs of terms over and over."""
+
+        self.op_gt = as_precedence(op_gt)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # type: Dict[Tuple[Expression, Expression], bool]  # NOQA
+        self.hits = 0
+        self.misses = 0
+
+    def _lex_gt(self, s_ops: List[Expression], t_ops: List[Expression],
+                memo: _Memo) -> bool:
         """The lexicographic order on tuples of expressions"""
         for s_i, t_i in zip(s_ops, t_ops):
-            if self(s_i, t_i):
+            if self._gt(s_i, t_i, memo):
                 return True
-            if not s_i == t_i:
+            if not (s_i is t_i or s_i == t_i):
                 return False
         return len(s_ops) > len(t_ops)
 
     def __call__(self, s: Expression, t: Expression) -> bool:
         """Order under the lexicographic path ordering"""
+        return self._greater(s, t, {})
+
+    def compare(self, s: Expression, t: Expression) -> Comparison:
+        """Compare s and t under the lexicographic path ordering.
+
+        Both directions share one table of subterm comparisons."""
+        memo = {}  # type: _Memo
+        if self._greater(s, t, memo):
+            return Comparison.GREATER
+        if s == t:
+            return Comparison.EQUAL
+        if self._greater(t, s, memo):
+            return Comparison.LESS
+        return Comparison.INCOMPARABLE
+
+    def _greater(self, s: Expression, t: Expression, memo: _Memo) -> bool:
+        """Whether s > t, from the cache if there is one"""
+        if self.cache_size is None:
+            return self._gt(s, t, memo)
+        key = (s, t)
+        ret = self.cache.get(key)
+        if ret is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return ret
+        self.misses += 1
+        ret = self._gt(s, t, memo)
+        self.cache[key] = ret
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return ret
+
+    def _gt(self, s: Expression, t: Expression, memo: _Memo) -> bool:
+        """:meth:`__call__` on subterms of one top-level comparison.
+
+        Each pair of subterms is compared once, with the result kept in
+        :param:`memo` (keyed by identity, since the terms stay alive for
+        the whole comparison), which keeps the comparison polynomial
+        instead of exponential in the depth of the terms."""
+        key = (id(s), id(t))
+        ret = memo.get(key)
+        if ret is None:
+            ret = self._compare(s, t, memo)
+            memo[key] = ret
+        return ret
+
+    def _compare(self, s: Expression, t: Expression, memo: _Memo) -> bool:
         s_head = to_operator(s)
         t_head = to_operator(t)
         if s_head is None:
@@ -70,23 +130,24 @@ class LexPathOrdering(object):
             return False
 
         if t_head is None:
-            return True
+            # Otherwise, some instance of t isn't smaller
+            return t.variable_name in s.variables
 
-        if any(self(a, t) or a == t
+        if any(self._gt(a, t, memo) or a == t
                for a in operands(s)):  # Empty list is False
             return True
 
-        if (s_head, t_head) in self.op_gt:
+        if self.op_gt.greater(s_head, t_head):
             if t_head is None:
-                raise(ValueError("Somehow None got into the comparisons"))
-            if all(self(s, a) for a in operands(t)):
+                raise ValueError("Somehow None got into the comparisons")
+            if all(self._gt(s, a, memo) for a in operands(t)):
                 return True
 
         if s_head == t_head:  # Can't be two vars, that's dealt with
             s_ops = operands(s)
             t_ops = operands(t)
-            if self._lex_gt(s_ops, t_ops):
-                if all(self(s, a) for a in t_ops[1:]):
+            if self._lex_gt(s_ops, t_ops, memo):
+                if all(self._gt(s, a, memo) for a in t_ops[1:]):
                     return True
 
         return False
@@ -21,20 +21,37 @@ from typing import List
 from mypy_extensions import NoReturn
 
 import argparse
+import json
 import sys
 
 from knuth_bendix import metadata
-from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
-# from knuth_bendix.lex_path_ordering import LexPathOrdering
-from knuth_bendix.rewrite_system import RewriteSystem
-from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+from knuth_bendix.driver import (ORDERINGS, ProblemSettings, Record,
+                                 completed, format_record, parse_precedence,
+                                 parse_weights, run_batch, solve)
+from knuth_bendix.events import (JsonLinesSink, Observer,  # noqa: F401
+                                 TextSink)
+from knuth_bendix.rewrite_system import COMPLETION_LOOPS
+from knuth_bendix.selection import STRATEGIES
+
+
+def _write(record: Record, output_format: str) -> None:
+    if output_format == 'json':
+        print(json.dumps(record))
+    else:
+        print(format_record(record))
+    sys.stdout.flush()
 
 
 def main(argv: List[str]) -> int:
     """Program entry point.
 
+    Completes the equations in each TPTP file given. With several files,
+    or a number of jobs or a timeout, the problems are completed in
+    worker processes and each result is written as soon as it is ready.
+
     :param argv: command-line arguments
     :type argv: :class:`list`
+    :returns: 0 if every problem was completed, 1 otherwise
     """
     author_strings = []
     for name, email in zip(metadata.authors, metadata.emails):
@@ -61,30 +78,152 @@ URL: <{url}>
         action='version',
         version='{0} {1}'.format(metadata.project, metadata.version))
 
-    arg_parser.parse_args(args=argv[1:])
-
-    x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
-    times = Operation.new('*', Arity.binary, 'times', infix=True)
-    i = Operation.new('i', Arity.unary)
-    e = Symbol('e')
-
-    order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
-                                {(i, times), (times, e)})
-
-    equations = [(times(times(x, y), z), times(x, times(y, z))),
-                 (times(e, x), x),
-                 (times(i(x), x), e)]
-    print("Equations:")
-    for s, t in equations:
-        print(str(s), "=", str(t))
-
-    system = RewriteSystem.from_equations(order, equations)
-    system.complete(order)
-
-    print("Completed rules:")
-    for r in system.rules:
-        print(str(r))
-    return 0
+    arg_parser.add_argument(
+        'problems',
+        nargs='+',
+        metavar='FILE',
+        help='TPTP file of equations to complete')
+
+    ordering = arg_parser.add_argument_group('ordering')
+    ordering.add_argument(
+        '--order',
+        choices=ORDERINGS,
+        default='kbo',
+        help='Knuth-Bendix ordering, lexicographic path ordering, '
+        'or AC-compatible path ordering (default: %(default)s)')
+    ordering.add_argument(
+        '--precedence',
+        metavar='CHAINS',
+        help="precedence on the operators, such as 'i > times > e, f > g'. "
+        'Without this (or --weights), a kbo or lpo ordering is '
+        'synthesized to orient the equations. Needed for acrpo')
+    ordering.add_argument(
+        '--weights',
+        metavar='WEIGHTS',
+        help="Knuth-Bendix ordering weights, such as 'times=0, e=1'. "
+        'Operators not listed weigh 1. Only for kbo')
+    ordering.add_argument(
+        '--var-weight',
+        type=int,
+        default=1,
+        help='weight of variables (default: %(default)s)')
+    ordering.add_argument(
+        '--ac',
+        action='append',
+        default=[],
+        metavar='NAME',
+        help='make the operation NAME associative and commutative')
+
+    strategy = arg_parser.add_argument_group('strategy and budget')
+    strategy.add_argument(
+        '--strategy',
+        choices=sorted(STRATEGIES),
+        default='size',
+        help='how to pick the next critical pair (default: %(default)s)')
+    strategy.add_argument(
+        '--loop',
+        choices=COMPLETION_LOOPS,
+        default='standard',
+        help='completion loop (default: %(default)s)')
+    strategy.add_argument(
+        '--unfailing',
+        action='store_true',
+        help='keep unorientable equations for ordered rewriting')
+    strategy.add_argument(
+        '--max-seconds',
+        type=float,
+        help='stop each completion after this many seconds')
+    strategy.add_argument(
+        '--max-rules',
+        type=int,
+        help='stop each completion once it has more rules than this')
+    strategy.add_argument(
+        '--max-pending',
+        type=int,
+        help='stop each completion once more critical pairs than this '
+        'are waiting')
+    strategy.add_argument(
+        '--max-term-size',
+        type=int,
+        help='stop each completion at a rule with a side larger than this')
+
+    output = arg_parser.add_argument_group('output')
+    output.add_argument(
+        '--format',
+        choices=['text', 'json'],
+        default='text',
+        help='write results as text, or as one JSON object per line '
+        '(default: %(default)s)')
+    output.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='print each step of the completion')
+    output.add_argument(
+        '--stats',
+        action='store_true',
+        help='time the phases of the completion and print statistics')
+    output.add_argument(
+        '--events',
+        metavar='FILE',
+        help='write each step of the completion to FILE as JSON lines')
+
+    batch = arg_parser.add_argument_group('batch mode')
+    batch.add_argument(
+        '-j', '--jobs',
+        type=int,
+        help='complete this many problems at once (default: number of CPUs)')
+    batch.add_argument(
+        '--timeout',
+        type=float,
+        help='stop the worker for a problem after this many seconds')
+
+    args = arg_parser.parse_args(args=argv[1:])
+
+    try:
+        settings = ProblemSettings(
+            order=args.order,
+            weights=parse_weights(args.weights)
+            if args.weights is not None else None,
+            var_weight=args.var_weight,
+            precedence=parse_precedence(args.precedence)
+            if args.precedence is not None else None,
+            ac=args.ac,
+            strategy=args.strategy,
+            loop=args.loop,
+            unfailing=args.unfailing,
+            max_seconds=args.max_seconds,
+            max_rules=args.max_rules,
+            max_pending=args.max_pending,
+            max_term_size=args.max_term_size,
+            profile=args.stats)
+    except ValueError as exc:
+        arg_parser.error(str(exc))
+
+    if (len(args.problems) > 1 or args.jobs is not None
+            or args.timeout is not None):
+        if args.verbose or args.events is not None:
+            arg_parser.error('--verbose and --events need a single problem '
+                             'without --jobs or --timeout')
+        if args.jobs is not None and args.jobs < 1:
+            arg_parser.error('--jobs must be at least 1')
+        ok = True
+        for record in run_batch(args.problems, settings, args.jobs,
+                                args.timeout):
+            ok = completed(record) and ok
+            _write(record, args.format)
+        return 0 if ok else 1
+
+    observers = []  # type: List[Observer]
+    if args.verbose:
+        observers.append(TextSink())
+    if args.events is not None:
+        with JsonLinesSink(args.events) as sink:
+            observers.append(sink)
+            record = solve(args.problems[0], settings, observers)
+    else:
+        record = solve(args.problems[0], settings, observers)
+    _write(record, args.format)
+    return 0 if completed(record) else 1
 
 
 def entry_point() -> NoReturn:
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Computing critical pairs in worker processes.
+
+Terms cross the process boundary in the encoding of
+:mod:`knuth_bendix.serialization`, since matchpy operations don't pickle.
+Each worker gets the new rule and a contiguous slice of the existing rules,
+and the slices' results are put back together in order, so the queue
+receives exactly the same pairs in the same order on every run."""
+from .rewrite_rule import RewriteRule, RewriteRuleList
+from .selection import CriticalPair
+from .serialization import TermEncoder, TermDecoder, encode_term
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+import weakref
+
+from typing import (Any, Callable, Dict, Iterable, List,  # noqa: F401
+                    MutableMapping, Optional, Set, Tuple)
+
+_SELF = 'self'
+_PARTNER = 'partner'
+
+
+def _pairs_for_chunk(operations: Dict[str, Any],
+                     rule_data: Tuple[Any, Any],
+                     chunk: List[Tuple[Any, Any]]) -> List[List[List[Any]]]:
+    """Worker side of :meth:`OverlapPool.critical_pairs`
+
+    :param operations: Descriptions of the operations in the terms
+    :param rule_data: The encoded new rule and its partner (or None)
+    :param chunk: The encoded existing rules with their partners.
+    Instead of a rule, there may be a marker saying it is the new rule
+    or the new rule's partner.
+    :returns: The encoded critical pairs with each rule of the chunk,
+    in order"""
+    # Imported here since the rewrite system uses this module
+    from .rewrite_system import critical_pairs_between
+
+    decoder = TermDecoder(operations)
+
+    def decode_rule(data: Any) -> Optional[RewriteRule]:
+        if data is None:
+            return None
+        return RewriteRule(decoder.decode(data[0]), decoder.decode(data[1]))
+
+    rule = decode_rule(rule_data[0])
+    rule_partner = decode_rule(rule_data[1])
+    if rule is None:
+        raise ValueError("No rule to find critical pairs with")
+    pairs = []  # type: List[Tuple[RewriteRule, Optional[RewriteRule]]]
+    for other_data, other_partner_data in chunk:
+        if other_data == _SELF:
+            other, other_partner = rule, rule_partner
+        elif other_data == _PARTNER:
+            other, other_partner = rule_partner, rule
+        else:
+            other = decode_rule(other_data)
+            other_partner = decode_rule(other_partner_data)
+        if other is None:
+            raise ValueError("Missing rule in critical pair computation")
+        pairs.append((other, other_partner))
+
+    # One matcher for the whole chunk, as the system has one for its rules
+    matcher = RewriteRuleList()
+    seen = set()  # type: Set[RewriteRule]
+    for r in chain([rule, rule_partner], *pairs):
+        if r is not None and r not in seen:
+            seen.add(r)
+            matcher.append(r)
+    return [[[encode_term(s), encode_term(t)]
+             for s, t in critical_pairs_between(rule, rule_partner,
+                                                other, other_partner,
+                                                [matcher])]
+            for other, other_partner in pairs]
+
+
+class OverlapPool(object):
+    """A pool of processes for finding critical pairs.
+
+    Meant to be used as a context manager, so the processes are shut down
+    once the completion is done with them."""
+
+    def __init__(self, workers: int, min_rules: int = 32,
+                 chunks_per_worker: int = 4) -> None:
+        """:param workers: Number of worker processes
+        :param min_rules: Below this many rules, computing the pairs
+        in this process is faster than shipping the work out.
+        :param chunks_per_worker: How many pieces to cut the work into
+        per worker, so an unlucky slice doesn't hold up everything else"""
+        if workers < 1:
+            raise ValueError("Need at least one worker")
+        self.workers = workers
+        self.min_rules = min_rules
+        self.chunks_per_worker = chunks_per_worker
+        self.executor = ProcessPoolExecutor(workers)
+        self.encoder = TermEncoder()
+        self._encoded = weakref.WeakKeyDictionary()  # type: MutableMapping[RewriteRule, Any] # NOQA
+
+    def worth_using(self, n_rules: int) -> bool:
+        """Whether to hand the pairs with :param:`n_rules` rules
+        over to the pool"""
+        return n_rules >= self.min_rules
+
+    def _encode_rule(self, rule: Optional[RewriteRule]) -> Any:
+        """Encode a rule, reusing earlier work since rules are immutable"""
+        if rule is None:
+            return None
+        ret = self._encoded.get(rule)
+        if ret is None:
+            ret = [self.encoder.encode(rule.left),
+                   self.encoder.encode(rule.right)]
+            self._encoded[rule] = ret
+        return ret
+
+    def critical_pairs(self, rule: RewriteRule,
+                       rules: Iterable[RewriteRule],
+                       partner: Callable[[RewriteRule],
+                                         Optional[RewriteRule]]) ->\
+            List[List[CriticalPair]]:
+        """Find the critical pairs between :param:`rule` and each of
+        :param:`rules`, in the order the sequential algorithm would.
+        There is one list of pairs for each of :param:`rules`.
+
+        :param partner: Gives the extension of a rule or the rule
+        it extends, if any"""
+        rule_partner = partner(rule)
+        rule_data = (self._encode_rule(rule), self._encode_rule(rule_partner))
+        others = []  # type: List[Tuple[Any, Any]]
+        for other in rules:
+            if other is rule:
+                others.append((_SELF, None))
+            elif other is rule_partner:
+                others.append((_PARTNER, None))
+            else:
+                others.append((self._encode_rule(other),
+                               self._encode_rule(partner(other))))
+
+        n_chunks = min(len(others), self.workers * self.chunks_per_worker)
+        size, extra = divmod(len(others), max(n_chunks, 1))
+        chunks = []
+        start = 0
+        for n in range(n_chunks):
+            end = start + size + (1 if n < extra else 0)
+            chunks.append(others[start:end])
+            start = end
+
+        decoder = TermDecoder(self.encoder.operations, self.encoder.signature)
+        ret = []  # type: List[List[CriticalPair]]
+        for result in self.executor.map(_pairs_for_chunk,
+                                        repeat(self.encoder.operations),
+                                        repeat(rule_data), chunks):
+            for pairs in result:
+                ret.append([(decoder.decode(s), decoder.decode(t))
+                            for s, t in pairs])
+        return ret
+
+    def close(self) -> None:
+        """Shut the worker processes down"""
+        self.executor.shutdown()
+
+    def __enter__(self) -> 'OverlapPool':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Precedences: strict orders on operators, as used by term orderings.
+
+Each operator gets an integer id, and the relation is closed
+with Warshall's algorithm over a NumPy boolean matrix.
+Each row is then kept as a Python integer bitset. An acyclic precedence
+is also extended to a total order, numbering the operators by rank.
+Asking whether f > g compares the ranks, which settles it outright
+when the precedence is total, and otherwise checks the bitset only
+for pairs the ranks don't rule out."""
+from .utils import Operator
+
+import numpy as np  # type: ignore
+
+from typing import (Dict, Iterable, Iterator, List, Optional,  # noqa: F401
+                    Tuple)
+
+Relation = Iterable[Tuple[Operator, Operator]]
+"""Pairs (f, g) of operators with f > g"""
+
+
+class Precedence(object):
+    """A transitively closed order on operators.
+
+    The pairs (f, g) with f > g can be iterated over and checked with
+    ``in``, like the sets of pairs orderings used to take."""
+
+    def __init__(self, op_gt: Iterable[Tuple[Operator, Operator]],
+                 operators: Iterable[Operator] = ()) -> None:
+        """:param op_gt: Pairs (f, g) such that f > g.
+        Will be transitively closed over.
+        :param operators: Operators to give ids to even if they
+        appear in no pair"""
+        pairs = list(op_gt)
+        self.operators = []  # type: List[Operator]
+        self.ids = {}  # type: Dict[Operator, int]
+        for op in operators:
+            self._add(op)
+        for greater, lesser in pairs:
+            self._add(greater)
+            self._add(lesser)
+
+        n = len(self.operators)
+        matrix = np.zeros((n, n), dtype=bool)
+        for greater, lesser in pairs:
+            matrix[self.ids[greater], self.ids[lesser]] = True
+        for k in range(n):
+            # Everything above k is above everything below k
+            matrix |= np.outer(matrix[:, k], matrix[k, :])
+        self.matrix = matrix
+        """matrix[i, j] is whether operator i > operator j"""
+
+        packed = np.packbits(matrix, axis=1, bitorder='little')
+        self.rows = [int.from_bytes(row.tobytes(), 'little')
+                     for row in packed]  # type: List[int]
+        """Bitsets of the operators below each operator, by id"""
+
+        self.ranks = None  # type: Optional[Dict[Operator, int]]
+        """If the precedence is acyclic, the position of each operator
+        in a total order extending it, from 0 for the least, so that
+        f > g implies f's rank is higher. None otherwise."""
+        self.total = False
+        """Whether f > g exactly when f's rank is higher"""
+        self._rank_of = None  # type: Optional[List[int]]
+        if not self.cyclic():
+            # Each operator has more operators below it than anything
+            # it is above, so sorting by that count extends the order
+            below = matrix.sum(axis=1).tolist()
+            by_rank = sorted(range(n), key=lambda i: (below[i], i))
+            self._rank_of = [0] * n
+            for rank, i in enumerate(by_rank):
+                self._rank_of[i] = rank
+            self.ranks = {op: self._rank_of[i]
+                          for i, op in enumerate(self.operators)}
+            self.total = len(self) == n * (n - 1) // 2
+
+    def _add(self, op: Operator) -> None:
+        if op not in self.ids:
+            self.ids[op] = len(self.operators)
+            self.operators.append(op)
+
+    def greater(self, f: Optional[Operator], g: Optional[Operator]) -> bool:
+        """Whether f > g. Operators the precedence doesn't know about
+        (and variables, as None) are not related to anything."""
+        i = self.ids.get(f)  # type: ignore
+        j = self.ids.get(g)  # type: ignore
+        if i is None or j is None:
+            return False
+        rank_of = self._rank_of
+        if rank_of is not None:
+            if rank_of[i] <= rank_of[j]:
+                return False
+            if self.total:
+                return True
+        return bool(self.rows[i] >> j & 1)
+
+    def cyclic(self) -> List[Operator]:
+        """The operators that end up greater than themselves"""
+        return [op for i, op in enumerate(self.operators)
+                if self.matrix[i, i]]
+
+    def __contains__(self, pair: Tuple[Operator, Operator]) -> bool:
+        return self.greater(*pair)
+
+    def __iter__(self) -> Iterator[Tuple[Operator, Operator]]:
+        for i, j in zip(*np.nonzero(self.matrix)):
+            yield (self.operators[i], self.operators[j])
+
+    def __len__(self) -> int:
+        return int(self.matrix.sum())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Precedence):
+            return set(self) == set(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return 'Precedence({!r})'.format(set(self))
+
+
+def as_precedence(op_gt: Relation,
+                  operators: Iterable[Operator] = ()) -> Precedence:
+    """:param:`op_gt` if it is already a :cls:`Precedence`,
+    and its closure otherwise"""
+    if isinstance(op_gt, Precedence):
+        return op_gt
+    return Precedence(op_gt, operators)
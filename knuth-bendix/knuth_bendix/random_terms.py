@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Random terms, equations and rules, for stress and property tests.
+
+Generation is driven by a seeded :cls:`random.Random`, so the same seed
+over the same operators gives the same terms. Terms are built without
+recursion, so they can be large, though deep terms may still be too
+deep for other code; :param:`max_depth` bounds the depth."""
+from .rewrite_rule import RewriteRule
+from .rewrite_system import RewriteSystem, GtOrder
+from .unification import uniqify_variables
+from .utils import Operator
+
+import matchpy
+from matchpy import Expression, Operation, Symbol, Wildcard, get_variables
+import random
+
+from typing import (Any, Iterable, List, Optional, Sequence,  # noqa: F401
+                    Set, Tuple, Union)
+
+_Head = Union[Operator, str]
+"""An operator, or the name of a variable"""
+
+
+class RandomTerms(object):
+    """A source of random terms over some operators"""
+
+    def __init__(self, operators: Iterable[Operator],
+                 seed: Optional[int] = None,
+                 variable_probability: float = 0.3,
+                 sharing: float = 0.5,
+                 max_ac_operands: int = 4,
+                 prefix: str = 'x') -> None:
+        """:param operators: Constants (:cls:`Symbol`) and operations
+        to build terms from. Associative-commutative operations get
+        between 2 and :param:`max_ac_operands` operands.
+        :param seed: Seed for the random choices
+        :param variable_probability: Chance that a leaf is a variable
+        rather than a constant
+        :param sharing: Chance that a variable leaf reuses a variable
+        the term already has, rather than a new one
+        :param prefix: Start of the names of variables"""
+        self.constants = []  # type: List[Symbol]
+        self.operations = []  # type: List[Any]
+        for op in operators:
+            if isinstance(op, Symbol):
+                self.constants.append(op)
+            elif isinstance(op, type) and issubclass(op, Operation):
+                if op.associative != op.commutative:
+                    raise ValueError("Can't make terms with {}, which is "
+                                     "only associative or commutative"
+                                     .format(op.name))
+                if not op.associative and not op.arity.fixed_size:
+                    raise ValueError("Can't tell how many operands "
+                                     "{} takes".format(op.name))
+                self.operations.append(op)
+            else:
+                raise TypeError("Unexpected operator {!r}".format(op))
+        self.random = random.Random(seed)
+        self.variable_probability = variable_probability
+        self.sharing = sharing
+        self.max_ac_operands = max_ac_operands
+        self.prefix = prefix
+
+    def _arities(self, op: Any, size: int) -> Sequence[int]:
+        """The numbers of operands :param:`op` can take
+        in a term of :param:`size` nodes"""
+        if op.associative:
+            return range(2, min(self.max_ac_operands, size - 1) + 1)
+        return [op.arity.min_count] if op.arity.min_count < size else []
+
+    def _split(self, total: int, parts: int) -> List[int]:
+        """:param:`total` split randomly into :param:`parts` positive
+        numbers"""
+        cuts = sorted(self.random.sample(range(1, total), parts - 1))
+        return [b - a for a, b in zip([0] + cuts, cuts + [total])]
+
+    def _leaf(self, used: List[str],
+              variables: Optional[Sequence[str]]) -> _Head:
+        rand = self.random
+        pool = used if variables is None else variables
+        if self.constants and (not pool and variables is not None
+                               or rand.random() >= self.variable_probability):
+            return rand.choice(self.constants)
+        if variables is None and (not used or rand.random() >= self.sharing):
+            name = '{}{}'.format(self.prefix, len(used))
+            used.append(name)
+            return name
+        if not pool:
+            raise ValueError("No constants or variables to make a leaf of")
+        return rand.choice(pool)
+
+    def term(self, size: int, max_depth: Optional[int] = None,
+             variables: Optional[Sequence[str]] = None) -> Expression:
+        """A random term with :param:`size` nodes. There may be fewer,
+        if the depth limit is hit, or if nested AC operations are
+        flattened, or if no operation has the right number of operands.
+
+        :param max_depth: Deepest a node may be, if limited
+        :param variables: If given, use only these variables"""
+        if size < 1:
+            raise ValueError("Terms have at least one node")
+        rand = self.random
+        used = []  # type: List[str]
+        # Choose the heads in preorder, then build the term bottom up
+        heads = []  # type: List[Tuple[_Head, int]]
+        pending = [(size, 0)]
+        while pending:
+            n, depth = pending.pop()
+            choices = []  # type: List[Tuple[Any, int]]
+            if max_depth is None or depth < max_depth:
+                choices = [(op, k) for op in self.operations
+                           for k in self._arities(op, n)]
+            if not choices:
+                heads.append((self._leaf(used, variables), 0))
+                continue
+            op, k = rand.choice(choices)
+            heads.append((op, k))
+            for child in reversed(self._split(n - 1, k)):
+                pending.append((child, depth + 1))
+
+        built = []  # type: List[Expression]
+        for head, k in reversed(heads):
+            if isinstance(head, str):
+                built.append(matchpy.make_dot_variable(head))
+            elif isinstance(head, Symbol):
+                built.append(head)
+            else:
+                operands = [built.pop() for _ in range(k)]
+                built.append(head(*operands))
+        return built[0]
+
+    def equation(self, size: int, max_depth: Optional[int] = None)\
+            -> Tuple[Expression, Expression]:
+        """Two random terms of up to :param:`size` nodes,
+        sharing variables"""
+        s = self.term(size, max_depth)
+        t = self.term(self.random.randint(1, size), max_depth,
+                      sorted(get_variables(s)))
+        return (s, t)
+
+    def equations(self, n: int, size: int,
+                  max_depth: Optional[int] = None)\
+            -> List[Tuple[Expression, Expression]]:
+        """:param:`n` random equations, as for :meth:`equation`"""
+        return [self.equation(size, max_depth) for _ in range(n)]
+
+    def rule(self, size: int, order: Optional[GtOrder[Expression]] = None,
+             max_depth: Optional[int] = None,
+             tries: int = 100) -> RewriteRule:
+        """A random rule whose left side has :param:`size` nodes
+        and isn't a variable, and whose right side has no new variables
+
+        :param order: If given, the rule is oriented by it
+        :param tries: Equations to try before giving up
+        :raises: :cls:`ValueError` if none of them made a rule"""
+        for _ in range(tries):
+            left, right = self.equation(size, max_depth)
+            if order is not None:
+                oriented = RewriteSystem.try_orient(left, right, order)
+                if oriented is None:
+                    continue
+                left, right = oriented
+            if (not isinstance(left, Wildcard)
+                    and get_variables(right) <= get_variables(left)):
+                return RewriteRule(left, right)
+        raise ValueError("No rule found in {} tries".format(tries))
+
+    def rules(self, n: int, size: int,
+              order: Optional[GtOrder[Expression]] = None,
+              max_depth: Optional[int] = None) -> List[RewriteRule]:
+        """:param:`n` random rules, as for :meth:`rule`"""
+        return [self.rule(size, order, max_depth) for _ in range(n)]
+
+    def generalize(self, term: Expression,
+                   probability: float = 0.2) -> Expression:
+        """:param:`term` with random subterms replaced by new variables
+
+        :param probability: Chance that each proper subterm is replaced,
+        unless it is inside one that already was"""
+        replacements = []  # type: List[Tuple[Tuple[int, ...], Expression]]
+        for subterm, pos in term.preorder_iter():
+            if not pos or any(pos[:len(p)] == p for p, _ in replacements):
+                continue
+            if self.random.random() < probability:
+                name = '{}g{}'.format(self.prefix, len(replacements))
+                replacements.append((pos,
+                                     matchpy.make_dot_variable(name)))
+        if not replacements:
+            return term
+        ret = matchpy.replace_many(term, replacements)
+        if not isinstance(ret, Expression):
+            raise TypeError("Replacing in a term gave a list of terms")
+        return ret
+
+    def unifiable_pair(self, size: int, max_depth: Optional[int] = None,
+                       probability: float = 0.2)\
+            -> Tuple[Expression, Expression]:
+        """Two terms with no variables in common that have a unifier:
+        generalizations of the same random term"""
+        term = self.term(size, max_depth)
+        s = self.generalize(term, probability)
+        t = self.generalize(term, probability)
+        return (s, uniqify_variables(t, s))
@@ -25,7 +25,7 @@ import matchpy
 from matchpy import (Expression, get_variables, ManyToOneMatcher,
                      rename_variables)
 from typing import (Iterable, Optional, Iterator, Tuple, List,  # noqa: F401
-                    Container, Dict)
+                    Container, Dict, Callable, Set)
 
 
 class RewriteRule(object):
@@ -69,72 +69,151 @@ class RewriteRule(object):
 
 class RewriteRuleList(Iterable[RewriteRule]):
     """A list of :cls:`RewriteRule`s, supporting efficient replacement,
-    through matchpy's :cls:`ManyToOneMatcher`"""
+    through matchpy's :cls:`ManyToOneMatcher`.
+
+    Removing a rule only empties its slot in the list, and
+    the slots are only compacted once they outnumber the rules.
+    The matcher can't forget patterns, so removed rules stay in it
+    and are skipped when they match, until they outnumber the
+    rules in the list and the matcher is rebuilt."""
 
     def __init__(self, *rules: RewriteRule) -> None:
         """:param rules: Rewrite rules to add to the object"""
-        self.rules = list(rules)
+        self.rules = list(rules)  # type: List[Optional[RewriteRule]]
         self._rebuild()
 
+    def _compact(self) -> None:
+        """Drop the empty slots from the list"""
+        # A new list, so that iterators over the old one carry on
+        self.rules = [r for r in self.rules if r is not None]
+        self.slots = {r: n for n, r in enumerate(self.rules)}
+        self.holes = 0
+
     def _rebuild(self) -> None:
         """Rebuild the :cls:`ManyToOneReplacer` after deletions or changes"""
+        self._compact()
         self.matcher = ManyToOneMatcher()  # type: ManyToOneMatcher[RewriteRule] # NOQA
+        self.removed = set()  # type: Set[RewriteRule]
         for i in self.rules:
             self.matcher.add(i.lhs, i)
 
+    def _forget(self, rule: RewriteRule) -> None:
+        """Stop matching with :param:`rule`, which has left the list"""
+        self.removed.add(rule)
+        if len(self.removed) > len(self.slots) + 16:
+            self._rebuild()
+
+    def _add_pattern(self, rule: RewriteRule) -> None:
+        """Start matching with :param:`rule`, which is in the list"""
+        if rule in self.removed:
+            self._rebuild()
+            return
+        self.matcher.add(rule.lhs, rule)
+        # The matchers for AC operations remember which operand patterns
+        # each subject they have seen matches, and don't update that
+        # when patterns are added, so those subjects would miss them
+        self.matcher.clear()
+
+    def _slot(self, rule: RewriteRule) -> int:
+        try:
+            return self.slots[rule]
+        except KeyError:
+            raise ValueError("Rule {} is not in the list".format(rule))
+
     def append(self, rule: RewriteRule) -> None:
+        self.slots[rule] = len(self.rules)
         self.rules.append(rule)
-        self.matcher.add(rule.lhs, rule)
+        self._add_pattern(rule)
 
     def extend(self, rules: List[RewriteRule]) -> None:
-        self.rules.extend(rules)
         for i in rules:
-            self.matcher.add(i.lhs, i)
+            self.append(i)
 
     def replace(self, idx: int, rule: RewriteRule) -> None:
         """Replace :param:`idx` with :param:`rule`"""
-        self.rules[idx] = rule
-        self._rebuild()
+        self.swap(self[idx], rule)
 
     def delete(self, idx: int) -> None:
         """Delete the :param:`idx`th rule from the list"""
-        del self.rules[idx]
-        self._rebuild()
+        self.remove(self[idx])
+
+    def remove(self, rule: RewriteRule) -> None:
+        """Delete :param:`rule` from the list"""
+        self.rules[self._slot(rule)] = None
+        del self.slots[rule]
+        self.holes += 1
+        self._forget(rule)
+        if self.holes > len(self.slots) + 16:
+            self._compact()
+
+    def swap(self, old_rule: RewriteRule, new_rule: RewriteRule) -> None:
+        """Put :param:`new_rule` where :param:`old_rule` is"""
+        slot = self._slot(old_rule)
+        self.rules[slot] = new_rule
+        del self.slots[old_rule]
+        self.slots[new_rule] = slot
+        # In this order, neither can rebuild the matcher with both rules
+        self._add_pattern(new_rule)
+        self._forget(old_rule)
+
+    def match(self, expr: Expression) ->\
+            Iterator[Tuple[RewriteRule, matchpy.Substitution]]:
+        """The rules whose left side matches :param:`expr` as a whole,
+        with the substitutions that make them match"""
+        for rule, subst in self.matcher.match(expr):
+            if rule not in self.removed:
+                yield rule, subst
 
     def __iter__(self) -> Iterator[RewriteRule]:
-        return iter(self.rules)
+        return (r for r in self.rules if r is not None)
 
     def __len__(self) -> int:
-        return len(self.rules)
+        return len(self.slots)
 
     def __getitem__(self, idx: int) -> RewriteRule:
-        return self.rules[idx]
+        if self.holes:
+            self._compact()
+        rule = self.rules[idx]
+        assert rule is not None
+        return rule
+
+    def rewrite_once(self, expr: Expression,
+                     accept: Optional[Callable[[Expression, Expression],
+                                               bool]] = None) ->\
+            Optional[Expression]:
+        """Rewrite the outermost, leftmost redex in :param:`expr`.
+
+        :param accept: If given, only use rewrites of a subterm s to
+        a subterm t for which accept(s, t) holds
+        :returns: The rewritten expression, or None if nothing applied"""
+        for subexpr, pos in expr.preorder_iter():
+            for rule, subst in self.match(subexpr):
+                new_subexpr = rule.apply_match(subst)
+                if accept is not None and not accept(subexpr, new_subexpr):
+                    continue
+                new_expr = matchpy.replace(expr, pos, new_subexpr)
+                if not isinstance(new_expr, Expression):
+                    raise TypeError("Result of swapping part of an expression by an expression is not an expression")  # NOQA
+                return new_expr
+        return None
 
     def apply_all(self, expr: Expression,
-                  max_count: Optional[int] = None) -> Expression:
+                  max_count: Optional[int] = None,
+                  accept: Optional[Callable[[Expression, Expression],
+                                            bool]] = None) -> Expression:
         """Apply the rules :arg:`expr` until that's impossible
 
         :param expr: Expression to replace in.
         :param max_count: Maximum number of times to apply a rule, if any
+        :param accept: As for :meth:`rewrite_once`
         :returns: Expression with rule applied as much as possible"""
-        any_change = True
         apply_count = 0
-        while any_change and (max_count is None or apply_count < max_count):
-            any_change = False
-            for subexpr, pos in expr.preorder_iter():
-                try:
-                    rule, subst = next(iter(self.matcher.match(subexpr)))
-                    new_subexpr = rule.apply_match(subst)
-                    new_expr = matchpy.replace(expr, pos, new_subexpr)
-                    if not isinstance(new_expr, Expression):
-                        raise TypeError("Result of swapping part of an expression by an expression is not an expression")  # NOQA
-                    else:
-                        expr = new_expr
-                    any_change = True
-                    apply_count += 1
-                    break
-                except StopIteration:
-                    pass
+        while max_count is None or apply_count < max_count:
+            new_expr = self.rewrite_once(expr, accept)
+            if new_expr is None:
+                break
+            expr = new_expr
+            apply_count += 1
         return expr
 
     def apply_each_once(self, expr: Expression,
@@ -147,7 +226,7 @@ class RewriteRuleList(Iterable[RewriteRule]):
         :returns: A map from rewrite rules to the expressions they produced.
         If a rule matches multiple times, the outermost match is returned."""
         for subexpr, pos in expr.preorder_iter():
-            for rule, subst in self.matcher.match(subexpr):
+            for rule, subst in self.match(subexpr):
                 if only is None or rule in only:
                     new_subexpr = rule.apply_match(subst)
                     new_expr = matchpy.replace(expr, pos, new_subexpr)
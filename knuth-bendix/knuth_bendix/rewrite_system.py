@@ -18,50 +18,97 @@
 including the Knuth-Bendix completion algorithm"""
 
 from .rewrite_rule import RewriteRule, RewriteRuleList
-from .unification import (find_overlaps, equal_mod_renaming,
+from .selection import (CriticalPairQueue, SelectionStrategy,  # noqa: F401
+                        SizeSelection, Heap, subexpression_count,
+                        CriticalPair, Parents)
+from .unification import (find_overlaps, equal_mod_renaming, is_instance,
                           proper_contains)
-from .utils import substitute
+from .utils import substitute, Operator, Comparison, compare_terms
+from .checkpoint import Checkpointer, read_checkpoint
+from .parallel import OverlapPool
+from .budget import CompletionBudget, CompletionStatus
+from .given_clause import GivenClauseLoop
+from .spill import SpillingCriticalPairQueue
+from .rule_table import RuleTable
+from .serialization import TermEncoder, TermDecoder, Signature
+from .events import Event, EventBus
+from .stats import CompletionStats, active
 
 import matchpy
-from matchpy import Expression, get_head
-from itertools import chain, count
-import heapq
+from matchpy import (Expression, Wildcard, Operation, Arity, get_head,
+                     get_variables)
+from itertools import chain
 from collections import defaultdict
 
 from typing import (List, Tuple, Callable, TypeVar, Iterable,  # noqa: F401
-                    Generic, DefaultDict, Optional)
+                    DefaultDict, Optional, Dict, Any, Sequence)
 
 _T = TypeVar('_T')
 
 GtOrder = Callable[[_T, _T], bool]
-"""Ordering such that f(a, b) returns if a > b"""
-
-
-class Heap(Generic[_T]):
-    """Min-heap wrapper requiring a key function"""
-    def __init__(self, key: Callable[[_T], int]) -> None:
-        self.key = key
-        self.heap = []  # type: List[Tuple[int, int, _T]]
-        self.counter = count()
-
-    def push(self, item: _T) -> None:
-        """Insert into the heap, computing the priority via key."""
-        priority = self.key(item)
-        count = next(self.counter)
-        heapq.heappush(self.heap, (priority, count, item))
-
-    def popmin(self) -> _T:
-        """Pop off the smallest item from the heap"""
-        _, _, item = heapq.heappop(self.heap)
-        return item
-
-    def __bool__(self) -> bool:
-        return bool(self.heap)
-
-
-def subexpression_count(expr: Expression) -> int:
-    """Count the number of nodes in the tree formed by :param:`expr`"""
-    return len(list(expr.preorder_iter()))
+"""Ordering such that f(a, b) returns if a > b.
+
+An ordering may also have a ``compare(a, b)`` method returning a
+:cls:`Comparison`, which is used instead of calling it twice,
+and an ``extend_to_orient(a, b)`` method, which is called to make
+incomparable terms comparable before giving up on orienting them."""
+
+
+_Equation = Operation.new('=', Arity.binary, '_Equation')
+"""Pairs up the sides of an equation, to match equations as one term"""
+
+COMPLETION_LOOPS = ('standard', 'discount')
+"""The completion algorithms :meth:`RewriteSystem.complete` can run"""
+
+
+def ordering_signature(order: GtOrder[Expression]) -> Dict[str, Operator]:
+    """The operators an ordering knows about, by name.
+
+    This looks at the weights and operator precedence of the orderings
+    in this package, and finds nothing in arbitrary callables."""
+    ops = set(getattr(order, 'weights', {}))
+    for greater, lesser in getattr(order, 'op_gt', ()):
+        ops.update((greater, lesser))
+    return {op.name: op for op in ops}
+
+
+def critical_pairs_between(rule: RewriteRule,
+                           rule_partner: Optional[RewriteRule],
+                           other_rule: RewriteRule,
+                           other_partner: Optional[RewriteRule],
+                           matchers: Optional[Sequence[RewriteRuleList]] = None) ->\
+                           List[CriticalPair]:  # NOQA
+    """Find the critical pairs from overlaps between two rules.
+
+    Overlaps are rewritten with either rule or its partner
+    (its extension, or the rule it extends) to form the pairs.
+
+    :param matchers: Rule lists that between them hold all four rules,
+    such as the system's, to find the rewrites with.
+    Defaults to a list of just those rules.
+    :returns: The pairs, in a deterministic order"""
+    representative = {rule: rule, other_rule: other_rule}
+    if rule_partner is not None:
+        representative[rule_partner] = rule
+    if other_partner is not None:
+        representative[other_partner] = other_rule
+    if matchers is None:
+        matchers = [RewriteRuleList(*representative)]
+
+    overlaps = active().call('find_overlaps', list, chain(
+        find_overlaps(rule.left, other_rule.left),
+        find_overlaps(other_rule.left, rule.left)))
+    ret = []  # type: List[CriticalPair]
+    for expr in overlaps:
+        matches = defaultdict(list)  # type: DefaultDict[RewriteRule, List[Expression]] # NOQA
+
+        for rules in matchers:
+            for r, match in rules.apply_each_once(expr, representative):
+                matches[representative[r]].append(match)
+        for s in matches[rule]:
+            for t in matches[other_rule]:
+                ret.append((s, t))
+    return ret
 
 
 class CompletionFailure(Exception):
@@ -80,50 +127,219 @@ class RewriteSystem(object):
         :param rules: A list of rules to initialize the system with.
         Will be shallowly copied"""
         self.rules = RewriteRuleList()
-        self.to_extension = {}
-        self.from_extension = {}
+        self.table = RuleTable()
+        # For unfailing completion
+        self.equations = []  # type: List[Tuple[Expression, Expression]]
+        self.ordered_rules = RewriteRuleList()
+        self.equation_order = None  # type: Optional[GtOrder[Expression]]
+        self.unfailing = False
+        """Whether completions keep pairs that can't be oriented
+        as equations. Set once the system has such an equation."""
+        self.events = EventBus()
+        """Observers of the system's steps
+        (see :mod:`knuth_bendix.events`)"""
+        self.stats = CompletionStats()
+        """Statistics of the system's completions
+        (see :mod:`knuth_bendix.stats`)"""
         for i in rules:
             self.append_rule(i)
-        self.critical_pairs = Heap(lambda e: subexpression_count(e[0]) +
-                                   subexpression_count(e[1]))  # type: Heap[Tuple[Expression, Expression]]  # NOQA
+        self.critical_pairs = CriticalPairQueue()
+        self.pairs_generated = False
 
     def normalize(self, expr: Expression) -> Expression:
         """Rewrite :ref:`expr` as much as possible with the system's rules.
 
+        If the system has unorientable equations, they are also used,
+        in whichever direction makes the rewritten instance smaller.
+
         :param expr: Expression to rewrite. Will be unmodified.
         :returns: A normalized expression"""
-        return self.rules.apply_all(expr)
+        return self.stats.call('normalize', self._normalize, expr)
+
+    def _normalize(self, expr: Expression) -> Expression:
+        expr = self.rules.apply_all(expr)
+        order = self.equation_order
+        if order is None or not self.equations:
+            return expr
+        while True:
+            new_expr = self.ordered_rules.rewrite_once(expr, order)
+            if new_expr is None:
+                return expr
+            expr = self.rules.apply_all(new_expr)
+
+    @staticmethod
+    def try_orient(s: Expression, t: Expression,
+                   order: GtOrder[Expression]) ->\
+            Optional[Tuple[Expression, Expression]]:
+        """Order two expressions according to :ref:`order`,
+        extending it first if they are incomparable and it can be
+        extended (see :data:`GtOrder`).
+
+        :returns: (s', t') such that s' > t', or None if the two
+        expressions are equal or incomparable"""
+        return RewriteSystem._oriented(s, t, compare_terms(order, s, t),
+                                       order)
 
     @staticmethod
-    def orient(s: Expression, t: Expression,
+    def _oriented(s: Expression, t: Expression, result: Comparison,
+                  order: GtOrder[Expression]) ->\
+            Optional[Tuple[Expression, Expression]]:
+        """:meth:`try_orient`, given how s compares to t"""
+        if result == Comparison.INCOMPARABLE:
+            extend = getattr(order, 'extend_to_orient', None)
+            if extend is not None:
+                result = extend(s, t)
+        if result == Comparison.GREATER:
+            return (s, t)
+        elif result == Comparison.LESS:
+            return (t, s)
+        else:
+            return None
+
+    @staticmethod
+    def orient_many(equations: Iterable[Tuple[Expression, Expression]],
+                    order: GtOrder[Expression]) ->\
+            List[Optional[Tuple[Expression, Expression]]]:
+        """:meth:`try_orient` each equation.
+
+        Orderings with a ``compare_many(pairs)`` method, like
+        :cls:`KnuthBendixOrdering`, compare all the equations at once,
+        which is much faster for large sets of them."""
+        equations = list(equations)
+        compare_many = getattr(order, 'compare_many', None)
+        if compare_many is None:
+            results = [compare_terms(order, s, t) for s, t in equations]
+        else:
+            results = compare_many(equations)
+        return [RewriteSystem._oriented(s, t, result, order)
+                for (s, t), result in zip(equations, results)]
+
+    @classmethod
+    def orient(cls, s: Expression, t: Expression,
                order: GtOrder[Expression]) -> Tuple[Expression, Expression]:
         """Order two expressions according to :ref:`order`.
 
-        :raises: :cls:`CompletionFailure` if orientation isn't possible
+        :raises: :cls:`ValueError` if orientation isn't possible
         :returns: (s', t') such that s' > t'"""
-        s_gt = order(s, t)
-        t_gt = order(t, s)
-        if not (s_gt ^ t_gt):
+        ret = cls.try_orient(s, t, order)
+        if ret is None:
             raise(ValueError("{} and {} are not orientable".format(str(s), str(t))))  # NOQA
-        elif s_gt:
-            return (s, t)
-        elif t_gt:
-            return (t, s)
-        else:
-            raise(ValueError("There's only four values for two booleans"))
+        return ret
 
     @classmethod
     def from_equations(cls,
                        order: GtOrder[Expression],
-                       equations: Iterable[Tuple[Expression, Expression]]) ->\
-                       'RewriteSystem':  # NOQA
+                       equations: Iterable[Tuple[Expression, Expression]],
+                       unfailing: bool = False) -> 'RewriteSystem':
         """Create a rewrite system from the given equations
-        using the given ordering to orient them"""
+        using the given ordering to orient them
+
+        :param unfailing: Keep equations that can't be oriented
+        for ordered rewriting, instead of failing"""
         rules = []
-        for s, t in equations:
-            left, right = cls.orient(s, t, order)
+        unorientable = []
+        equations = list(equations)
+        for (s, t), oriented in zip(equations,
+                                    cls.orient_many(equations, order)):
+            if oriented is None:
+                if not unfailing:
+                    cls.orient(s, t, order)  # Raises the usual error
+                unorientable.append((s, t))
+                continue
+            left, right = oriented
             rules.append(RewriteRule(left, right))
-        return cls(rules)
+        system = cls(rules)
+        if unfailing:
+            system.unfailing = True
+            system.equation_order = order
+        for s, t in unorientable:
+            system.add_equation(s, t)
+        return system
+
+    def add_equation(self, s: Expression,
+                     t: Expression) -> List[RewriteRule]:
+        """Keep s = t as an unorientable equation.
+
+        The equation is used for rewriting in each direction whose
+        right side has no new variables, but only where the instance
+        being rewritten is larger than its result.
+
+        :returns: The rules used for each of those directions.
+        Empty if the equation is an instance of a known one."""
+        for u, v in self.equations:
+            if (is_instance(_Equation(s, t), _Equation(u, v))
+                    or is_instance(_Equation(t, s), _Equation(u, v))):
+                return []
+        self.unfailing = True
+        self.equations.append((s, t))
+        ret = []
+        for left, right in [(s, t), (t, s)]:
+            if (not isinstance(left, Wildcard)
+                    and get_variables(right) <= get_variables(left)):
+                rule = RewriteRule(left, right)
+                self.ordered_rules.append(rule)
+                ret.append(rule)
+        return ret
+
+    def add_equations(self, equations: Iterable[Tuple[Expression,
+                                                      Expression]],
+                      order: GtOrder[Expression],
+                      **options: Any) -> CompletionStatus:
+        """Add new axioms to the system and complete it again.
+
+        If the system is already complete, the only new critical pairs
+        are those with the rules the new equations lead to,
+        so the work done depends on how much the new equations change.
+
+        :param order: The ordering the system was completed with
+        :param options: Passed on to :meth:`complete`
+        :raises: :cls:`ValueError` if an equation can't be oriented
+        and the completion isn't unfailing. The system is then unchanged.
+        :returns: As for :meth:`complete`"""
+        unfailing = options.get('unfailing', False) or self.unfailing
+        pairs = []  # type: List[CriticalPair]
+        for s, t in equations:
+            s = self.normalize(s)
+            t = self.normalize(t)
+            if s == t:
+                continue
+            if not unfailing:
+                self.orient(s, t, order)  # Raises if it can't
+            pairs.append((s, t))
+        for pair in pairs:
+            self.critical_pairs.push(pair)
+        return self.complete(order, **options)
+
+    def _keep_equation(self, s: Expression, t: Expression,
+                       pool: Optional[OverlapPool]) -> None:
+        """Add an unorientable equation along with its critical pairs"""
+        n_equations = len(self.equations)
+        rules = self.add_equation(s, t)
+        if len(self.equations) == n_equations:
+            self.stats.pairs_pruned += 1
+            return
+        self.stats.pairs_kept_as_equations += 1
+        self.events.emit(Event.EQUATION_ADDED,
+                         lambda: {'left': str(s), 'right': str(t)})
+        for rule in rules:
+            self._add_critical_pairs_with(rule, pool)
+
+    def _simplify_equations(self) -> None:
+        """Send equations that the rules can now rewrite
+        back to the critical pair queue"""
+        kept = []  # type: List[Tuple[Expression, Expression]]
+        for s, t in self.equations:
+            new_s = self.rules.apply_all(s)
+            new_t = self.rules.apply_all(t)
+            if new_s == s and new_t == t:
+                kept.append((s, t))
+            else:
+                self.critical_pairs.push((new_s, new_t))
+        if len(kept) != len(self.equations):
+            self.equations = []
+            self.ordered_rules = RewriteRuleList()
+            for s, t in kept:
+                self.add_equation(s, t)
 
     def extend_rule(self, rule: RewriteRule) -> Optional[RewriteRule]:
         """Form the match-extension of the given rule, if one is necessary.
@@ -146,83 +362,142 @@ class RewriteSystem(object):
         new_right = self.normalize(new_right)
         return RewriteRule(new_left, new_right)
 
-    def append_rule(self, rule: RewriteRule) -> None:
+    def append_rule(self, rule: RewriteRule, generation: int = 0) -> int:
         """Append this rule to the list of rules,
         preforming extensions if needed.
 
-        It shall be an invariant that extensions
-        come right after their primary in the ruleset."""
+        :param generation: The generation of the rule,
+        which its extension shares
+        :returns: The id of the new rule"""
+        rule_id = self.table.add(rule, generation)
         self.rules.append(rule)
+        self.events.emit(Event.RULE_ADDED,
+                         lambda: {'id': rule_id, 'rule': str(rule),
+                                  'generation': generation})
         extended = self.extend_rule(rule)
         if extended is not None:
             self.rules.append(extended)
-            print("Extending", rule, "->", extended)
-            self.to_extension[rule] = extended
-            self.from_extension[extended] = rule
-
-    def replace_rule(self, idx: int,
-                     new_rule: RewriteRule) -> None:
-        """Replace the rule at :param:`idx` with :param:`new_rule`,
-        accounting for extensions if needed"""
-        old_rule = self.rules[idx]
-        self.rules.replace(idx, new_rule)
-        if old_rule in self.to_extension:
-            old_extension = self.to_extension[old_rule]
-            del self.to_extension[old_rule]
-            del self.from_extension[old_extension]
-
+            ext_id = self.table.add(extended, generation, parent=rule_id)
+            self._extension_created(ext_id)
+        self.stats.observe(len(self.rules), 0)
+        return rule_id
+
+    def _extension_created(self, ext_id: int) -> None:
+        self.events.emit(Event.EXTENSION_CREATED,
+                         lambda: {'id': ext_id,
+                                  'parent': self.table.parent_of(ext_id),
+                                  'rule': str(self.table[ext_id])})
+
+    def replace_rule(self, rule_id: int, new_rule: RewriteRule,
+                     reason: str = 'replaced') -> int:
+        """Replace the rule :param:`rule_id` with :param:`new_rule`,
+        accounting for extensions if needed.
+
+        If the old rule is an extension, the new rule becomes
+        the extension of the same rule in its place.
+
+        :param reason: Why, as reported to observers
+
+        :returns: The id of the new rule, which takes over
+        the old one's place and generation"""
+        table = self.table
+        parent = table.parent_of(rule_id)
+        old_rule = table[rule_id]
+        generation = table.generation[rule_id]
+        table.unlink(rule_id)
+        new_id = table.add(new_rule, generation, parent=parent)
+        self.rules.swap(old_rule, new_rule)
+        table.kill(rule_id)
+        self.events.emit(Event.RULE_SIMPLIFIED,
+                         lambda: {'id': rule_id, 'rule': str(old_rule),
+                                  'new_id': new_id, 'new_rule': str(new_rule),
+                                  'reason': reason})
+
+        old_ext_id = table.extension_of(rule_id)
+        if old_ext_id is not None:
+            old_extension = table[old_ext_id]
+            table.kill(old_ext_id)
             new_extension = self.extend_rule(new_rule)
             if new_extension is not None:
-                self.rules.replace(idx + 1, new_extension)
-                self.to_extension[new_rule] = new_extension
-                self.from_extension[new_extension] = new_rule
+                self.rules.swap(old_extension, new_extension)
+                self._extension_created(
+                    table.add(new_extension, generation, parent=new_id))
             else:
-                self.rules.delete(idx + 1)
-        if old_rule in self.from_extension:
-            raise(NotImplementedError("Haven't implemented this case yet"))
-
-    def delete_rule(self, idx: int) -> None:
-        """Delete a rule and (if needed) its extensions."""
-        rule = self.rules[idx]
-        if rule in self.to_extension:
-            self.rules.delete(idx + 1)
-            extension = self.to_extension[rule]
-            del self.to_extension[rule]
-            del self.from_extension[extension]
-        if rule in self.from_extension:
-            self.rules.delete(idx - 1)
-            idx = idx - 1
-            short = self.from_extension[rule]
-            del self.from_extension[rule]
-            del self.to_extension[short]
-        self.rules.delete(idx)
-
-    def remove_extension(self, idx) -> None:
-        """De-extend a rule, given the index of the extension"""
-        ext = self.rules[idx]
-        raw = self.from_extension[ext]
-        del self.from_extension[ext]
-        del self.to_extension[raw]
-        self.delete_rule(idx)
+                self.rules.remove(old_extension)
+        return new_id
+
+    def delete_rule(self, rule_id: int, reason: str = 'deleted') -> None:
+        """Delete a rule and (if needed) its extensions,
+        or the rule it is the extension of.
+
+        :param reason: Why, as reported to observers"""
+        table = self.table
+        linked = [table.extension_of(rule_id), table.parent_of(rule_id)]
+        for n in [rule_id] + [n for n in linked if n is not None]:
+            if table.is_alive(n):
+                rule = table[n]
+                self.rules.remove(rule)
+                table.kill(n)
+                self.events.emit(Event.RULE_DELETED,
+                                 lambda: {'id': n, 'rule': str(rule),
+                                          'reason': reason})
+
+    def remove_extension(self, rule_id: int,
+                         reason: str = 'deleted') -> None:
+        """De-extend a rule, given the id of the extension"""
+        self.table.unlink(rule_id)
+        self.delete_rule(rule_id, reason)
+
+    def clear_rules(self) -> None:
+        """Delete every rule"""
+        for rule_id in list(self.table.live_ids()):
+            self.table.kill(rule_id)
+        self.rules = RewriteRuleList()
+
+    def rule_id(self, rule: RewriteRule) -> int:
+        """The id of :param:`rule`, which must be in the system"""
+        return self.table.id_of(rule)
+
+    def extension(self, rule: RewriteRule) -> Optional[RewriteRule]:
+        """The extension of :param:`rule`, if it has one"""
+        rule_id = self.table.get_id(rule)
+        if rule_id is None:
+            return None
+        ext_id = self.table.extension_of(rule_id)
+        return None if ext_id is None else self.table[ext_id]
+
+    def extended_rule(self, rule: RewriteRule) -> Optional[RewriteRule]:
+        """The rule that :param:`rule` is the extension of, if any"""
+        rule_id = self.table.get_id(rule)
+        if rule_id is None:
+            return None
+        parent_id = self.table.parent_of(rule_id)
+        return None if parent_id is None else self.table[parent_id]
+
+    def is_extension(self, rule: RewriteRule) -> bool:
+        """Whether :param:`rule` is the extension of another rule"""
+        rule_id = self.table.get_id(rule)
+        return (rule_id is not None
+                and self.table.parent_of(rule_id) is not None)
 
     def trim_redundant_rules(self) -> bool:
         """Remove rules that are specializations of
         or identical to rules in the set.
 
         :returns: True if any rules were removed"""
-        for idx, r in enumerate(self.rules):
+        for r in self.rules:
             # This only considers whole-expression matches
-            for other_r, subst in self.rules.matcher.match(r.left):
+            for other_r, subst in self.rules.match(r.left):
                 if other_r == r:
                     continue
 
-                if self.to_extension.get(r, None) == other_r:
+                if self.extension(r) is other_r:
                     continue
 
-                if (r in self.from_extension
-                     and self.from_extension[r] == other_r):  # noqa: E127
-                    print("Removing redundant self-extension", str(r))
-                    self.remove_extension(idx)
+                extended = self.extended_rule(r)
+                if extended is other_r:
+                    self.remove_extension(self.rule_id(r),
+                                          'redundant self-extension')
                     self.trim_redundant_rules()
                     return True
 
@@ -230,14 +505,13 @@ class RewriteSystem(object):
                      != substitute(other_r.right, subst)):  # noqa: E127
                     continue
 
-                if r in self.from_extension:
-                    print("Removing redundant extension", str(r))
-                    self.remove_extension(idx)
+                if extended is not None:
+                    self.remove_extension(self.rule_id(r),
+                                          'redundant extension')
                     self.trim_redundant_rules()
                     return True
                 else:
-                    print("Removing redundant rule", str(r))
-                    self.delete_rule(idx)
+                    self.delete_rule(self.rule_id(r), 'redundant rule')
                     self.trim_redundant_rules()
                     return True
         return False
@@ -256,87 +530,359 @@ class RewriteSystem(object):
             return True
 
         # Normalize RHSs
-        for idx, r in enumerate(self.rules):
+        for r in self.rules:
             new_right = self.normalize(r.right)
-            if not equal_mod_renaming(r.right, new_right):
+            if r.right != new_right:
                 new_rule = RewriteRule(r.left, new_right)
-                self.replace_rule(idx, new_rule)
-                print("Normalized right:", new_rule)
+                self.replace_rule(self.rule_id(r), new_rule,
+                                  'normalized right side')
                 return True
 
         # Normalize LHSs as much as possible
-        for idx, r in enumerate(self.rules):
-            if r in self.from_extension:
+        for r in self.rules:
+            if self.is_extension(r):
                 continue
             for other_r, new_e in self.rules.apply_each_once(r.left):
                 if (proper_contains(other_r.left, r.left)
                     or (equal_mod_renaming(other_r.left, r.left)
                         and order(r.right, other_r.right))):
-                    if equal_mod_renaming(new_e, r.right):
+                    if new_e == r.right:
                         # We're about to introduce a = a
-                        self.delete_rule(idx)
-                        print("Left normalizing delete:", r, "gives", new_e)
+                        self.delete_rule(self.rule_id(r),
+                                         'left side rewrites to right side')
+                        return True
+                    oriented = self.try_orient(new_e, r.right, order)
+                    if oriented is None:
+                        if self.equation_order is None:
+                            self.orient(new_e, r.right, order)  # Raises
+                        # Let the main loop turn it into an equation
+                        self.delete_rule(self.rule_id(r),
+                                         'left side rewrites to equation')
+                        self.critical_pairs.push((new_e, r.right))
                         return True
                     else:
-                        u, t = self.orient(new_e, r.right, order)
+                        u, t = oriented
                         new_rule = RewriteRule(u, t)
-                        self.replace_rule(idx, new_rule)
-                        print("Left normalizing collapse: replace", r,
-                              "with", new_rule)
+                        self.replace_rule(self.rule_id(r), new_rule,
+                                          'left side collapsed')
                         return True
 
         return False
 
-    def _add_critical_pairs_with(self, rule: RewriteRule) -> None:
-        for other_rule in self.rules:
-
-            match_rules = [rule, other_rule]
-            representative = {rule: rule, other_rule: other_rule}
-            if rule in self.to_extension:
-                representative[self.to_extension[rule]] = rule
-                match_rules.append(self.to_extension[rule])
-            if other_rule in self.to_extension:
-                representative[self.to_extension[other_rule]] = other_rule
-                match_rules.append(self.to_extension[other_rule])
-            if rule in self.from_extension:
-                representative[self.from_extension[rule]] = rule
-                match_rules.append(self.from_extension[rule])
-            if other_rule in self.from_extension:
-                representative[self.from_extension[other_rule]] = other_rule
-                match_rules.append(self.from_extension[other_rule])
-
-            for expr in chain(find_overlaps(rule.left, other_rule.left),
-                              find_overlaps(other_rule.left, rule.left)):
-                matches = defaultdict(list)  # type: DefaultDict[RewriteRule, List[Expression]] # NOQA
-
-                for r, match in self.rules.apply_each_once(expr, match_rules):
-                    matches[representative[r]].append(match)
-                for s in matches[rule]:
-                    for t in matches[other_rule]:
-                        self.critical_pairs.push((s, t))
-
-    def complete(self, order: GtOrder[Expression]) -> None:
+    def partner(self, rule: RewriteRule) -> Optional[RewriteRule]:
+        """The extension of :param:`rule`, or the rule it extends, if any"""
+        ret = self.extension(rule)
+        if ret is None:
+            ret = self.extended_rule(rule)
+        return ret
+
+    def _generation(self, parents: Optional[Parents]) -> int:
+        """The generation of a rule made from a pair with
+        :param:`parents`. Pairs with no known parents start over at 0."""
+        if parents is None:
+            return 0
+        return 1 + max(self.table.generation[p] for p in parents)
+
+    def _pair_selected(self, s: Expression, t: Expression,
+                       parents: Optional[Parents]) -> None:
+        self.stats.observe(len(self.rules), len(self.critical_pairs) + 1)
+        self.events.emit(Event.PAIR_SELECTED,
+                         lambda: {'left': str(s), 'right': str(t),
+                                  'parents': parents})
+
+    def _pair_joined(self, normal_form: Expression) -> None:
+        self.stats.pairs_joined += 1
+        self.events.emit(Event.PAIR_JOINED,
+                         lambda: {'normal_form': str(normal_form)})
+
+    def _add_critical_pairs_with(self, rule: RewriteRule,
+                                 pool: Optional[OverlapPool] = None) -> None:
+        """Queue the critical pairs between :param:`rule`
+        and every rule in the system, including itself
+        and those standing for unorientable equations.
+
+        :param pool: If given, spread the overlap computations
+        over its worker processes."""
+        others = list(chain(self.rules, self.ordered_rules))
+        if pool is not None and pool.worth_using(len(others)):
+            found = pool.critical_pairs(rule, others, self.partner)
+        else:
+            rule_partner = self.partner(rule)
+            matchers = [self.rules]
+            if self.ordered_rules:
+                matchers.append(self.ordered_rules)
+            found = [critical_pairs_between(rule, rule_partner, other_rule,
+                                            self.partner(other_rule),
+                                            matchers)
+                     for other_rule in others]
+
+        # Equations have no ids, so their pairs have no parents
+        rule_id = self.table.get_id(rule)
+        for other_rule, pairs in zip(others, found):
+            other_id = self.table.get_id(other_rule)
+            parents = None  # type: Optional[Parents]
+            if rule_id is not None and other_id is not None:
+                parents = (rule_id, other_id)
+            for pair in pairs:
+                self.critical_pairs.push(pair, parents)
+            self.stats.pairs_generated += len(pairs)
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """Describe the system, including pending critical pairs,
+        as JSON-compatible data.
+
+        The pending pairs are an iterator that encodes them as it goes,
+        so a large queue that is partly on disk isn't read into memory
+        (see :fn:`knuth_bendix.checkpoint.write_checkpoint`). The
+        operations the pairs use are only all listed once it has run."""
+        encoder = TermEncoder()
+        table = self.table
+        rule_ids = [table.id_of(r) for r in self.rules]
+        return {
+            'rules': [[rule_id, table.generation[rule_id],
+                       encoder.encode(table[rule_id].left),
+                       encoder.encode(table[rule_id].right)]
+                      for rule_id in rule_ids],
+            'extensions': [[table.parent_of(rule_id), rule_id]
+                           for rule_id in rule_ids
+                           if table.parent_of(rule_id) is not None],
+            'pairs': ([encoder.encode(s), encoder.encode(t), parents]
+                      for (s, t), parents in self.critical_pairs.entries()),
+            'equations': [[encoder.encode(s), encoder.encode(t)]
+                          for s, t in self.equations],
+            'pairs_generated': self.pairs_generated,
+            'unfailing': self.unfailing,
+            'operations': encoder.operations,
+        }
+
+    @classmethod
+    def from_checkpoint_state(cls, state: Dict[str, Any],
+                              signature: Optional[Signature] = None) ->\
+                              'RewriteSystem':  # NOQA
+        """Rebuild a system from the output of :meth:`checkpoint_state`
+
+        :param signature: Operators to use in the rebuilt terms,
+        which should include those of the ordering the system is used with.
+        Operators not in it are recreated from the checkpoint."""
+        # Straight from checkpoint_state, the operations are only complete
+        # once the pairs have been encoded
+        pairs = list(state['pairs'])
+        decoder = TermDecoder(state['operations'], signature)
+        system = cls()
+        for rule_id, generation, left, right in state['rules']:
+            rule = RewriteRule(decoder.decode(left), decoder.decode(right))
+            system.table.restore(rule_id, rule, generation)
+            system.rules.append(rule)
+        for rule_id, ext_id in state['extensions']:
+            system.table.link(rule_id, ext_id)
+        for s, t, parents in pairs:
+            system.critical_pairs.push(
+                (decoder.decode(s), decoder.decode(t)),
+                None if parents is None else tuple(parents))
+        for s, t in state.get('equations', []):
+            system.add_equation(decoder.decode(s), decoder.decode(t))
+        system.pairs_generated = state['pairs_generated']
+        system.unfailing = state.get('unfailing', bool(system.equations))
+        return system
+
+    @classmethod
+    def resume(cls, path: str, order: GtOrder[Expression],
+               signature: Optional[Signature] = None,
+               **options: Any) -> 'RewriteSystem':
+        """Load the checkpoint at :param:`path` and finish its completion.
+
+        :param order: The ordering the checkpointed run was using
+        :param signature: Operators to use in the loaded terms.
+        Defaults to the operators :param:`order` knows about.
+        :param options: Passed on to :meth:`complete`
+        :returns: The completed system"""
+        if signature is None:
+            signature = ordering_signature(order)
+        system = cls.from_checkpoint_state(read_checkpoint(path), signature)
+        system.complete(order, **options)
+        return system
+
+    def complete(self, order: GtOrder[Expression],
+                 strategy: Optional[SelectionStrategy] = None,
+                 checkpoint: Optional[Checkpointer] = None,
+                 workers: Optional[int] = None,
+                 budget: Optional[CompletionBudget] = None,
+                 loop: str = 'standard',
+                 unfailing: bool = False,
+                 max_pairs_in_memory: Optional[int] = None,
+                 profile: bool = False) -> CompletionStatus:
         """Complete the system by the Knuth-Bendix algorithm.
 
+        If the system was checkpointed, loaded, or stopped by its budget
+        part-way through a completion, this picks up where that
+        completion left off.
+
         :param order: An ordering to orient rules with
+        :param strategy: Heuristic for picking the next critical pair.
+        Defaults to :cls:`SizeSelection`, smallest pair first.
+        :param checkpoint: If given, used to save the state of the
+        completion periodically.
+        :param workers: If given, compute critical pairs in this many
+        processes. The result doesn't depend on the number of workers.
+        :param budget: Limits on the run. Once one is hit, the completion
+        stops, and the system can still be used to normalize terms
+        or be completed further.
+        :param loop: 'standard' for the loop that fully interreduces the
+        system after each new rule, or 'discount' for a given-clause loop
+        (see :mod:`knuth_bendix.given_clause`)
+        :param unfailing: Instead of failing on pairs that can't be
+        oriented, keep them as equations for ordered rewriting.
+        Systems made with unorientable equations are always unfailing.
+        :param max_pairs_in_memory: If given, keep at most this many
+        pending critical pairs in memory, and the rest on disk
+        (see :mod:`knuth_bendix.spill`)
+        :param profile: Time the phases of the completion into
+        :attr:`stats` (see :mod:`knuth_bendix.stats`)
+        :returns: Whether the system was completed or which limit stopped it
         """
-        for i in self.rules:
-            self._add_critical_pairs_with(i)
-
-        while self._canonicalize_system_step(order):
+        if loop not in COMPLETION_LOOPS:
+            raise ValueError("Unknown completion loop {!r}".format(loop))
+        if strategy is None:
+            strategy = SizeSelection()
+        weight = getattr(order, 'weight', None)
+        if weight is not None:
+            self.critical_pairs.set_weight(weight)
+        if max_pairs_in_memory is not None:
+            self._bound_queue(max_pairs_in_memory, strategy.primary_key())
+        if budget is not None:
+            budget.start()
+        if unfailing:
+            self.unfailing = True
+        if self.unfailing:
+            self.equation_order = order
+
+        if profile:
+            with self.stats.profile():
+                status = self._profiled_run(loop, order, strategy, checkpoint,
+                                            workers, budget)
+        else:
+            status = self._run(loop, order, strategy, checkpoint, workers,
+                               budget)
+        self.events.emit(Event.COMPLETION_FINISHED,
+                         lambda: {'status': status.value,
+                                  'rules': len(self.rules)})
+        return status
+
+    def _bound_queue(self, max_in_memory: int, spill_key: str) -> None:
+        """Move the pending pairs to a queue that spills to disk,
+        unless they are in one with the same limits already"""
+        queue = self.critical_pairs
+        if (isinstance(queue, SpillingCriticalPairQueue)
+                and queue.max_in_memory == max_in_memory
+                and queue.spill_key == spill_key):
+            return
+        new_queue = SpillingCriticalPairQueue(max_in_memory, queue.weight,
+                                              spill_key)
+        for pair, parents in queue.entries():
+            new_queue.push(pair, parents)
+        if isinstance(queue, SpillingCriticalPairQueue):
+            queue.close()
+        self.critical_pairs = new_queue
+
+    def _profiled_run(self, loop: str, order: GtOrder[Expression],
+                      strategy: SelectionStrategy,
+                      checkpoint: Optional[Checkpointer],
+                      workers: Optional[int],
+                      budget: Optional[CompletionBudget]) -> CompletionStatus:
+        """Run the completion with the ordering timed"""
+        timed_order = self.stats.timed('order', order)
+        for method in ('compare', 'extend_to_orient'):
+            if hasattr(order, method):
+                setattr(timed_order, method, self.stats.timed(
+                    'order', getattr(order, method)))
+        if self.equation_order is None:
+            return self._run(loop, timed_order, strategy, checkpoint,
+                             workers, budget)
+        self.equation_order = timed_order
+        try:
+            return self._run(loop, timed_order, strategy, checkpoint,
+                             workers, budget)
+        finally:
+            self.equation_order = order
+
+    def _run(self, loop: str, order: GtOrder[Expression],
+             strategy: SelectionStrategy,
+             checkpoint: Optional[Checkpointer],
+             workers: Optional[int],
+             budget: Optional[CompletionBudget]) -> CompletionStatus:
+        """Run the completion, in worker processes if asked to"""
+        if workers is None:
+            return self._run_loop(loop, order, strategy, checkpoint, None,
+                                  budget)
+        with OverlapPool(workers) as pool:
+            return self._run_loop(loop, order, strategy, checkpoint, pool,
+                                  budget)
+
+    def _canonicalize(self, order: GtOrder[Expression]) -> None:
+        """Interreduce the system until nothing changes"""
+        while self.stats.call('canonicalize',
+                              self._canonicalize_system_step, order):
             pass
 
+    def _run_loop(self, loop: str, order: GtOrder[Expression],
+                  strategy: SelectionStrategy,
+                  checkpoint: Optional[Checkpointer],
+                  pool: Optional[OverlapPool],
+                  budget: Optional[CompletionBudget]) -> CompletionStatus:
+        """Run the completion loop called :param:`loop`"""
+        if loop == 'discount':
+            return GivenClauseLoop(self, order, strategy, checkpoint, pool,
+                                   budget).run()
+        return self._complete(order, strategy, checkpoint, pool, budget)
+
+    def _complete(self, order: GtOrder[Expression],
+                  strategy: SelectionStrategy,
+                  checkpoint: Optional[Checkpointer],
+                  pool: Optional[OverlapPool],
+                  budget: Optional[CompletionBudget]) -> CompletionStatus:
+        """The main loop of :meth:`complete`"""
+        if not self.pairs_generated:
+            for i in list(chain(self.rules, self.ordered_rules)):
+                self._add_critical_pairs_with(i, pool)
+            self.pairs_generated = True
+
+        self._canonicalize(order)
+
         while self.critical_pairs:
-            s, t = self.critical_pairs.popmin()
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.write(self.checkpoint_state)
+            if budget is not None:
+                status = budget.check(len(self.rules),
+                                      len(self.critical_pairs))
+                if status is not None:
+                    return status
+            s, t = strategy.select(self.critical_pairs)
+            parents = self.critical_pairs.last_parents
+            self._pair_selected(s, t, parents)
             s = self.normalize(s)
             t = self.normalize(t)
-            if not equal_mod_renaming(s, t):
-                s_prime, t_prime = self.orient(s, t, order)
-                new_rule = RewriteRule(s_prime, t_prime)
-                print("New rule:", str(new_rule))
-                self.append_rule(new_rule)
-                self._add_critical_pairs_with(new_rule)
-                if new_rule in self.to_extension:
-                    self._add_critical_pairs_with(self.to_extension[new_rule])
-                while self._canonicalize_system_step(order):
-                    pass
+            # The sides share variables, so renaming one isn't allowed
+            if s == t:
+                self._pair_joined(s)
+                continue
+            if budget is not None and (budget.term_too_big(s)
+                                       or budget.term_too_big(t)):
+                self.critical_pairs.push((s, t), parents)
+                return CompletionStatus.TERM_SIZE_LIMIT
+            oriented = self.try_orient(s, t, order)
+            if oriented is None:
+                if self.equation_order is None:
+                    self.orient(s, t, order)  # Raises the usual error
+                self._keep_equation(s, t, pool)
+                continue
+            new_rule = RewriteRule(*oriented)
+            self.stats.pairs_oriented += 1
+            self.append_rule(new_rule, self._generation(parents))
+            self._add_critical_pairs_with(new_rule, pool)
+            extension = self.extension(new_rule)
+            if extension is not None:
+                self._add_critical_pairs_with(extension, pool)
+            self._canonicalize(order)
+            if self.equations:
+                self._simplify_equations()
+        return CompletionStatus.COMPLETE
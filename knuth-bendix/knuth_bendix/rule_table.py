@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Stable integer ids for the rules of a rewrite system.
+
+Every rule a system adds gets the next id, which is never reused.
+What the system knows about each rule (the rule it extends or its
+extension, its generation, and whether it is still in the system)
+is kept in flat arrays indexed by id, so deleting a rule is just
+clearing its flag."""
+from .rewrite_rule import RewriteRule
+
+from array import array
+
+from typing import Dict, Iterator, List, Optional  # noqa: F401
+
+NO_RULE = -1
+"""Stands for a missing rule in the link arrays"""
+
+
+class RuleTable(object):
+    """Every rule a system has had, by id"""
+
+    def __init__(self) -> None:
+        self.rules = []  # type: List[Optional[RewriteRule]]
+        self.ids = {}  # type: Dict[RewriteRule, int]
+        self.parent = array('l')
+        """The rule each rule is the extension of, or :data:`NO_RULE`"""
+        self.extension = array('l')
+        """The extension of each rule, or :data:`NO_RULE`"""
+        self.generation = array('l')
+        """How many completion steps each rule is derived by"""
+        self.alive = bytearray()
+        self.n_alive = 0
+
+    def add(self, rule: RewriteRule, generation: int = 0,
+            parent: Optional[int] = None) -> int:
+        """Give :param:`rule` an id
+
+        :param generation: The rule's generation
+        :param parent: The id of the rule this one is the extension of
+        :returns: The new id"""
+        rule_id = len(self.rules)
+        self.rules.append(rule)
+        self.ids[rule] = rule_id
+        self.parent.append(NO_RULE if parent is None else parent)
+        self.extension.append(NO_RULE)
+        self.generation.append(generation)
+        self.alive.append(1)
+        self.n_alive += 1
+        if parent is not None:
+            self.link(parent, rule_id)
+        return rule_id
+
+    def restore(self, rule_id: int, rule: RewriteRule,
+                generation: int = 0) -> None:
+        """Put :param:`rule` back under the id it had before,
+        such as when loading a checkpoint"""
+        while len(self.rules) <= rule_id:
+            self.rules.append(None)
+            self.parent.append(NO_RULE)
+            self.extension.append(NO_RULE)
+            self.generation.append(0)
+            self.alive.append(0)
+        if self.alive[rule_id]:
+            raise ValueError("Rule {} is already in use".format(rule_id))
+        self.rules[rule_id] = rule
+        self.ids[rule] = rule_id
+        self.generation[rule_id] = generation
+        self.alive[rule_id] = 1
+        self.n_alive += 1
+
+    def link(self, parent: int, extension: int) -> None:
+        """Record that :param:`extension` is the extension of
+        :param:`parent`"""
+        self.extension[parent] = extension
+        self.parent[extension] = parent
+
+    def kill(self, rule_id: int) -> None:
+        """Mark the rule :param:`rule_id` as no longer in the system.
+        Its links to other rules are kept."""
+        if not self.alive[rule_id]:
+            return
+        rule = self.rules[rule_id]
+        if rule is not None and self.ids.get(rule) == rule_id:
+            del self.ids[rule]
+        # Only the id is kept, so the terms can be freed
+        self.rules[rule_id] = None
+        self.alive[rule_id] = 0
+        self.n_alive -= 1
+
+    def unlink(self, rule_id: int) -> None:
+        """Forget that :param:`rule_id` is an extension, if it is one"""
+        parent = self.parent[rule_id]
+        if parent != NO_RULE:
+            self.extension[parent] = NO_RULE
+            self.parent[rule_id] = NO_RULE
+
+    def __getitem__(self, rule_id: int) -> RewriteRule:
+        """The rule with the id :param:`rule_id`
+
+        :raises: :cls:`KeyError` if the rule has been deleted"""
+        rule = self.rules[rule_id]
+        if rule is None:
+            raise KeyError("Rule {} has been deleted".format(rule_id))
+        return rule
+
+    def id_of(self, rule: RewriteRule) -> int:
+        """The id of :param:`rule`, which must be in the system
+
+        :raises: :cls:`KeyError` if it isn't"""
+        return self.ids[rule]
+
+    def get_id(self, rule: Optional[RewriteRule]) -> Optional[int]:
+        """The id of :param:`rule`, or None if it isn't in the system"""
+        if rule is None:
+            return None
+        return self.ids.get(rule)
+
+    def is_alive(self, rule_id: int) -> bool:
+        return bool(self.alive[rule_id])
+
+    def parent_of(self, rule_id: int) -> Optional[int]:
+        """The rule that :param:`rule_id` extends, if any"""
+        ret = self.parent[rule_id]
+        return None if ret == NO_RULE else ret
+
+    def extension_of(self, rule_id: int) -> Optional[int]:
+        """The extension of :param:`rule_id`, if any"""
+        ret = self.extension[rule_id]
+        return None if ret == NO_RULE else ret
+
+    def live_ids(self) -> Iterator[int]:
+        """The ids of the rules still in the system, oldest first"""
+        return (n for n, alive in enumerate(self.alive) if alive)
+
+    def __len__(self) -> int:
+        return self.n_alive
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""The queue of pending critical pairs and the heuristics that pick from it.
+
+The queue keeps one heap per selection key in use, so every strategy
+(and any mix of strategies) can pop in logarithmic time
+without re-sorting anything."""
+from matchpy import Expression
+from itertools import count
+import heapq
+
+from typing import (Callable, Dict, Generic, Iterable, List,  # noqa: F401
+                    Optional, Set, Tuple, TypeVar)
+
+_T = TypeVar('_T')
+
+CriticalPair = Tuple[Expression, Expression]
+"""A pair of terms that must be joinable for the system to be confluent"""
+
+Parents = Tuple[int, int]
+"""The ids of the two rules a critical pair comes from"""
+
+
+class Heap(Generic[_T]):
+    """Min-heap wrapper requiring a key function"""
+    def __init__(self, key: Callable[[_T], int],
+                 tiebreak: Optional[Callable[[_T], int]] = None) -> None:
+        """:param key: The priority of an item, smallest first
+        :param tiebreak: Orders items of equal priority.
+        Defaults to the order they were pushed in."""
+        self.key = key
+        self.tiebreak = tiebreak
+        self.heap = []  # type: List[Tuple[int, int, _T]]
+        self.counter = count()
+
+    def push(self, item: _T, priority: Optional[int] = None) -> None:
+        """Insert into the heap, computing the priority via key
+        unless it is given."""
+        if priority is None:
+            priority = self.key(item)
+        if self.tiebreak is None:
+            count = next(self.counter)
+        else:
+            count = self.tiebreak(item)
+        heapq.heappush(self.heap, (priority, count, item))
+
+    def popmin(self) -> _T:
+        """Pop off the smallest item from the heap"""
+        _, _, item = heapq.heappop(self.heap)
+        return item
+
+    def retain(self, keep: Callable[[_T], bool]) -> None:
+        """Drop every item for which :param:`keep` is false"""
+        self.heap = [entry for entry in self.heap if keep(entry[2])]
+        heapq.heapify(self.heap)
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __bool__(self) -> bool:
+        return bool(self.heap)
+
+
+def subexpression_count(expr: Expression) -> int:
+    """Count the number of nodes in the tree formed by :param:`expr`"""
+    return len(list(expr.preorder_iter()))
+
+
+def term_depth(expr: Expression) -> int:
+    """The length of the longest path from the root of :param:`expr`
+    to one of its leaves. Constants and variables have depth 0."""
+    return max((len(pos) for _, pos in expr.preorder_iter()), default=0)
+
+
+_Entry = Tuple[int, CriticalPair, Optional[Parents]]
+
+
+def _entry_id(entry: _Entry) -> int:
+    return entry[0]
+
+
+SELECTION_KEYS = ('size', 'weight', 'age', 'depth')
+"""The keys a :cls:`CriticalPairQueue` can pop by"""
+
+
+class CriticalPairQueue(object):
+    """The pending critical pairs of a completion.
+
+    There is one heap per key in :data:`SELECTION_KEYS` that has been
+    popped by, made from the pending pairs the first time it is needed,
+    so each pair is only measured under the keys in use.
+    Popping from one heap leaves stale copies in the others,
+    which are skipped when they surface and purged once they
+    make up the bulk of a heap.
+
+    A pair may come with the ids of the rules it was formed from.
+    These are not needed to process it, so :meth:`pop` leaves them
+    in :attr:`last_parents`."""
+
+    def __init__(self,
+                 weight: Optional[Callable[[Expression], int]] = None) -> None:
+        """:param weight: Weight function on terms for the 'weight' key.
+        Defaults to counting nodes."""
+        self.weight = weight or subexpression_count
+        self.ids = count()
+        self.live = {}  # type: Dict[int, _Entry]
+        """The pending pairs by id"""
+        self.last_parents = None  # type: Optional[Parents]
+        self.heaps = {}  # type: Dict[str, Heap[_Entry]]
+
+    def _key(self, key: str) -> Callable[[_Entry], int]:
+        """The priority of a pair under :param:`key`
+
+        :raises: :cls:`KeyError` if :param:`key` isn't a selection key"""
+        if key == 'size':
+            return lambda e: (subexpression_count(e[1][0])
+                              + subexpression_count(e[1][1]))
+        if key == 'weight':
+            return lambda e: self.weight(e[1][0]) + self.weight(e[1][1])
+        if key == 'age':
+            return _entry_id
+        if key == 'depth':
+            return lambda e: max(term_depth(e[1][0]), term_depth(e[1][1]))
+        raise KeyError("Unknown selection key {!r}".format(key))
+
+    def _heap(self, key: str) -> 'Heap[_Entry]':
+        """The heap for :param:`key`, made from the pending pairs
+        if there isn't one yet"""
+        heap = self.heaps.get(key)
+        if heap is None:
+            # Ties go to the older pair, however the pairs got into a heap
+            heap = Heap(self._key(key), _entry_id)
+            heap.heap = [(heap.key(entry), entry_id, entry)
+                         for entry_id, entry in self.live.items()]
+            heapq.heapify(heap.heap)
+            self.heaps[key] = heap
+        return heap
+
+    def set_weight(self, weight: Callable[[Expression], int]) -> None:
+        """Use :param:`weight` for the 'weight' key from now on,
+        re-keying any pairs that are already queued"""
+        if weight is self.weight:
+            return
+        self.weight = weight
+        if 'weight' in self.heaps:
+            del self.heaps['weight']
+            self._heap('weight')
+
+    def push(self, pair: CriticalPair,
+             parents: Optional[Parents] = None) -> None:
+        """Add a critical pair to every heap in use
+
+        :param parents: The ids of the rules the pair comes from, if any"""
+        self._push_entry((next(self.ids), pair, parents))
+
+    def _push_entry(self, entry: _Entry,
+                    known: Optional[Dict[str, int]] = None) -> None:
+        """Add a pair that already has its id to every heap in use
+
+        :param known: Priorities of the pair that were already worked out,
+        by key"""
+        self.live[entry[0]] = entry
+        for key, heap in self.heaps.items():
+            heap.push(entry, None if known is None else known.get(key))
+
+    def pop(self, key: str) -> CriticalPair:
+        """Remove and return the pair that is smallest under :param:`key`
+
+        :raises: :cls:`KeyError` if :param:`key` isn't a selection key
+        :raises: :cls:`IndexError` if the queue is empty"""
+        heap = self._heap(key)
+        while True:
+            entry_id, pair, parents = heap.popmin()
+            if self.live.pop(entry_id, None) is not None:
+                break
+        if not self.live:
+            for other in self.heaps.values():
+                other.heap.clear()
+        else:
+            for other in self.heaps.values():
+                if len(other) > 2 * len(self.live) + 64:
+                    other.retain(lambda e: e[0] in self.live)
+        self.last_parents = parents
+        return pair
+
+    def entries(self) -> Iterable[Tuple[CriticalPair, Optional[Parents]]]:
+        """All pending pairs with their parents, oldest first"""
+        return [(entry[1], entry[2])
+                for _, entry in sorted(self.live.items())]
+
+    def pairs(self) -> List[CriticalPair]:
+        """All pending pairs, oldest first"""
+        return [pair for pair, _ in self.entries()]
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def __bool__(self) -> bool:
+        return bool(self.live)
+
+
+class SelectionStrategy(object):
+    """Decides which heap of a :cls:`CriticalPairQueue`
+    the next critical pair is taken from"""
+
+    def next_key(self) -> str:
+        """The selection key to pop the next pair by"""
+        raise NotImplementedError("Selection strategies must pick a key")
+
+    def primary_key(self) -> str:
+        """The key that picks most of the pairs, so the pairs
+        that are worst under it can wait the longest"""
+        return self.next_key()
+
+    def select(self, queue: CriticalPairQueue) -> CriticalPair:
+        """Remove the next pair to process from :param:`queue`"""
+        return queue.pop(self.next_key())
+
+
+class SizeSelection(SelectionStrategy):
+    """Smallest pair first, counting the nodes of both sides"""
+
+    def next_key(self) -> str:
+        return 'size'
+
+
+class WeightSelection(SelectionStrategy):
+    """Lightest pair first, under the weight function of the ordering
+    in use (if it has one, otherwise this is :cls:`SizeSelection`)"""
+
+    def next_key(self) -> str:
+        return 'weight'
+
+
+class AgeSelection(SelectionStrategy):
+    """Oldest pair first"""
+
+    def next_key(self) -> str:
+        return 'age'
+
+
+class DepthSelection(SelectionStrategy):
+    """Shallowest pair first, by the greater depth of its two sides"""
+
+    def next_key(self) -> str:
+        return 'depth'
+
+
+class PickRatioSelection(SelectionStrategy):
+    """Interleave selection by age and by weight.
+
+    Out of every :param:`age` + :param:`weight` pairs,
+    the first :param:`age` are the oldest ones
+    and the rest are the lightest ones."""
+
+    def __init__(self, age: int = 1, weight: int = 5) -> None:
+        if age < 0 or weight < 0 or age + weight == 0:
+            raise ValueError("Pick ratio needs non-negative parts that aren't both zero")  # NOQA
+        self.age = age
+        self.weight = weight
+        self.step = 0
+
+    def primary_key(self) -> str:
+        return 'age' if self.age > self.weight else 'weight'
+
+    def next_key(self) -> str:
+        key = 'age' if self.step < self.age else 'weight'
+        self.step = (self.step + 1) % (self.age + self.weight)
+        return key
+
+
+STRATEGIES = {
+    'size': SizeSelection,
+    'weight': WeightSelection,
+    'age': AgeSelection,
+    'depth': DepthSelection,
+    'ratio': PickRatioSelection,
+}  # type: Dict[str, Callable[[], SelectionStrategy]]
+"""Built-in selection strategies by name"""
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Conversion of terms to and from plain JSON-compatible data.
+
+Operations made by :fn:`matchpy.Operation.new` are classes that can't
+be pickled, so terms are written out with operators referred to by name.
+When reading them back, the names are looked up in a signature
+(so the terms use the same operator classes as the caller's orderings),
+and operations that aren't in it are recreated from their description."""
+from .utils import Operator
+
+from matchpy import (Expression, Operation, Symbol, Wildcard, Arity,
+                     make_dot_variable)
+
+from typing import (Any, Dict, Iterable, Mapping, Optional,  # noqa: F401
+                    Type, cast)
+
+Signature = Mapping[str, Operator]
+"""Operators by name. Operations and constants have separate
+namespaces in the encoding, so this maps both kinds of names."""
+
+
+def operators_of(terms: Iterable[Expression]) -> Dict[str, Operator]:
+    """Collect the signature of :param:`terms`
+
+    :raises: :cls:`ValueError` if two different operators share a name"""
+    ret = {}  # type: Dict[str, Operator]
+    for term in terms:
+        for subterm, _ in term.preorder_iter():
+            if isinstance(subterm, Operation):
+                op = type(subterm)  # type: Operator
+                name = subterm.name
+            elif isinstance(subterm, Symbol):
+                op = subterm
+                name = subterm.name
+            else:
+                continue
+            if ret.setdefault(name, op) != op:
+                raise ValueError("Two different operators named {}".format(name))  # NOQA
+    return ret
+
+
+def describe_operation(op: Type[Operation]) -> Dict[str, Any]:
+    """The data needed to recreate :param:`op`"""
+    return {'class': op.__name__,
+            'arity': [op.arity.min_count, op.arity.fixed_size],
+            'associative': op.associative,
+            'commutative': op.commutative,
+            'one_identity': op.one_identity,
+            'infix': op.infix}
+
+
+def encode_term(term: Expression) -> Any:
+    """Turn :param:`term` into nested lists.
+
+    Variables become ['v', name], constants ['s', name]
+    and operations ['f', name, operand...]"""
+    if isinstance(term, Wildcard):
+        if term.variable_name is None or not term.fixed_size:
+            raise ValueError("Only named dot variables can be encoded")
+        return ['v', term.variable_name]
+    elif isinstance(term, Symbol):
+        return ['s', term.name]
+    elif isinstance(term, Operation):
+        return ['f', term.name] + [encode_term(t) for t in term.operands]
+    else:
+        raise TypeError("Can't encode {!r}".format(term))
+
+
+class TermEncoder(object):
+    """Encodes terms while recording every operation it meets,
+    so the terms can be decoded without the original signature"""
+
+    def __init__(self) -> None:
+        self.operations = {}  # type: Dict[str, Dict[str, Any]]
+        self.signature = {}  # type: Dict[str, Operator]
+
+    def encode(self, term: Expression) -> Any:
+        """Encode :param:`term` as :fn:`encode_term` does"""
+        for subterm, _ in term.preorder_iter():
+            if (isinstance(subterm, Operation)
+                    and subterm.name not in self.operations):
+                self.operations[subterm.name] =\
+                    describe_operation(type(subterm))
+                self.signature[subterm.name] = type(subterm)
+        return encode_term(term)
+
+
+class TermDecoder(object):
+    """Decodes terms made by :cls:`TermEncoder`"""
+
+    def __init__(self, operations: Mapping[str, Mapping[str, Any]],
+                 signature: Optional[Signature] = None) -> None:
+        """:param operations: The descriptions recorded by the encoder
+        :param signature: Operators to reuse instead of creating new ones"""
+        self.operations = operations
+        self.signature = dict(signature or {})
+
+    def operation(self, name: str) -> Type[Operation]:
+        """Find or recreate the operation called :param:`name`"""
+        op = self.signature.get(name)
+        if isinstance(op, type) and issubclass(op, Operation):
+            return op
+        try:
+            desc = self.operations[name]
+        except KeyError:
+            raise ValueError("No description for operation {}".format(name))
+        new_op = Operation.new(name, Arity(*desc['arity']), desc['class'],
+                               associative=desc['associative'],
+                               commutative=desc['commutative'],
+                               one_identity=desc['one_identity'],
+                               infix=desc['infix'])
+        self.signature[name] = new_op
+        return new_op
+
+    def decode(self, data: Any) -> Expression:
+        """Rebuild a term from its encoding"""
+        tag = data[0]
+        if tag == 'v':
+            return make_dot_variable(data[1])
+        elif tag == 's':
+            op = self.signature.get(data[1])
+            if isinstance(op, Symbol):
+                return op
+            return Symbol(data[1])
+        elif tag == 'f':
+            op = self.operation(data[1])
+            return cast(Expression, op(*(self.decode(t) for t in data[2:])))
+        else:
+            raise ValueError("Unknown term tag {!r}".format(tag))
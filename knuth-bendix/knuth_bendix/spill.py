@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""A critical pair queue that keeps only part of itself in memory.
+
+Once the queue holds too many pairs, the worse half of them
+(under one selection key) is written out as a sorted run file,
+with terms in the encoding of :mod:`knuth_bendix.serialization`.
+Pairs come back from the runs, best first, when the pairs in memory
+run out or when a run holds a better pair than any in memory.
+Listing every pending pair (to checkpoint the queue, or move its pairs
+to another) reads the runs back a bounded number of rows at a time."""
+from .selection import (CriticalPairQueue, CriticalPair,  # noqa: F401
+                        Parents, SELECTION_KEYS, _Entry)
+from .serialization import TermEncoder, TermDecoder
+
+from matchpy import Expression
+from itertools import chain, count, islice
+import gzip
+import heapq
+import json
+import os
+import shutil
+import tempfile
+import weakref
+
+from typing import (Any, Callable, IO, Iterable, Iterator,  # noqa: F401
+                    List, Optional, Tuple)
+
+_Row = List[Any]
+"""A spilled pair on disk: [priority, id, left, right, parents]"""
+
+
+class _Run(object):
+    """A file of spilled pairs sorted by priority, read front to back"""
+
+    def __init__(self, path: str, size: int) -> None:
+        self.path = path
+        self.size = size
+        self.remaining = size
+        self.file = gzip.open(path, 'rt', encoding='utf-8')  # type: IO[str]
+        self.head = self._read()  # type: Optional[_Row]
+
+    def _read(self) -> Optional[_Row]:
+        line = self.file.readline()
+        if not line:
+            return None
+        return json.loads(line)
+
+    def advance(self) -> _Row:
+        """Remove and return the first remaining row"""
+        row = self.head
+        if row is None:
+            raise IndexError("Run is exhausted")
+        self.remaining -= 1
+        self.head = self._read()
+        return row
+
+    def rows(self) -> Iterator[_Row]:
+        """Consume the remaining rows"""
+        while self.head is not None:
+            yield self.advance()
+
+    def unread(self) -> Iterator[_Row]:
+        """The remaining rows, without consuming them"""
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in islice(f, self.size - self.remaining, None):
+                yield json.loads(line)
+
+    def close(self) -> None:
+        self.file.close()
+        os.unlink(self.path)
+
+
+def _row_key(row: _Row) -> Tuple[Any, int]:
+    return (row[0], row[1])
+
+
+def _row_age(row: _Row) -> int:
+    return row[1]
+
+
+class SpillingCriticalPairQueue(CriticalPairQueue):
+    """A :cls:`CriticalPairQueue` holding at most
+    :param:`max_in_memory` pairs in memory, with the rest on disk.
+
+    Pairs are spilled by :param:`spill_key`, so selecting by that key
+    gives the same pairs as an unbounded queue would.
+    Selecting by other keys only sees the pairs in memory,
+    and the pairs on disk when those run out."""
+
+    def __init__(self, max_in_memory: int,
+                 weight: Optional[Callable[[Expression], int]] = None,
+                 spill_key: str = 'weight',
+                 directory: Optional[str] = None,
+                 max_runs: int = 16) -> None:
+        """:param max_in_memory: Most pairs to keep in memory
+        :param weight: As for :cls:`CriticalPairQueue`
+        :param spill_key: The selection key that decides
+        which pairs go to disk
+        :param directory: Where to make the directory for run files.
+        Defaults to the system's temporary directory.
+        :param max_runs: Merge the run files into one when there are
+        more than this many, to bound the number of open files"""
+        super().__init__(weight)
+        if max_in_memory < 2:
+            raise ValueError("Need room for at least two pairs in memory")
+        if spill_key not in SELECTION_KEYS:
+            raise ValueError("Unknown selection key {!r}".format(spill_key))
+        self.max_in_memory = max_in_memory
+        self.spill_key = spill_key
+        self.max_runs = max_runs
+        self.directory = tempfile.mkdtemp(prefix='kb-pairs-', dir=directory)
+        self._cleanup = weakref.finalize(self, shutil.rmtree,
+                                         self.directory, True)
+        self.encoder = TermEncoder()
+        self.runs = []  # type: List[_Run]
+        self.run_names = count()
+        self.spilled = 0
+        self.spills = 0
+
+    def _new_run(self, rows: Iterable[_Row]) -> _Run:
+        """Store rows, already in order, in a new run file"""
+        path = os.path.join(self.directory,
+                            'run-{}.jsonl.gz'.format(next(self.run_names)))
+        size = 0
+        with gzip.open(path, 'wt', encoding='utf-8', compresslevel=1) as f:
+            for row in rows:
+                f.write(json.dumps(row, separators=(',', ':')))
+                f.write('\n')
+                size += 1
+        return _Run(path, size)
+
+    def _merge_runs(self, runs: List[_Run],
+                    key: Callable[[_Row], Any]) -> _Run:
+        """Merge the remaining rows of :param:`runs`, each sorted by
+        :param:`key`, into one run, deleting the old ones"""
+        ret = self._new_run(heapq.merge(*(run.rows() for run in runs),
+                                        key=key))
+        for run in runs:
+            run.close()
+        return ret
+
+    def _spill(self) -> None:
+        """Move all but the best half of the pairs in memory to disk"""
+        entries = sorted(((priority, entry)
+                          for priority, _, entry
+                          in self._heap(self.spill_key).heap
+                          if entry[0] in self.live),
+                         key=lambda e: (e[0], e[1][0]))
+        to_disk = entries[self.max_in_memory // 2:]
+        self.runs.append(self._new_run(
+            [priority, entry_id,
+             self.encoder.encode(s), self.encoder.encode(t), parents]
+            for priority, (entry_id, (s, t), parents) in to_disk))
+        for _, entry in to_disk:
+            del self.live[entry[0]]
+        for heap in self.heaps.values():
+            heap.retain(lambda e: e[0] in self.live)
+        self.spilled += len(to_disk)
+        self.spills += 1
+
+        if len(self.runs) > self.max_runs:
+            self.runs = [self._merge_runs(self.runs, _row_key)]
+
+    def _best_run(self) -> Optional[_Run]:
+        """The run with the best pair on disk, if any"""
+        best = None  # type: Optional[_Run]
+        for run in self.runs:
+            if run.head is not None and (best is None or best.head is None
+                                         or _row_key(run.head)
+                                         < _row_key(best.head)):
+                best = run
+        return best
+
+    def _should_refill(self, key: str) -> bool:
+        """Whether popping by :param:`key` needs pairs from disk first"""
+        if not self.live:
+            return True
+        if key != self.spill_key:
+            return False
+        run = self._best_run()
+        if run is None or run.head is None:
+            return False
+        heap = self._heap(key).heap
+        while heap[0][2][0] not in self.live:
+            heapq.heappop(heap)
+        return _row_key(run.head) < heap[0][:2]
+
+    def _refill(self) -> None:
+        """Bring the best pairs on disk back, filling half of memory"""
+        decoder = TermDecoder(self.encoder.operations, self.encoder.signature)
+        wanted = max(1, self.max_in_memory // 2 - len(self.live))
+        for _ in range(wanted):
+            run = self._best_run()
+            if run is None:
+                break
+            priority, entry_id, s, t, parents = run.advance()
+            self.spilled -= 1
+            self._push_entry((entry_id,
+                              (decoder.decode(s), decoder.decode(t)),
+                              None if parents is None else tuple(parents)),
+                             {self.spill_key: priority})
+        for run in [r for r in self.runs if r.head is None]:
+            run.close()
+            self.runs.remove(run)
+
+    def set_weight(self, weight: Callable[[Expression], int]) -> None:
+        """As for :cls:`CriticalPairQueue`, also re-keying the pairs
+        on disk if they were spilled by weight"""
+        if weight is self.weight:
+            return
+        super().set_weight(weight)
+        if self.spill_key == 'weight' and self.runs:
+            self._rekey_runs()
+
+    def _rekey_runs(self) -> None:
+        """Recompute the priorities of the pairs on disk and sort
+        them again, a batch of at most :attr:`max_in_memory` at a time"""
+        decoder = TermDecoder(self.encoder.operations, self.encoder.signature)
+        key = self._key(self.spill_key)
+
+        def rekeyed(row: _Row) -> _Row:
+            _, entry_id, s, t, parents = row
+            pair = (decoder.decode(s), decoder.decode(t))
+            return [key((entry_id, pair, parents)), entry_id, s, t, parents]
+        old_runs = self.runs
+        self.runs = []
+        rows = chain.from_iterable(run.unread() for run in old_runs)
+        while True:
+            batch = [rekeyed(row) for row in islice(rows, self.max_in_memory)]
+            if not batch:
+                break
+            batch.sort(key=_row_key)
+            self.runs.append(self._new_run(batch))
+            del batch
+            if len(self.runs) > self.max_runs:
+                self.runs = [self._merge_runs(self.runs, _row_key)]
+        for run in old_runs:
+            run.close()
+
+    def push(self, pair: CriticalPair,
+             parents: Optional[Parents] = None) -> None:
+        super().push(pair, parents)
+        if len(self.live) > self.max_in_memory:
+            self._spill()
+
+    def pop(self, key: str) -> CriticalPair:
+        if self.spilled and self._should_refill(key):
+            self._refill()
+        return super().pop(key)
+
+    def entries(self) -> Iterator[Tuple[CriticalPair, Optional[Parents]]]:
+        """All pending pairs with their parents, oldest first,
+        including those on disk.
+
+        The pairs on disk are sorted by age in batches of at most
+        :attr:`max_in_memory`, each written to a file of its own,
+        and the batches are merged as the pairs are produced.
+        So at most about twice the pairs kept in memory are in memory
+        at once, however many there are on disk."""
+        decoder = TermDecoder(self.encoder.operations, self.encoder.signature)
+        in_memory = [entry for _, entry
+                     in sorted(self.live.items())]  # type: List[_Entry]
+        batches = []  # type: List[_Run]
+        try:
+            rows = chain.from_iterable(run.unread() for run in self.runs)
+            while True:
+                batch = list(islice(rows, self.max_in_memory))
+                if not batch:
+                    break
+                batch.sort(key=_row_age)
+                batches.append(self._new_run(batch))
+                del batch
+                if len(batches) > self.max_runs:
+                    batches = [self._merge_runs(batches, _row_age)]
+
+            def decoded(run: _Run) -> Iterator[_Entry]:
+                for _, entry_id, s, t, parents in run.rows():
+                    yield (entry_id, (decoder.decode(s), decoder.decode(t)),
+                           None if parents is None else tuple(parents))
+            for _, pair, parents in heapq.merge(
+                    in_memory, *(decoded(run) for run in batches),
+                    key=lambda e: e[0]):
+                yield pair, parents
+        finally:
+            for run in batches:
+                run.close()
+
+    def close(self) -> None:
+        """Delete the run files"""
+        for run in self.runs:
+            run.file.close()
+        self.runs = []
+        self.spilled = 0
+        self._cleanup()
+
+    def __len__(self) -> int:
+        return len(self.live) + self.spilled
+
+    def __bool__(self) -> bool:
+        return bool(self.live) or self.spilled > 0
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Statistics on where a completion spends its effort.
+
+The counts of pairs and rules are always kept, since they cost next
+to nothing. Timing the phases of the completion (and counting AC
+unifiers) is only done while profiling, as in
+``system.complete(order, profile=True)``. What that costs can be
+measured with ``python -m knuth_bendix.benchmarks --profile-overhead``.
+
+Phases nest, so their times overlap: ordering comparisons made while
+normalizing count towards both. Overlaps computed in worker processes
+aren't timed."""
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+from typing import (Any, Callable, DefaultDict, Dict,  # noqa: F401
+                    Iterator, TypeVar)
+
+_T = TypeVar('_T')
+
+PHASES = ('find_overlaps', 'ac_operand_lists', 'normalize', 'order',
+          'canonicalize')
+"""The phases that are timed. 'canonicalize' is the interreduction
+done by :meth:`RewriteSystem._canonicalize_system_step`."""
+
+COUNTERS = ('pairs_generated', 'pairs_joined', 'pairs_oriented',
+            'pairs_kept_as_equations', 'pairs_pruned',
+            'max_queue', 'max_rules')
+
+
+class CompletionStats(object):
+    """Cumulative statistics of the completions of one system"""
+
+    def __init__(self) -> None:
+        self.profiling = False
+        """Whether phases are being timed"""
+        self.time = defaultdict(float)  # type: DefaultDict[str, float]
+        """Seconds spent in each phase"""
+        self.calls = defaultdict(int)  # type: DefaultDict[str, int]
+        """Number of times each phase was entered"""
+        self.ac_unifications = 0
+        """Unification problems that needed AC unification"""
+        self.ac_unifiers = 0
+        """Unifiers those problems had in total"""
+        self.max_ac_unifiers = 0
+        self.pairs_generated = 0
+        self.pairs_joined = 0
+        """Selected pairs whose sides had the same normal form"""
+        self.pairs_oriented = 0
+        """Selected pairs that became rules"""
+        self.pairs_kept_as_equations = 0
+        self.pairs_pruned = 0
+        """Selected pairs dropped as instances of known equations"""
+        self.max_queue = 0
+        """Most critical pairs waiting at once"""
+        self.max_rules = 0
+        """Most rules in the system at once"""
+
+    def call(self, phase: str, function: Callable[..., _T],
+             *args: Any) -> _T:
+        """Call :param:`function` with :param:`args`,
+        timing it as part of :param:`phase` while profiling"""
+        if not self.profiling:
+            return function(*args)
+        start = perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.time[phase] += perf_counter() - start
+            self.calls[phase] += 1
+
+    def timed(self, phase: str,
+              function: Callable[..., _T]) -> Callable[..., _T]:
+        """:param:`function`, timed as part of :param:`phase`
+        whenever it is called while profiling"""
+        def wrapper(*args: Any) -> _T:
+            return self.call(phase, function, *args)
+        return wrapper
+
+    def record_ac_unification(self, n_unifiers: int) -> None:
+        """Count an AC unification problem with :param:`n_unifiers`
+        unifiers"""
+        if not self.profiling:
+            return
+        self.ac_unifications += 1
+        self.ac_unifiers += n_unifiers
+        self.max_ac_unifiers = max(self.max_ac_unifiers, n_unifiers)
+
+    def observe(self, n_rules: int, n_pairs: int) -> None:
+        """Note the size of the system and its queue"""
+        if n_rules > self.max_rules:
+            self.max_rules = n_rules
+        if n_pairs > self.max_queue:
+            self.max_queue = n_pairs
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The statistics as JSON-compatible data"""
+        ret = {name: getattr(self, name)
+               for name in COUNTERS}  # type: Dict[str, Any]
+        if self.calls:
+            ret['phases'] = {phase: {'seconds': self.time[phase],
+                                     'calls': self.calls[phase]}
+                             for phase in self.calls}
+            ret['ac_unifications'] = self.ac_unifications
+            ret['ac_unifiers'] = self.ac_unifiers
+            ret['max_ac_unifiers'] = self.max_ac_unifiers
+        return ret
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CompletionStats':
+        """Statistics from the output of :meth:`as_dict`"""
+        ret = cls()
+        for name in COUNTERS + ('ac_unifications', 'ac_unifiers',
+                                'max_ac_unifiers'):
+            setattr(ret, name, data.get(name, 0))
+        for phase, timing in data.get('phases', {}).items():
+            ret.time[phase] = timing['seconds']
+            ret.calls[phase] = timing['calls']
+        return ret
+
+    def report(self) -> str:
+        """The statistics as a table, for people to read"""
+        lines = ['{:<26}{:>12}'.format(name.replace('_', ' ').capitalize(),
+                                       getattr(self, name))
+                 for name in COUNTERS]
+        if self.calls:
+            lines.append('')
+            lines.append('{:<18}{:>12}{:>12}'.format('Phase', 'Seconds',
+                                                     'Calls'))
+            for phase in sorted(self.calls, key=lambda p: -self.time[p]):
+                lines.append('{:<18}{:>12.3f}{:>12}'.format(
+                    phase, self.time[phase], self.calls[phase]))
+            if self.ac_unifications:
+                lines.append('')
+                lines.append('AC unifiers per problem: {:.2f} '
+                             '(most {})'.format(
+                                 self.ac_unifiers / self.ac_unifications,
+                                 self.max_ac_unifiers))
+        return '\n'.join(lines)
+
+    @contextmanager
+    def profile(self) -> Iterator['CompletionStats']:
+        """Time phases for the duration of the block,
+        including those in unification, which has no system to report to"""
+        global _active
+        old_active, old_profiling = _active, self.profiling
+        _active, self.profiling = self, True
+        try:
+            yield self
+        finally:
+            _active, self.profiling = old_active, old_profiling
+
+
+_IDLE = CompletionStats()
+_active = _IDLE
+
+
+def active() -> CompletionStats:
+    """The statistics being profiled into, or ones that ignore timings
+    if there are none"""
+    return _active
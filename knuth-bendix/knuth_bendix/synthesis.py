@@ -0,0 +1,571 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Finding orderings that orient a set of equations.
+
+Given equations, :func:`synthesize_lpo` searches for an operator
+precedence, and :func:`synthesize_kbo` for weights and a precedence,
+under which every equation can be made into a rule (in one direction
+or the other). This replaces guessing an ordering and finding out
+from a failed completion that it was wrong.
+
+For each equation, the ways it could be oriented are worked out as
+alternative sets of precedence constraints f > g. A backtracking
+search then picks one alternative per equation, keeping the
+constraints acyclic, and the result is extended to a total precedence.
+KBO weights come from a seeded search over small weights.
+If nothing works, :cls:`UnorientableEquations` holds a minimal
+set of equations that can't be oriented together. Finding it reuses
+the constraints worked out for each equation, and the searches it
+takes share a budget of :data:`MAX_SHRINK_STEPS` choices.
+
+:cls:`ExtensibleLexPathOrdering` does the same search during
+completion, one pair at a time, growing its precedence whenever
+that is what it takes to orient a new rule."""
+from .knuth_bendix_ordering import KnuthBendixOrdering
+from .lex_path_ordering import LexPathOrdering
+from .precedence import Precedence, Relation
+from .rewrite_system import RewriteSystem, GtOrder
+from .utils import Operator, to_operator, operands, Comparison
+
+from matchpy import Expression, Operation, Symbol
+import random
+
+from typing import (Callable, Dict, FrozenSet, Iterable, Iterator,  # noqa: F401,E501
+                    List, Mapping, Optional, Set, Tuple)
+
+Equation = Tuple[Expression, Expression]
+Pair = Tuple[Operator, Operator]
+Constraints = FrozenSet[Pair]
+"""Precedence pairs (f, g) that must all have f > g"""
+Alternatives = List[Constraints]
+"""Sets of constraints, any one of which is enough"""
+
+MAX_ALTERNATIVES = 32
+"""Most alternatives kept for one comparison of subterms.
+The ones needing the fewest constraints are kept."""
+
+MAX_SHRINK_STEPS = 100000
+"""Most choices the precedence searches may make between them
+while shrinking a set of equations that can't be oriented"""
+
+
+class UnorientableEquations(ValueError):
+    """No ordering of the kind searched for orients all the equations"""
+
+    def __init__(self, equations: List[Equation],
+                 minimal: bool = True) -> None:
+        """:param equations: A set of equations that can't be
+        oriented together
+        :param minimal: Whether dropping any one of them lets the rest
+        be oriented. It may not be if the search for the smallest set
+        ran out of steps."""
+        super().__init__("No ordering orients all of: {}".format(
+            ', '.join('{} = {}'.format(s, t) for s, t in equations)))
+        self.equations = equations
+        self.minimal = minimal
+
+
+def _consistent(constraints: Constraints) -> bool:
+    return all(f != g and (g, f) not in constraints
+               for f, g in constraints)
+
+
+def _simplify(alternatives: Iterable[Constraints]) -> Alternatives:
+    """Drop alternatives that can't hold or that ask for more than others,
+    then keep the :data:`MAX_ALTERNATIVES` smallest"""
+    ret = []  # type: Alternatives
+    for alt in sorted(set(alternatives), key=len):
+        if _consistent(alt) and not any(other <= alt for other in ret):
+            ret.append(alt)
+    return ret[:MAX_ALTERNATIVES]
+
+
+def _both(first: Alternatives, second: Alternatives) -> Alternatives:
+    """Alternatives for needing one of :param:`first`
+    and one of :param:`second`"""
+    return _simplify(a | b for a in first for b in second)
+
+
+_TRIVIAL = [frozenset()]  # type: Alternatives
+
+
+class _LpoConstraints(object):
+    """What the precedence must be for s > t under
+    :cls:`LexPathOrdering`, following its definition case by case"""
+
+    def __init__(self) -> None:
+        self.memo = {}  # type: Dict[Tuple[int, int], Alternatives]
+
+    def gt(self, s: Expression, t: Expression) -> Alternatives:
+        key = (id(s), id(t))
+        ret = self.memo.get(key)
+        if ret is None:
+            ret = self._gt(s, t)
+            self.memo[key] = ret
+        return ret
+
+    def _gt(self, s: Expression, t: Expression) -> Alternatives:
+        s_head = to_operator(s)
+        t_head = to_operator(t)
+        if s_head is None:
+            return []
+        if t_head is None:
+            return _TRIVIAL if t.variable_name in s.variables else []
+
+        alternatives = []  # type: Alternatives
+        for a in operands(s):
+            if a == t:
+                return _TRIVIAL
+            alternatives.extend(self.gt(a, t))
+
+        t_ops = operands(t)
+        if s_head != t_head:
+            needed = [frozenset([(s_head, t_head)])]
+            for a in t_ops:
+                needed = _both(needed, self.gt(s, a))
+        else:
+            s_ops = operands(s)
+            for s_i, t_i in zip(s_ops, t_ops):
+                if s_i != t_i:
+                    needed = self.gt(s_i, t_i)
+                    break
+            else:
+                needed = _TRIVIAL if len(s_ops) > len(t_ops) else []
+            for a in t_ops[1:]:
+                needed = _both(needed, self.gt(s, a))
+        alternatives.extend(needed)
+        return _simplify(alternatives)
+
+
+class _KboConstraints(object):
+    """What the precedence must be for s > t under
+    :cls:`KnuthBendixOrdering` with the given weights"""
+
+    def __init__(self, weights: Mapping[Operator, int],
+                 var_weight: int) -> None:
+        self.weights = weights
+        self.var_weight = var_weight
+
+    def weight(self, term: Expression) -> int:
+        ret = 0
+        for sub, _ in term.preorder_iter():
+            head = to_operator(sub)
+            ret += (self.var_weight if head is None
+                    else self.weights.get(head, 0))
+        return ret
+
+    def gt(self, s: Expression, t: Expression) -> Alternatives:
+        if not s.variables >= t.variables:
+            return []
+        w_s = self.weight(s)
+        w_t = self.weight(t)
+        if w_s != w_t:
+            return _TRIVIAL if w_s > w_t else []
+        s_head = to_operator(s)
+        t_head = to_operator(t)
+        if s_head is None:
+            return []
+        if t_head is None:
+            # s is f(f(... t)) with f unary of weight 0
+            return _TRIVIAL
+        if s_head != t_head:
+            return [frozenset([(s_head, t_head)])]
+        for s_i, t_i in zip(operands(s), operands(t)):
+            if s_i != t_i:
+                return self.gt(s_i, t_i)
+        return []
+
+
+_Option = Tuple[bool, Constraints]
+"""Orient an equation left to right (or not), given the constraints"""
+
+
+def _options(equation: Equation,
+             gt: Callable[[Expression, Expression], Alternatives])\
+        -> List[_Option]:
+    s, t = equation
+    return ([(True, alt) for alt in gt(s, t)]
+            + [(False, alt) for alt in gt(t, s)])
+
+
+class _Steps(object):
+    """Choices that one or more searches may make between them"""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.taken = 0
+
+    def take(self) -> None:
+        """Count a choice
+
+        :raises: :cls:`TimeoutError` if that is more than the limit"""
+        self.taken += 1
+        if self.taken > self.limit:
+            raise TimeoutError("Gave up after {} steps".format(self.limit))
+
+
+class _Search(object):
+    """Backtracking search for one option per equation,
+    with the precedence constraints staying acyclic"""
+
+    def __init__(self, options: List[List[_Option]], base: Iterable[Pair],
+                 steps: _Steps) -> None:
+        self.options = sorted(options, key=len)
+        self.base = list(base)
+        self.steps = steps
+
+    @staticmethod
+    def _reaches(above: Dict[Operator, Set[Operator]],
+                 f: Operator, g: Operator) -> bool:
+        """Whether f > g follows from :param:`above`"""
+        seen = set()  # type: Set[Operator]
+        todo = [f]
+        while todo:
+            h = todo.pop()
+            for lesser in above.get(h, ()):
+                if lesser == g:
+                    return True
+                if lesser not in seen:
+                    seen.add(lesser)
+                    todo.append(lesser)
+        return False
+
+    def _add(self, above: Dict[Operator, Set[Operator]],
+             constraints: Iterable[Pair])\
+            -> Optional[Dict[Operator, Set[Operator]]]:
+        """:param:`above` with :param:`constraints` added,
+        or None if that makes a cycle"""
+        new = {f: set(lesser) for f, lesser in above.items()}
+        for f, g in constraints:
+            if f == g or self._reaches(new, g, f):
+                return None
+            new.setdefault(f, set()).add(g)
+        return new
+
+    def solutions(self) -> Iterator[Dict[Operator, Set[Operator]]]:
+        """Acyclic precedences meeting some option of every equation
+
+        :raises: :cls:`TimeoutError` once :param:`steps` runs out"""
+        start = self._add({}, self.base)
+        if start is not None:
+            yield from self._solve(0, start)
+
+    def _solve(self, k: int, above: Dict[Operator, Set[Operator]])\
+            -> Iterator[Dict[Operator, Set[Operator]]]:
+        if k == len(self.options):
+            yield above
+            return
+        candidates = []
+        for _, constraints in self.options[k]:
+            new_pairs = [(f, g) for f, g in constraints
+                         if not self._reaches(above, f, g)]
+            candidates.append(new_pairs)
+        # Options that are already met, or nearly, first
+        for new_pairs in sorted(candidates, key=len):
+            self.steps.take()
+            new = self._add(above, new_pairs)
+            if new is not None:
+                yield from self._solve(k + 1, new)
+            if not new_pairs:
+                # Nothing else can do better
+                return
+
+
+def _operators(equations: Iterable[Equation]) -> List[Operator]:
+    """The operators in :param:`equations`, in the order preferred for
+    the top of the precedence when nothing else decides: operations
+    before constants, rarer before more common, then by first
+    appearance. Rare symbols above common ones is the usual heuristic
+    for orderings that complete well."""
+    counts = {}  # type: Dict[Operator, int]
+    for s, t in equations:
+        for term in (s, t):
+            for sub, _ in term.preorder_iter():
+                head = to_operator(sub)
+                if head is not None:
+                    counts[head] = counts.get(head, 0) + 1
+    first = {op: k for k, op in enumerate(counts)}
+    return sorted(counts, key=lambda op: (isinstance(op, Symbol),
+                                          counts[op], first[op]))
+
+
+def _total(above: Dict[Operator, Set[Operator]],
+           operators: List[Operator]) -> List[Pair]:
+    """A chain of operators, greatest first, that extends :param:`above`.
+    Operators are otherwise kept in the order given."""
+    below_count = {op: 0 for op in operators}
+    for f, lesser in above.items():
+        below_count.setdefault(f, 0)
+        for g in lesser:
+            below_count[g] = below_count.get(g, 0) + 1
+    order = list(below_count)
+    chain = []  # type: List[Operator]
+    while order:
+        top = next(op for op in order if below_count[op] == 0)
+        order.remove(top)
+        chain.append(top)
+        for g in above.get(top, ()):
+            below_count[g] -= 1
+    return list(zip(chain, chain[1:]))
+
+
+def _orients(order: GtOrder[Expression],
+             equations: Iterable[Equation]) -> bool:
+    return all(RewriteSystem.try_orient(s, t, order) is not None
+               for s, t in equations)
+
+
+def _unorientable(equations: List[Equation],
+                  find: Callable[[List[int], _Steps],
+                                 Optional[GtOrder[Expression]]])\
+        -> UnorientableEquations:
+    """Drop equations from the unorientable :param:`equations`
+    while the rest stay unorientable
+
+    :param find: Finds an ordering for the equations at the given
+    indices, if there is one, with searches that take from the steps
+    :returns: The error for what is left"""
+    steps = _Steps(MAX_SHRINK_STEPS)
+    conflict = list(range(len(equations)))
+    minimal = True
+    k = 0
+    while k < len(conflict):
+        rest = conflict[:k] + conflict[k + 1:]
+        try:
+            orientable = find(rest, steps) is not None
+        except TimeoutError:
+            # Keep the equation, since the rest may be orientable
+            orientable = True
+            minimal = False
+        if orientable:
+            k += 1
+        else:
+            conflict = rest
+    return UnorientableEquations([equations[k] for k in conflict], minimal)
+
+
+def _find_lpo(equations: List[Equation], options: List[List[_Option]],
+              operators: List[Operator],
+              steps: _Steps) -> Optional[LexPathOrdering]:
+    """An ordering for :param:`equations`, which have the given
+    :param:`options`"""
+    for above in _Search(options, [], steps).solutions():
+        order = LexPathOrdering(_total(above, operators))
+        if _orients(order, equations):
+            return order
+    return None
+
+
+def synthesize_lpo(equations: Iterable[Equation],
+                   max_steps: int = 100000) -> LexPathOrdering:
+    """A lexicographic path ordering that orients every equation.
+
+    The precedence is total. Where the equations leave it open,
+    operations are above constants and rarer operators above
+    more common ones.
+
+    :param max_steps: Most choices the search may make
+    :raises: :cls:`UnorientableEquations` if there's no such ordering
+    :raises: :cls:`TimeoutError` if the search takes too many steps"""
+    equations = list(equations)
+    constraints = _LpoConstraints()
+    options = [_options(eq, constraints.gt) for eq in equations]
+    operators = _operators(equations)
+
+    def find(indices: List[int], steps: _Steps) -> Optional[LexPathOrdering]:
+        return _find_lpo([equations[k] for k in indices],
+                         [options[k] for k in indices], operators, steps)
+    order = find(list(range(len(equations))), _Steps(max_steps))
+    if order is not None:
+        return order
+    raise _unorientable(equations, find)
+
+
+def _arity(op: Operator) -> int:
+    if isinstance(op, type) and issubclass(op, Operation):
+        return op.arity.min_count
+    return 0
+
+
+def _weight_candidates(operators: List[Operator], tries: int,
+                       seed: int) -> Iterator[Dict[Operator, int]]:
+    """Weights to try for KBO: first making one unary operation
+    weightless (as for inverses in the usual orderings for groups),
+    then counting symbols, then making other operations weightless,
+    then random small weights. Constants always weigh at least as much
+    as variables (which weigh 1)."""
+    operations = [op for op in operators if not isinstance(op, Symbol)]
+    unary = [op for op in operations if _arity(op) == 1]
+    for zero in unary:
+        yield {op: 0 if op == zero else 1 for op in operators}
+    yield {op: 1 for op in operators}
+    yield {op: 0 if op in operations else 1 for op in operators}
+    for zero in operations:
+        if zero not in unary:
+            yield {op: 0 if op == zero else 1 for op in operators}
+    rng = random.Random(seed)
+    for _ in range(tries):
+        yield {op: rng.randint(0 if op in operations else 1, 3)
+               for op in operators}
+
+
+class _KboWeighting(object):
+    """Weights to try for KBO, with what the precedence must be
+    to orient each equation under them"""
+
+    def __init__(self, weights: Dict[Operator, int],
+                 operators: List[Operator],
+                 equations: List[Equation]) -> None:
+        self.weights = weights
+        weightless = [op for op in operators
+                      if weights[op] == 0 and _arity(op) == 1]
+        self.usable = len(weightless) <= 1
+        # A weightless unary operation must be greater than all others
+        self.base = [(weightless[0], op) for op in operators
+                     if op != weightless[0]] if weightless else []
+        self.options = []  # type: List[List[_Option]]
+        if self.usable:
+            constraints = _KboConstraints(weights, 1)
+            self.options = [_options(eq, constraints.gt)
+                            for eq in equations]
+
+
+class _KboSearch(object):
+    """Searches for KBOs orienting some of the given equations.
+    The weightings are only made, and their constraints worked out,
+    when one is first needed, and are then kept for later searches."""
+
+    def __init__(self, equations: List[Equation], tries: int,
+                 seed: int) -> None:
+        self.equations = equations
+        self.operators = _operators(equations)
+        self.candidates = _weight_candidates(self.operators, tries, seed)
+        self.weightings = []  # type: List[_KboWeighting]
+
+    def _weightings(self) -> Iterator[_KboWeighting]:
+        yield from self.weightings
+        for weights in self.candidates:
+            weighting = _KboWeighting(weights, self.operators,
+                                      self.equations)
+            self.weightings.append(weighting)
+            yield weighting
+
+    def find(self, indices: List[int],
+             steps: Callable[[], _Steps]) -> Optional[KnuthBendixOrdering]:
+        """An ordering for the equations at :param:`indices`, if any
+
+        :param steps: Makes the steps for the search under a weighting"""
+        equations = [self.equations[k] for k in indices]
+        for weighting in self._weightings():
+            if not weighting.usable:
+                continue
+            options = [weighting.options[k] for k in indices]
+            if not all(options):
+                continue
+            for above in _Search(options, weighting.base,
+                                 steps()).solutions():
+                order = KnuthBendixOrdering(
+                    weighting.weights, 1,
+                    set(_total(above, self.operators)))
+                if _orients(order, equations):
+                    return order
+        return None
+
+
+def synthesize_kbo(equations: Iterable[Equation], tries: int = 200,
+                   seed: int = 0,
+                   max_steps: int = 10000) -> KnuthBendixOrdering:
+    """A Knuth-Bendix ordering that orients every equation.
+
+    Variables weigh 1. Operations weigh between 0 and 3, and constants
+    between 1 and 3.
+
+    :param tries: How many random weightings to try
+    after the simple ones
+    :param seed: Seed for the random weightings
+    :param max_steps: Most choices the precedence search may make
+    for each weighting
+    :raises: :cls:`UnorientableEquations` if none of the weights tried
+    work. The equations are then minimal for the weights tried.
+    :raises: :cls:`ValueError` for associative or variadic operations,
+    which KBO can't handle
+    :raises: :cls:`TimeoutError` if the precedence search takes
+    too many steps"""
+    equations = list(equations)
+    for op in _operators(equations):
+        if (isinstance(op, type) and issubclass(op, Operation)
+                and not op.arity.fixed_size):
+            raise ValueError(
+                "Fixed-arity functions only in Knuth-Bendix ordering")
+    search = _KboSearch(equations, tries, seed)
+    order = search.find(list(range(len(equations))),
+                        lambda: _Steps(max_steps))
+    if order is not None:
+        return order
+    # The weights are those made for all the equations,
+    # so subsets are only tried with them
+    raise _unorientable(equations,
+                        lambda indices, steps: search.find(indices,
+                                                           lambda: steps))
+
+
+class ExtensibleLexPathOrdering(LexPathOrdering):
+    """A :cls:`LexPathOrdering` that grows its precedence on demand.
+
+    When :meth:`RewriteSystem.try_orient` finds two terms incomparable,
+    it calls :meth:`extend_to_orient`, which adds the fewest precedence
+    pairs that orient them, if any consistent ones exist.
+    Since LPO only grows with its precedence, rules oriented earlier
+    stay oriented."""
+
+    def __init__(self, op_gt: Relation = (),
+                 cache_size: Optional[int] = None,
+                 max_steps: int = 1000) -> None:
+        """:param op_gt: The precedence to start from
+        :param cache_size: As for :cls:`LexPathOrdering`
+        :param max_steps: Most choices the search for an extension
+        may make, for each pair of terms"""
+        super().__init__(op_gt, cache_size)
+        self.max_steps = max_steps
+        self.extensions = []  # type: List[Pair]
+        """Pairs added to the precedence, in the order they were added"""
+
+    def extend_to_orient(self, s: Expression, t: Expression) -> Comparison:
+        """Extend the precedence so that s and t are comparable, if a
+        consistent extension can be found within :param:`max_steps`.
+
+        :returns: How s compares to t afterwards"""
+        constraints = _LpoConstraints()
+        options = [_options((s, t), constraints.gt)]
+        if not options[0]:
+            return Comparison.INCOMPARABLE
+        current = list(self.op_gt)
+        try:
+            for above in _Search(options, current,
+                                 _Steps(self.max_steps)).solutions():
+                new = [(f, g) for f, lesser in above.items()
+                       for g in lesser if not self.op_gt.greater(f, g)]
+                precedence = Precedence(current + new)
+                result = LexPathOrdering(precedence).compare(s, t)
+                if result in (Comparison.GREATER, Comparison.LESS):
+                    self.op_gt = precedence
+                    self.cache.clear()
+                    self.extensions.extend(new)
+                    return result
+        except TimeoutError:
+            pass
+        return Comparison.INCOMPARABLE
@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Reading equations from TPTP problem files.
+
+Only the equational fragment of ``tff`` and ``fof`` is understood:
+type declarations of sorts, constants and functions, and axioms that
+are (universally quantified) equations between terms.
+Other statements, such as axioms with connectives or predicates,
+are skipped and listed in :attr:`TptpReader.skipped`.
+Comments run from ``%`` or ``#`` to the end of the line.
+
+The input is read one statement at a time, and each statement is
+turned into terms as soon as it ends, so files with many axioms
+are read in time and memory proportional to their size."""
+from .serialization import Signature
+from .utils import Operator
+
+from matchpy import (Expression, Operation, Symbol, Arity,
+                     make_dot_variable)
+import re
+
+from typing import (Dict, IO, Iterable, Iterator, List,  # noqa: F401
+                    Optional, Set, Tuple, Union)
+
+Equation = Tuple[Expression, Expression]
+
+EQUATION_ROLES = ('axiom', 'hypothesis', 'definition', 'lemma', 'theorem')
+"""Roles of statements that are read as equations to complete"""
+
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<word>\$\$?[A-Za-z0-9_]+|[A-Za-z][A-Za-z0-9_]*)
+  | (?P<number>[-+]?[0-9]+(?:[./][0-9]+)?(?:[Ee][-+]?[0-9]+)?)
+  | (?P<quoted>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<op><=>|<~>|=>|<=|!=|~\||~&|[!?\[\]():,=&|~>*])
+  )""", re.VERBOSE)
+
+
+class TptpSyntaxError(ValueError):
+    """A statement that can't be read"""
+
+    def __init__(self, message: str, line: int) -> None:
+        super().__init__("line {}: {}".format(line, message))
+        self.line = line
+
+
+class _NotEquational(Exception):
+    """A statement outside the fragment that is read"""
+
+
+def _tokens(text: str, line: int) -> List[Tuple[str, str]]:
+    """Split :param:`text` into (kind, text) tokens"""
+    ret = []
+    pos = 0
+    end = len(text.rstrip())
+    while pos < end:
+        match = _TOKEN.match(text, pos)
+        if match is None or match.end() == pos:
+            raise TptpSyntaxError("Unexpected {!r}".format(
+                text[pos:].strip()[:20]), line)
+        kind = match.lastgroup
+        ret.append((kind, match.group(kind)))
+        pos = match.end()
+    return ret
+
+
+def statements(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """Split TPTP input into statements, without their final periods
+    and with comments removed
+
+    :returns: The line each statement starts on, and its text"""
+    parts = []  # type: List[str]
+    depth = 0
+    start = 0
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        quote = None  # type: Optional[str]
+        begin = 0
+        for k, char in enumerate(line):
+            if quote is not None:
+                if char == quote and line[k - 1] != '\\':
+                    quote = None
+                continue
+            if char in '%#':
+                break
+            if not start and not char.isspace():
+                start = number
+            if char in '\'"':
+                quote = char
+            elif char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            elif char == '.' and depth == 0:
+                parts.append(line[begin:k])
+                yield start, ''.join(parts).strip()
+                parts = []
+                begin = k + 1
+                start = 0
+        else:
+            k = len(line)
+        if quote is not None:
+            raise TptpSyntaxError("Unterminated quote", number)
+        parts.append(line[begin:k])
+        parts.append(' ')
+    if start:
+        raise TptpSyntaxError("Missing final period", start)
+
+
+class _Parser(object):
+    """Recursive descent over the tokens of one statement"""
+
+    def __init__(self, tokens: List[Tuple[str, str]], line: int) -> None:
+        self.tokens = tokens
+        self.pos = 0
+        self.line = line
+
+    def peek(self) -> Optional[str]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos][1]
+        return None
+
+    def next(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise TptpSyntaxError("Statement ends too soon", self.line)
+        ret = self.tokens[self.pos]
+        self.pos += 1
+        return ret
+
+    def expect(self, text: str) -> None:
+        _, got = self.next()
+        if got != text:
+            raise TptpSyntaxError("Expected {!r}, got {!r}".format(
+                text, got), self.line)
+
+    def name(self) -> str:
+        kind, text = self.next()
+        if kind == 'quoted':
+            return text[1:-1]
+        if kind in ('word', 'number'):
+            return text
+        raise TptpSyntaxError("Expected a name, got {!r}".format(text),
+                              self.line)
+
+    def at_end(self) -> bool:
+        return self.pos == len(self.tokens)
+
+    def skip_group(self) -> None:
+        """Skip tokens up to the ',' or ')' that closes the current
+        argument of the statement"""
+        depth = 0
+        while True:
+            text = self.peek()
+            if text is None:
+                raise TptpSyntaxError("Unbalanced parentheses", self.line)
+            if depth == 0 and text in (',', ')'):
+                return
+            if text in ('(', '['):
+                depth += 1
+            elif text in (')', ']'):
+                depth -= 1
+            self.pos += 1
+
+
+class TptpReader(object):
+    """Reads equations from TPTP input, keeping the operators it
+    has declared or met between files"""
+
+    def __init__(self, signature: Optional[Signature] = None) -> None:
+        """:param signature: Operators to use for the names in the
+        input, such as associative-commutative operations, which TPTP
+        can't declare. Other operations are made as they are declared
+        or, in ``fof`` input, first used."""
+        self.operators = dict(signature or {})  # type: Dict[str, Operator]
+        self.predicates = set()  # type: Set[str]
+        """Names declared as predicates, which equations can't use"""
+        self.skipped = []  # type: List[Tuple[str, str]]
+        """Names of statements that weren't read, and why"""
+        self.conjectures = []  # type: List[Equation]
+        """Equations from conjectures, in the order read"""
+
+    def read(self, source: Union[str, IO[str]]) -> List[Equation]:
+        """The equations in a file
+
+        :param source: Path to the file, or the open file"""
+        if isinstance(source, str):
+            with open(source, encoding='utf-8') as f:
+                return list(self.equations(f))
+        return list(self.equations(source))
+
+    def equations(self, lines: Iterable[str]) -> Iterator[Equation]:
+        """The equations in TPTP input, as they are read
+
+        :raises: :cls:`TptpSyntaxError` for malformed statements
+        and declarations that contradict earlier ones"""
+        for line, text in statements(lines):
+            parser = _Parser(_tokens(text, line), line)
+            equation = self._statement(parser)
+            if equation is not None:
+                yield equation
+
+    def _statement(self, parser: _Parser) -> Optional[Equation]:
+        kind = parser.name()
+        if kind == 'include':
+            raise TptpSyntaxError("include() isn't supported", parser.line)
+        if kind not in ('tff', 'fof', 'cnf'):
+            raise TptpSyntaxError("Unknown statement {}".format(kind),
+                                  parser.line)
+        parser.expect('(')
+        name = parser.name()
+        parser.expect(',')
+        role = parser.name()
+        parser.expect(',')
+        if role == 'type':
+            self._declaration(parser)
+            ret = None
+        else:
+            start = parser.pos
+            try:
+                ret = self._formula(parser)
+                if parser.peek() not in (',', ')'):
+                    raise _NotEquational("not just an equation")
+            except _NotEquational as e:
+                parser.pos = start
+                parser.skip_group()
+                self.skipped.append((name, str(e)))
+                ret = None
+            if ret is not None and role == 'conjecture':
+                self.conjectures.append(ret)
+                ret = None
+            elif ret is not None and role not in EQUATION_ROLES:
+                self.skipped.append((name, "role is " + role))
+                ret = None
+        if parser.peek() == ',':
+            # Annotations
+            parser.pos += 1
+            parser.skip_group()
+        parser.expect(')')
+        if not parser.at_end():
+            raise TptpSyntaxError("Text after the end of " + name,
+                                  parser.line)
+        return ret
+
+    def _declaration(self, parser: _Parser) -> None:
+        """Record name: type"""
+        parens = 0
+        while parser.peek() == '(':
+            parser.pos += 1
+            parens += 1
+        name = parser.name()
+        parser.expect(':')
+        arguments = []  # type: List[str]
+        if parser.peek() == '(':
+            parser.pos += 1
+            arguments.append(parser.name())
+            while parser.peek() == '*':
+                parser.pos += 1
+                arguments.append(parser.name())
+            parser.expect(')')
+            parser.expect('>')
+        result = parser.name()
+        if not arguments and parser.peek() == '>':
+            parser.pos += 1
+            arguments.append(result)
+            result = parser.name()
+        for _ in range(parens):
+            parser.expect(')')
+
+        if result == '$tType':
+            return
+        if result == '$o':
+            self.predicates.add(name)
+            return
+        self._operator(name, len(arguments), parser.line)
+
+    def _operator(self, name: str, arity: int, line: int) -> Operator:
+        """The operator called :param:`name`, made if it's new"""
+        op = self.operators.get(name)
+        if op is None:
+            if arity == 0:
+                op = Symbol(name)
+            else:
+                op = Operation.new(name, Arity(arity, True))
+            self.operators[name] = op
+            return op
+        if isinstance(op, Symbol):
+            ok = arity == 0
+        else:
+            ok = (op.arity.min_count <= arity
+                  and (arity == op.arity.min_count
+                       or not op.arity.fixed_size))
+        if not ok:
+            raise TptpSyntaxError("{} used with {} arguments".format(
+                name, arity), line)
+        return op
+
+    def _formula(self, parser: _Parser) -> Equation:
+        """A universally quantified equation"""
+        text = parser.peek()
+        if text == '!':
+            parser.pos += 1
+            parser.expect('[')
+            while True:
+                parser.name()
+                if parser.peek() == ':':
+                    parser.pos += 1
+                    parser.name()
+                if parser.peek() != ',':
+                    break
+                parser.pos += 1
+            parser.expect(']')
+            parser.expect(':')
+            return self._formula(parser)
+        if text == '(':
+            start = parser.pos
+            parser.pos += 1
+            try:
+                ret = self._formula(parser)
+                parser.expect(')')
+                return ret
+            except _NotEquational as exc:
+                # Maybe a parenthesized left side, and if not,
+                # a formula with connectives inside the parentheses
+                parser.pos = start
+                try:
+                    left = self._term(parser)
+                except TptpSyntaxError:
+                    raise exc
+        else:
+            left = self._term(parser)
+        text = parser.peek()
+        if text != '=':
+            raise _NotEquational("not an equation" if text != '!='
+                                 else "a disequation")
+        parser.pos += 1
+        right = self._term(parser)
+        if parser.peek() not in (None, ',', ')'):
+            raise _NotEquational("not just an equation")
+        return (left, right)
+
+    def _term(self, parser: _Parser) -> Expression:
+        kind, text = parser.next()
+        if text == '(':
+            ret = self._term(parser)
+            parser.expect(')')
+            return ret
+        if kind == 'op':
+            raise _NotEquational("uses " + text)
+        if kind == 'word' and text[0].isupper():
+            return make_dot_variable(text)
+        name = text[1:-1] if kind == 'quoted' and text[0] == "'" else text
+        if name in self.predicates:
+            raise _NotEquational("uses the predicate " + name)
+        operands = []  # type: List[Expression]
+        if parser.peek() == '(':
+            parser.pos += 1
+            operands.append(self._term(parser))
+            while parser.peek() == ',':
+                parser.pos += 1
+                operands.append(self._term(parser))
+            parser.expect(')')
+        op = self._operator(name, len(operands), parser.line)
+        if isinstance(op, Symbol):
+            return op
+        return op(*operands)
+
+
+def read_equations(source: Union[str, IO[str]],
+                   signature: Optional[Signature] = None)\
+        -> List[Equation]:
+    """The equations in a TPTP file, as read by :cls:`TptpReader`"""
+    return TptpReader(signature).read(source)
@@ -16,10 +16,12 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """Unification of two terms and associated functionality"""
 from .utils import substitute
+from .events import Event, EventBus
+from .stats import active
 
 import matchpy
 from matchpy import (Expression, get_variables, get_head, rename_variables,
-                     Substitution, Wildcard, Operation)
+                     Substitution, Wildcard, Operation, Symbol)
 
 from typing import (Optional, Iterator, Tuple, Deque, Dict, List,  # noqa: F401
                     NamedTuple, TypeVar, Iterable, Sequence, DefaultDict, Any)
@@ -30,6 +32,9 @@ from multiset import Multiset
 import itertools
 import numpy as np  # type: ignore
 
+events = EventBus()
+"""Observers of unification, which has no system to report to"""
+
 
 def unique_variables_map(expr: Expression,
                          to_avoid: Expression) -> Dict[str, str]:
@@ -73,12 +78,14 @@ def maybe_add_substitution(sub: Substitution, var: str,
     or None if this isn't possible"""
     new_substitutions = {var: replacement}
     if matchpy.contains_variables_from_set(replacement, {var}):
-        # print("Failed occurs check", var, "→", replacement)
         return None  # Occurs check failed
     for v, term in sub.items():
         new_term = substitute(term, Substitution({var: replacement}))
         if matchpy.contains_variables_from_set(new_term, {v}):
-            print("Failed other occurs check", term, "/", v, "→", new_term, "under", var, "→", replacement)
+            events.emit(Event.OCCURS_CHECK_FAILED,
+                        lambda: {'other': v, 'term': str(term),
+                                 'variable': var,
+                                 'replacement': str(replacement)})
             return None  # Occurs check failed
         if new_term != term:
             new_substitutions[v] = new_term
@@ -217,7 +224,8 @@ def ac_operand_lists(t1: Operation, t2: Operation)\
     if t1_duplicate_vars and t2_duplicate_vars:
         raise(NotImplementedError("Possible nontermination on this algo, dispatch slowward"))  # noqa
     elif t1_duplicate_vars or t2_duplicate_vars:
-        print("Redundant solutions really gosh darn likely")
+        events.emit(Event.REDUNDANT_AC_SOLUTIONS,
+                    lambda: {'left': str(t1), 'right': str(t2)})
 
     ret = []
 
@@ -379,6 +387,8 @@ def unify_expressions(left: Expression,
     :param right: An expression to unify
     :returns: The unifying substitution, or None"""
     main_ret = []
+    stats = active()
+    used_ac = False
 
     root_ret = Substitution()
     root_to_operate = deque([(left, right)])
@@ -386,16 +396,13 @@ def unify_expressions(left: Expression,
     while operations:
         preserve_this = True
         ret, to_operate = operations.pop()
-        # print("Trace:","Have", ret, "processing", ", ".join(map(lambda x: str((str(x[0]), str(x[1]))), to_operate)))
         if not to_operate:  # Successful unification
             main_ret.append(ret)
             continue
 
         t1, t2 = to_operate.popleft()
-        # print("Try to unify", t1, "and", t2)
         if t1 == t2:
             operations.append((ret, to_operate))
-            # print("Equality continue")
             continue
 
         any_change = False
@@ -418,7 +425,9 @@ def unify_expressions(left: Expression,
               and isinstance(t2, Operation)):
             # Unify within functions
             if t1.associative and t1.commutative:
-                potential_unifiers = ac_operand_lists(t1, t2)
+                potential_unifiers = stats.call('ac_operand_lists',
+                                                ac_operand_lists, t1, t2)
+                used_ac = True
                 preserve_this = False
                 for i in potential_unifiers:
                     new_ret = copy(ret)
@@ -440,16 +449,14 @@ def unify_expressions(left: Expression,
                 a, b = to_operate.popleft()
                 new_a = substitute(a, ret)
                 new_b = substitute(b, ret)
-                if a != new_a:
-                    pass # print("Substituion modified", a, "→", new_a)
-                if b != new_b:
-                    pass # print("Substituion modified", b, "→", new_b)
                 new_queue.append((new_a, new_b))
             to_operate = new_queue
 
         if preserve_this:
             operations.append((ret, to_operate))
 
+    if used_ac:
+        stats.record_ac_unification(len(main_ret))
     return main_ret
 
 
@@ -490,6 +497,16 @@ def equal_mod_renaming(t1: Expression, t2: Expression) -> bool:
     return t1_canonical == t2_canonical
 
 
+def is_instance(term: Expression, pattern: Expression) -> bool:
+    """Determines if :ref:`term` is an instance of :ref:`pattern`,
+    treating the variables of :ref:`term` as constants.
+
+    :returns: Whether term = pattern σ for some substitution σ"""
+    frozen = {name: Symbol('?' + name) for name in get_variables(term)}
+    subject = substitute(term, frozen)
+    return any(True for _ in matchpy.match(subject, matchpy.Pattern(pattern)))
+
+
 def proper_contains(term: Expression,
                     within: Expression) -> bool:
     """Determines if :ref:`term` is a proper subterm of :ref:`within`
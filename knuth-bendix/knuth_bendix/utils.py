@@ -1,25 +1,62 @@
 from matchpy import (Expression, Substitution, get_head, Operation, Symbol)
 from matchpy import substitute as _substitute
 
-from typing import TypeVar, Set, Tuple, Optional, Union, cast, Type, List
+from enum import Enum
+from typing import (TypeVar, Set, Tuple, Optional, Union,  # noqa: F401
+                    cast, Type, List, Callable, Dict)
 
 
 _T = TypeVar('_T')
 PartialOrder = Set[Tuple[_T, _T]]
 
 
+class Comparison(Enum):
+    """The outcome of comparing two terms under an ordering"""
+    GREATER = '>'
+    LESS = '<'
+    EQUAL = '='
+    INCOMPARABLE = '?'
+
+
+def compare_terms(order: Callable[[_T, _T], bool],
+                  s: _T, t: _T) -> Comparison:
+    """Compare :param:`s` and :param:`t` under :param:`order`.
+
+    Orderings with a ``compare(s, t)`` method (like those in this package)
+    are asked once. Other callables are asked whether s > t and t > s,
+    and a callable claiming both makes the terms incomparable."""
+    compare = getattr(order, 'compare', None)
+    if compare is not None:
+        return compare(s, t)
+    s_gt = order(s, t)
+    t_gt = order(t, s)
+    if s_gt and not t_gt:
+        return Comparison.GREATER
+    if t_gt and not s_gt:
+        return Comparison.LESS
+    if not s_gt and s == t:
+        return Comparison.EQUAL
+    return Comparison.INCOMPARABLE
+
+
 def transitive_closure(order: PartialOrder[_T]) -> PartialOrder[_T]:
     """Take a partial ordering and return its transitive closure
 
     :param ordering: The ordering to close
-    :returns: Transitive closure of :ref:`ordering`"""
-    while True:
-        new_relations = set((x, w) for x, y in order
-                            for q, w in order if q == y)
-        new_order = order | new_relations
-        if order == new_order:
-            return order
-        order = new_order
+    :returns: Transitive closure of :ref:`ordering`
+
+    See :cls:`knuth_bendix.precedence.Precedence` for a closure
+    that is faster to build and to look things up in."""
+    below = {}  # type: Dict[_T, Set[_T]]
+    for x, y in order:
+        below.setdefault(x, set()).add(y)
+        below.setdefault(y, set())
+    # Warshall's algorithm
+    for k in below:
+        for lesser in below.values():
+            if k in lesser:
+                lesser |= below[k]
+    return set((x, y) for x, lesser in below.items() for y in lesser)
 
 
 def substitute(term: Expression, substitution: Substitution) -> Expression:
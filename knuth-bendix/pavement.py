@@ -139,6 +139,14 @@ def run(args):
     raise SystemExit(main([CODE_DIRECTORY] + args))
 
 
+@task
+@consume_args
+def bench(args):
+    """Run the completion benchmarks. All arguments are passed to them."""
+    from knuth_bendix.benchmarks.__main__ import main
+    raise SystemExit(main(['bench'] + args))
+
+
 @task
 def commit():
     """Commit only if all the tests pass."""
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from knuth_bendix.ac_path_ordering import ACPathOrdering
+from knuth_bendix.budget import CompletionStatus
+from knuth_bendix.lex_path_ordering import LexPathOrdering
+from knuth_bendix.random_terms import RandomTerms
+from knuth_bendix.rewrite_system import RewriteSystem
+from knuth_bendix.utils import Comparison
+
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+import itertools
+import pytest
+
+x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+i = Operation.new('i', Arity.unary)
+e = Symbol('e')
+plus = Operation.new('+', Arity.polyadic, 'plus', infix=True,
+                     associative=True, commutative=True)
+neg = Operation.new('-', Arity.unary, 'neg')
+f = Operation.new('f', Arity.unary)
+zero = Symbol('0')
+a = Symbol('a')
+b = Symbol('b')
+order = ACPathOrdering({(f, neg), (neg, times), (times, plus),
+                        (i, plus), (plus, a), (a, b), (b, e), (e, zero)})
+
+
+@pytest.mark.parametrize("left,right", [
+    (plus(x, zero), x),
+    (plus(x, neg(x)), zero),
+    (plus(x, y, neg(y)), x),
+    (neg(neg(x)), x),
+    (neg(plus(x, y)), plus(neg(x), neg(y))),
+    (f(plus(x, y)), plus(f(x), f(y))),
+    (times(x, plus(y, z)), plus(times(x, y), times(x, z))),
+    (times(plus(x, y), z), plus(times(x, z), times(y, z))),
+    (plus(a, a), plus(a, b)),
+    (plus(a, b, zero), plus(a, b)),
+    (plus(x, x, a), plus(x, a)),
+])
+def test_ac_order(left, right):
+    assert order(left, right)
+    assert not order(right, left)
+
+
+@pytest.mark.parametrize("left,right", [
+    (plus(x, y), plus(y, x)),
+    (plus(x, plus(y, a)), plus(plus(a, x), y)),
+    (times(plus(b, a), x), times(plus(a, b), x)),
+])
+def test_equal_up_to_ac(left, right):
+    assert order.compare(left, right) == Comparison.EQUAL
+    assert not order(left, right)
+
+
+@pytest.mark.parametrize("left,right", [
+    (plus(x, a), plus(y, a)),
+    (plus(x, a), plus(x, x)),
+    (x, y),
+])
+def test_incomparable(left, right):
+    assert order.compare(left, right) == Comparison.INCOMPARABLE
+
+
+def test_matches_lpo_without_ac():
+    lpo = LexPathOrdering({(i, times), (times, e)})
+    rpo = ACPathOrdering(lpo.op_gt)
+    terms = RandomTerms([times, i, e], seed=0, variable_probability=0.4)
+    for _ in range(200):
+        s, t = terms.term(10), terms.term(8)
+        for left, right in [(s, t), (t, s), (s, terms.generalize(s, 0.3))]:
+            assert rpo.compare(left, right) == lpo.compare(left, right)
+
+
+def test_ordering_properties():
+    terms = RandomTerms([plus, neg, f, zero, a, b], seed=1,
+                        max_ac_operands=3)
+    ground = [terms.term(7, 4) for _ in range(25)]
+    greater = {(k, m) for (k, s), (m, t)
+               in itertools.product(enumerate(ground), repeat=2)
+               if order(s, t)}
+    for k, m in greater:
+        s, t = ground[k], ground[m]
+        assert (m, k) not in greater
+        assert all((k, n) in greater for m2, n in greater if m2 == m)
+        # Compatible with the term structure
+        assert order(plus(s, a), plus(t, a))
+        assert order(f(s), f(t))
+
+
+def test_abelian_group_completion():
+    order = ACPathOrdering({(neg, plus), (plus, zero)})
+    system = RewriteSystem.from_equations(
+        order, [(plus(x, zero), x), (plus(x, neg(x)), zero)])
+    assert system.complete(order) == CompletionStatus.COMPLETE
+    assert len(system.rules) == 5
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from knuth_bendix.benchmarks import (PROBLEMS, Problem, run_problem,
+                                     run_suite, compare, format_results,
+                                     random_problem, profiling_overhead,
+                                     format_overheads)
+from knuth_bendix.benchmarks.__main__ import main
+from knuth_bendix.lex_path_ordering import LexPathOrdering
+
+from matchpy import (Operation, Arity, make_dot_variable)
+import copy
+import json
+import pytest
+
+x, y = (make_dot_variable(t) for t in ['x', 'y'])
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+
+
+@pytest.mark.parametrize("name", ['group_kbo', 'group_lpo'])
+def test_run_problem(name):
+    result = run_problem(PROBLEMS[name], repeat=2)
+    assert result['problem'] == name
+    assert result['status'] == 'complete'
+    assert result['rules'] == 10
+    assert len(result['times']) == 2
+    assert result['seconds'] == min(result['times'])
+    assert result['peak_bytes'] > 0
+    assert result['stats']['pairs_oriented'] > 0
+
+
+def test_failed_problem():
+    commutes = Problem('commutes', "Can't be oriented",
+                       [(times(x, y), times(y, x))],
+                       LexPathOrdering(set()))
+    result = run_problem(commutes, memory=False)
+    assert result['status'] == 'error'
+    assert 'not orientable' in result['error']
+    assert 'error' in format_results({'results': [result]})
+
+
+def test_random_problem():
+    problem = random_problem(1)
+    assert problem.name == 'random_1'
+    assert len(problem.equations) == 3
+    assert all(problem.order(s, t) for s, t in problem.equations)
+    assert problem.equations == random_problem(1).equations
+    assert run_problem(problem, memory=False)['status'] in [
+        'complete', 'rule limit']
+
+
+def test_profiling_overhead():
+    result = profiling_overhead(PROBLEMS['linear_algebra_simple'], repeat=2)
+    assert result['problem'] == 'linear_algebra_simple'
+    assert result['seconds'] > 0
+    assert result['profiled_seconds'] > 0
+    assert result['overhead'] == pytest.approx(
+        result['profiled_seconds'] / result['seconds'] - 1)
+    assert 'linear_algebra_simple' in format_overheads([result])
+
+
+def test_compare():
+    results = run_suite([PROBLEMS['linear_algebra_simple']], memory=False,
+                        label='base')
+    assert json.loads(json.dumps(results)) == results
+    assert results['label'] == 'base'
+    assert compare(results, results) == []
+
+    slower = copy.deepcopy(results)
+    slower['results'][0]['seconds'] *= 1.5
+    assert len(compare(results, slower, threshold=0.1)) == 1
+    assert compare(results, slower, threshold=0.6) == []
+
+    different = copy.deepcopy(results)
+    different['results'][0]['status'] = 'rule limit'
+    assert 'rule limit' in compare(results, different)[0]
+
+    different['results'][0]['problem'] = 'other'
+    assert compare(results, different) == []
+
+
+def test_main(tmpdir, capsys):
+    output = str(tmpdir.join('results.json'))
+    argv = ['bench', '-r', '1', '--no-memory', 'linear_algebra_simple']
+    assert main(argv + ['-o', output]) == 0
+    with open(output) as f:
+        baseline = json.load(f)
+    assert [r['problem'] for r in baseline['results']] ==\
+        ['linear_algebra_simple']
+
+    baseline['results'][0]['seconds'] /= 100
+    with open(output, 'w') as f:
+        json.dump(baseline, f)
+    assert main(argv + ['-c', output]) == 1
+    assert 'Regression' in capsys.readouterr().out
+
+    assert main(['bench', '-r', '1', '--no-memory', '--random', '2']) == 0
+    out = capsys.readouterr().out
+    assert 'random_1' in out
+    assert 'group_kbo' not in out
+
+    assert main(['bench', '-r', '1', '--profile-overhead',
+                 'linear_algebra_simple']) == 0
+    assert 'Overhead' in capsys.readouterr().out
+
+    assert main(['bench', '--list']) == 0
+    assert 'group_kbo' in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        main(['bench', 'no_such_problem'])
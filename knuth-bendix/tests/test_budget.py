@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import pytest
+from knuth_bendix.budget import CompletionBudget, CompletionStatus
+from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
+from knuth_bendix.rewrite_system import RewriteSystem
+from knuth_bendix.selection import SizeSelection
+
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+
+x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+i = Operation.new('i', Arity.unary)
+e = Symbol('e')
+order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                            {(i, times), (times, e)})
+equations = [(times(times(x, y), z), times(x, times(y, z))),
+             (times(e, x), x),
+             (times(i(x), x), e)]
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+def test_checks():
+    budget = CompletionBudget(max_rules=5, max_pending=10, max_term_size=3)
+    assert budget.check(5, 10) is None
+    assert budget.check(6, 10) == CompletionStatus.RULE_LIMIT
+    assert budget.check(5, 11) == CompletionStatus.QUEUE_LIMIT
+    assert not budget.term_too_big(times(x, y))
+    assert budget.term_too_big(times(x, i(y)))
+
+
+def test_time_limit():
+    budget = CompletionBudget(max_seconds=2, clock=FakeClock())
+    budget.start()
+    assert budget.check(0, 0) is None
+    assert budget.check(0, 0) is None
+    assert budget.check(0, 0) == CompletionStatus.TIME_LIMIT
+
+
+def test_unlimited():
+    system = RewriteSystem.from_equations(order, equations)
+    assert (system.complete(order, budget=CompletionBudget())
+            == CompletionStatus.COMPLETE)
+    assert len(system.rules) == 10
+
+
+@pytest.mark.parametrize("budget,status", [
+    (CompletionBudget(max_seconds=5, clock=FakeClock()),
+     CompletionStatus.TIME_LIMIT),
+    (CompletionBudget(max_rules=5), CompletionStatus.RULE_LIMIT),
+    (CompletionBudget(max_pending=30), CompletionStatus.QUEUE_LIMIT),
+    (CompletionBudget(max_term_size=6), CompletionStatus.TERM_SIZE_LIMIT),
+])
+def test_stop_and_continue(budget, status):
+    system = RewriteSystem.from_equations(order, equations)
+    assert system.complete(order, budget=budget) == status
+    assert system.critical_pairs
+    # Still usable as it stands
+    assert system.normalize(times(e, times(e, x))) == x
+
+    assert system.complete(order) == CompletionStatus.COMPLETE
+    assert len(system.rules) == 10
+
+
+class RecordingSelection(SizeSelection):
+    def select(self, queue):
+        pair = super().select(queue)
+        self.last = pair, queue.last_parents
+        return pair
+
+
+@pytest.mark.parametrize("loop", ['standard', 'discount'])
+def test_oversized_pair_keeps_parents(loop):
+    system = RewriteSystem.from_equations(order, equations)
+    strategy = RecordingSelection()
+    assert (system.complete(order, strategy=strategy, loop=loop,
+                            budget=CompletionBudget(max_term_size=6))
+            == CompletionStatus.TERM_SIZE_LIMIT)
+    _, parents = strategy.last
+    assert parents is not None
+    assert list(system.critical_pairs.entries())[-1][1] == parents
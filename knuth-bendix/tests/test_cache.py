@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from knuth_bendix.cache import CompletionCache, cache_key
+from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
+from knuth_bendix.lex_path_ordering import LexPathOrdering
+from knuth_bendix.rewrite_system import RewriteSystem
+from knuth_bendix.selection import PickRatioSelection
+from knuth_bendix.unification import equal_mod_renaming
+
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+from concurrent.futures import ProcessPoolExecutor
+import os
+import pytest
+
+x, y, z, w = (make_dot_variable(t) for t in ['x', 'y', 'z', 'w'])
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+i = Operation.new('i', Arity.unary)
+e = Symbol('e')
+order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                            {(i, times), (times, e)})
+equations = [(times(times(x, y), z), times(x, times(y, z))),
+             (times(e, x), x),
+             (times(i(x), x), e)]
+
+
+def same_rules(system, other):
+    return (len(system.rules) == len(other.rules)
+            and all(any(equal_mod_renaming(r.left, s.left)
+                        and equal_mod_renaming(r.right, s.right)
+                        for s in other.rules)
+                    for r in system.rules))
+
+
+def test_key_ignores_presentation():
+    renamed = [(x, times(e, x)),
+               (times(i(w), w), e),
+               (times(times(y, z), x), times(y, times(z, x)))]
+    assert cache_key(renamed, order) == cache_key(equations, order)
+
+
+@pytest.mark.parametrize("other_order,options", [
+    (KnuthBendixOrdering({times: 0, i: 0, e: 2}, 1,
+                         {(i, times), (times, e)}), {}),
+    (LexPathOrdering({(i, times), (times, e)}), {}),
+    (order, {'loop': 'discount'}),
+    (order, {'strategy': PickRatioSelection(1, 2)}),
+])
+def test_key_sees_differences(other_order, options):
+    assert cache_key(equations, other_order, options) !=\
+        cache_key(equations, order)
+
+
+def test_key_skips_other_options():
+    assert (cache_key(equations, order, {'workers': 2})
+            == cache_key(equations, order))
+
+
+def test_key_needs_parameters():
+    with pytest.raises(TypeError):
+        cache_key(equations, lambda s, t: False)
+
+
+def test_hit(tmpdir, monkeypatch):
+    cache = CompletionCache(str(tmpdir))
+    first = cache.complete(order, equations)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Completed again")
+    monkeypatch.setattr(RewriteSystem, 'complete', fail)
+    second = cache.complete(order, equations)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert same_rules(first, second)
+    # The loaded rules use the caller's operations
+    assert second.normalize(times(i(e), times(e, e))) == e
+
+
+def test_corrupt_entry_is_a_miss(tmpdir):
+    cache = CompletionCache(str(tmpdir))
+    key = cache_key(equations, order)
+    path = cache._path(key)
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.write(b'not gzip')
+    assert cache.get(key) is None
+    cache.complete(order, equations)
+    assert cache.get(key) is not None
+
+
+def test_eviction(tmpdir):
+    cache = CompletionCache(str(tmpdir))
+    cache.complete(order, equations)
+    entry_size = cache.size()
+    cache.max_bytes = entry_size + entry_size // 2
+    key = cache_key(equations, order)
+    os.utime(cache._path(key), (1, 1))
+
+    cache.complete(order, equations, loop='discount')
+    assert cache.size() <= cache.max_bytes
+    assert cache.get(key) is None
+    assert cache.get(cache_key(equations, order,
+                               {'loop': 'discount'})) is not None
+
+
+def _complete_in(directory):
+    cache = CompletionCache(directory)
+    return len(cache.complete(order, equations).rules)
+
+
+def test_concurrent_use(tmpdir):
+    with ProcessPoolExecutor(3) as executor:
+        sizes = list(executor.map(_complete_in, [str(tmpdir)] * 6))
+    assert sizes == [10] * 6
+    assert len(CompletionCache(str(tmpdir))._entries()) == 1
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import pytest
+from knuth_bendix.checkpoint import (Checkpointer, read_checkpoint,
+                                     write_checkpoint)
+from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
+from knuth_bendix.rewrite_system import RewriteSystem
+from knuth_bendix.selection import SizeSelection
+from knuth_bendix.spill import SpillingCriticalPairQueue
+from knuth_bendix.unification import equal_mod_renaming
+
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+import gzip
+import os
+
+x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+i = Operation.new('i', Arity.unary)
+e = Symbol('e')
+order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                            {(i, times), (times, e)})
+equations = [(times(times(x, y), z), times(x, times(y, z))),
+             (times(e, x), x),
+             (times(i(x), x), e)]
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class InterruptingSelection(SizeSelection):
+    """Pretend the user hit Ctrl-C after a few pairs"""
+    def __init__(self, picks):
+        self.picks = picks
+
+    def next_key(self):
+        if self.picks == 0:
+            raise KeyboardInterrupt()
+        self.picks -= 1
+        return super().next_key()
+
+
+def same_rules(system1, system2):
+    return (len(system1.rules) == len(system2.rules)
+            and all(any(equal_mod_renaming(r.left, s.left)
+                        and equal_mod_renaming(r.right, s.right)
+                        for s in system2.rules)
+                    for r in system1.rules))
+
+
+def test_write_is_atomic(tmpdir):
+    path = str(tmpdir.join('state.ckpt'))
+    write_checkpoint(path, {'a': 1})
+    write_checkpoint(path, {'a': 2})
+    assert read_checkpoint(path)['a'] == 2
+    assert os.listdir(str(tmpdir)) == ['state.ckpt']
+
+
+def test_write_iterators(tmpdir):
+    path = str(tmpdir.join('state.ckpt'))
+    write_checkpoint(path, {'a': iter([[1, 2], 'x']), 'b': iter([]),
+                            'c': [3]})
+    state = read_checkpoint(path)
+    assert state['a'] == [[1, 2], 'x']
+    assert state['b'] == []
+    assert state['c'] == [3]
+
+
+def test_bad_format(tmpdir):
+    path = str(tmpdir.join('state.ckpt'))
+    with gzip.open(path, 'wt') as f:
+        f.write('{"format": 0}')
+    with pytest.raises(ValueError):
+        read_checkpoint(path)
+
+
+def test_checkpoint_schedule(tmpdir):
+    clock = FakeClock()
+    checkpointer = Checkpointer(str(tmpdir.join('c')), interval=10,
+                                max_overhead=0.1, clock=clock)
+    assert not checkpointer.due()
+    clock.now = 10
+    assert checkpointer.due()
+
+    def slow_state():
+        clock.now += 2
+        return {}
+    checkpointer.write(slow_state)
+    assert checkpointer.writes == 1
+    # The write took 2 seconds, so the next one waits 20, not 10
+    clock.now += 15
+    assert not checkpointer.due()
+    clock.now += 5
+    assert checkpointer.due()
+
+
+def test_state_round_trip():
+    system = RewriteSystem.from_equations(order, equations)
+    system._add_critical_pairs_with(system.rules[0])
+    loaded = RewriteSystem.from_checkpoint_state(system.checkpoint_state(),
+                                                 {'*': times, 'i': i})
+    assert same_rules(system, loaded)
+    assert loaded.critical_pairs.pairs() == system.critical_pairs.pairs()
+    assert ([parents for _, parents in loaded.critical_pairs.entries()]
+            == [parents for _, parents in system.critical_pairs.entries()])
+    assert ([loaded.rule_id(r) for r in loaded.rules]
+            == [system.rule_id(r) for r in system.rules])
+    assert not loaded.pairs_generated
+
+
+def test_spilled_round_trip(tmpdir):
+    path = str(tmpdir.join('spilled.ckpt'))
+    system = RewriteSystem.from_equations(order, equations)
+    system.critical_pairs = SpillingCriticalPairQueue(4, order.weight)
+    for rule in list(system.rules):
+        system._add_critical_pairs_with(rule)
+    assert system.critical_pairs.spills > 0
+    write_checkpoint(path, system.checkpoint_state())
+    loaded = RewriteSystem.from_checkpoint_state(read_checkpoint(path),
+                                                 {'*': times, 'i': i})
+    assert same_rules(system, loaded)
+    assert loaded.critical_pairs.entries() ==\
+        list(system.critical_pairs.entries())
+
+
+def test_resume_after_interrupt(tmpdir):
+    path = str(tmpdir.join('groups.ckpt'))
+    system = RewriteSystem.from_equations(order, equations)
+    with pytest.raises(KeyboardInterrupt):
+        system.complete(order, InterruptingSelection(8),
+                        Checkpointer(path, interval=0))
+    assert read_checkpoint(path)['pairs_generated']
+
+    resumed = RewriteSystem.resume(path, order)
+
+    expected = RewriteSystem.from_equations(order, equations)
+    expected.complete(order)
+    assert same_rules(resumed, expected)
+
+
+plus = Operation.new('+', Arity.binary, 'plus', infix=True)
+zero = Symbol('0')
+a = Symbol('a')
+b = Symbol('b')
+plus_order = KnuthBendixOrdering({plus: 0, zero: 1, a: 1, b: 1}, 1,
+                                 {(plus, b), (b, a), (a, zero)})
+
+
+@pytest.mark.parametrize("equations", [
+    [(plus(x, y), plus(y, x)), (plus(x, zero), x)],
+    # Unfailing, but with no equation kept yet
+    [(plus(x, zero), x)],
+])
+def test_unfailing_round_trip(equations):
+    system = RewriteSystem.from_equations(plus_order, equations,
+                                          unfailing=True)
+    loaded = RewriteSystem.from_checkpoint_state(system.checkpoint_state(),
+                                                 {'+': plus})
+    assert loaded.unfailing
+    assert loaded.equations == system.equations
+
+
+def test_resume_unfailing(tmpdir):
+    path = str(tmpdir.join('plus.ckpt'))
+    equations = [(plus(x, y), plus(y, x)), (plus(x, zero), x)]
+    system = RewriteSystem.from_equations(plus_order, equations,
+                                          unfailing=True)
+    with pytest.raises(KeyboardInterrupt):
+        system.complete(plus_order, InterruptingSelection(1),
+                        Checkpointer(path, interval=0))
+
+    # Without unfailing=True, the commuted pairs are kept as equations
+    # rather than failing to orient
+    resumed = RewriteSystem.resume(path, plus_order)
+
+    expected = RewriteSystem.from_equations(plus_order, equations,
+                                            unfailing=True)
+    expected.complete(plus_order)
+    assert same_rules(resumed, expected)
+    assert len(resumed.equations) == len(expected.equations) == 1
+    assert resumed.normalize(plus(b, a)) == resumed.normalize(plus(a, b))
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import pytest
+from knuth_bendix.ac_path_ordering import ACPathOrdering
+from knuth_bendix.driver import (ProblemSettings, parse_precedence,
+                                 parse_weights, solve, format_record,
+                                 run_batch, completed)
+from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
+from knuth_bendix.lex_path_ordering import LexPathOrdering
+from knuth_bendix.serialization import TermDecoder
+from knuth_bendix.tptp import TptpReader
+import io
+import json
+
+GROUP = """
+tff(m_type, type, m: (term * term) > term).
+tff(i_type, type, i: term > term).
+tff(e_type, type, e: term).
+tff(assoc, axiom, ! [X: term, Y: term, Z: term] :
+    m(m(X, Y), Z) = m(X, m(Y, Z))).
+tff(left_id, axiom, ! [X: term] : m(e, X) = X).
+tff(left_inv, axiom, ! [X: term] : m(i(X), X) = e).
+"""
+
+ABELIAN = """
+fof(comm, axiom, plus(X, Y) = plus(Y, X)).
+fof(zero, axiom, plus(X, zero) = X).
+fof(neg, axiom, plus(X, neg(X)) = zero).
+"""
+
+DIVERGES = "fof(a, axiom, f(g(f(X))) = g(f(g(X)))).\n"
+
+
+def write(tmpdir, name, text):
+    path = tmpdir.join(name)
+    path.write(text)
+    return str(path)
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("i > m > e", [('i', 'm'), ('m', 'e')]),
+    ("f>g, a > b", [('f', 'g'), ('a', 'b')]),
+    ("f", []),
+])
+def test_parse_precedence(text, expected):
+    assert parse_precedence(text) == expected
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("m=0, i=0", {'m': 0, 'i': 0}),
+    ("e = 2", {'e': 2}),
+])
+def test_parse_weights(text, expected):
+    assert parse_weights(text) == expected
+
+
+@pytest.mark.parametrize("parse,text", [
+    (parse_precedence, "f > > g"),
+    (parse_weights, "m"),
+    (parse_weights, "m=x"),
+    (parse_weights, "=1"),
+])
+def test_parse_errors(parse, text):
+    with pytest.raises(ValueError):
+        parse(text)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {'order': 'rpo'},
+    {'strategy': 'best'},
+    {'order': 'acrpo'},
+    {'order': 'lpo', 'weights': {'m': 0}},
+    {'order': 'acrpo', 'weights': {'m': 0}, 'precedence': []},
+])
+def test_bad_settings(kwargs):
+    with pytest.raises(ValueError):
+        ProblemSettings(**kwargs)
+
+
+@pytest.mark.parametrize("kwargs,kind", [
+    ({}, KnuthBendixOrdering),
+    ({'weights': {'m': 0}}, KnuthBendixOrdering),
+    ({'order': 'lpo'}, LexPathOrdering),
+    ({'order': 'lpo', 'precedence': [('i', 'm')]}, LexPathOrdering),
+    ({'order': 'acrpo', 'precedence': [('i', 'm'), ('m', 'e')]},
+     ACPathOrdering),
+])
+def test_ordering(kwargs, kind):
+    reader = TptpReader()
+    equations = reader.read(io.StringIO(GROUP))
+    order = ProblemSettings(**kwargs).ordering(equations, reader.operators)
+    assert isinstance(order, kind)
+
+
+def test_ordering_unknown_operator():
+    reader = TptpReader()
+    equations = reader.read(io.StringIO(GROUP))
+    settings = ProblemSettings(precedence=[('f', 'm')])
+    with pytest.raises(ValueError):
+        settings.ordering(equations, reader.operators)
+
+
+def test_solve(tmpdir):
+    path = write(tmpdir, 'group.p', GROUP)
+    settings = ProblemSettings(weights={'m': 0, 'i': 0},
+                               precedence=[('i', 'm'), ('m', 'e')])
+    record = solve(path, settings)
+    assert completed(record)
+    assert record['problem'] == path
+    assert len(record['rules']) == 10
+    assert record['equations'] == []
+    # Records survive being written out
+    record = json.loads(json.dumps(record))
+    decoder = TermDecoder(record['operations'])
+    assert 'i(e)' in [str(decoder.decode(left))
+                      for left, _ in record['rules']]
+    text = format_record(record)
+    assert text.startswith(path + ': complete')
+    assert 'i(e) -> e' in text
+
+
+def test_solve_ac(tmpdir):
+    path = write(tmpdir, 'abelian.p', ABELIAN)
+    settings = ProblemSettings(order='acrpo', ac=['plus'],
+                               precedence=[('neg', 'plus'),
+                                           ('plus', 'zero')])
+    record = solve(path, settings)
+    assert completed(record)
+
+
+def test_solve_ac_stats(tmpdir):
+    path = write(tmpdir, 'abelian.p', ABELIAN)
+    settings = ProblemSettings(order='acrpo', ac=['plus'],
+                               precedence=[('neg', 'plus'),
+                                           ('plus', 'zero')],
+                               profile=True)
+    record = json.loads(json.dumps(solve(path, settings)))
+    assert record['stats']['ac_unifications'] > 0
+    text = format_record(record)
+    assert 'AC unifiers per problem' in text
+    assert 'Pairs oriented' in text
+
+
+def test_solve_budget(tmpdir):
+    path = write(tmpdir, 'diverges.p', DIVERGES)
+    record = solve(path, ProblemSettings(order='lpo',
+                                         precedence=[('f', 'g')],
+                                         max_rules=5, profile=True))
+    assert record['status'] == 'rule limit'
+    assert 'stats' in record
+    assert 'Statistics:' in format_record(record)
+
+
+@pytest.mark.parametrize("text", [
+    "fof(a, axiom, f(X) = f(X, X)).",
+    "fof(a, axiom, f(X, Y) = f(Y, X)).",
+])
+def test_solve_error(tmpdir, text):
+    path = write(tmpdir, 'bad.p', text)
+    record = solve(path, ProblemSettings(order='lpo'))
+    assert record['status'] == 'error'
+    assert not completed(record)
+    assert 'Error: ' in format_record(record)
+
+
+def test_solve_missing_file(tmpdir):
+    record = solve(str(tmpdir.join('missing.p')), ProblemSettings())
+    assert record['status'] == 'error'
+
+
+def test_run_batch(tmpdir):
+    paths = [write(tmpdir, 'group.p', GROUP),
+             write(tmpdir, 'bad.p', "fof(a, axiom, f(X) = f(X, X))."),
+             write(tmpdir, 'diverges.p', DIVERGES)]
+    settings = ProblemSettings(order='lpo', max_rules=200)
+    records = list(run_batch(paths, settings, jobs=2, timeout=1.0))
+    statuses = {r['problem']: r['status'] for r in records}
+    assert statuses == {paths[0]: 'complete', paths[1]: 'error',
+                        paths[2]: 'timeout'}
+    # The quick problems are reported before the one that times out
+    assert records[-1]['problem'] == paths[2]
+
+
+def test_run_batch_jobs():
+    with pytest.raises(ValueError):
+        list(run_batch([], ProblemSettings(), jobs=0))
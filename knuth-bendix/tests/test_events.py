@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from knuth_bendix.events import Event, EventBus, JsonLinesSink, TextSink
+from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
+from knuth_bendix.rewrite_rule import RewriteRule
+from knuth_bendix.rewrite_system import RewriteSystem
+from knuth_bendix import unification
+
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+import io
+import json
+import pytest
+
+x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+plus = Operation.new('+', Arity.polyadic, 'plus', infix=True,
+                     associative=True, commutative=True)
+i = Operation.new('i', Arity.unary)
+e = Symbol('e')
+order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                            {(i, times), (times, e)})
+equations = [(times(times(x, y), z), times(x, times(y, z))),
+             (times(e, x), x),
+             (times(i(x), x), e)]
+
+
+def record(bus, events=None):
+    seen = []
+    bus.subscribe(lambda event, payload: seen.append((event, payload)),
+                  events)
+    return seen
+
+
+def test_no_observers_builds_no_payload():
+    def payload():
+        raise AssertionError("Payload built with no observers")
+    bus = EventBus()
+    bus.emit(Event.RULE_ADDED, payload)
+    record(bus, [Event.RULE_DELETED])
+    bus.emit(Event.RULE_ADDED, payload)
+
+
+def test_unsubscribe():
+    bus = EventBus()
+    seen = []
+
+    def observer(event, payload):
+        seen.append(event)
+    bus.subscribe(observer)
+    bus.subscribe(observer, [Event.RULE_ADDED])
+    bus.emit(Event.RULE_ADDED, dict)
+    assert seen == [Event.RULE_ADDED, Event.RULE_ADDED]
+    bus.unsubscribe(observer)
+    assert not bus.wants(Event.RULE_ADDED)
+    bus.emit(Event.RULE_ADDED, dict)
+    assert len(seen) == 2
+
+
+@pytest.mark.parametrize("loop", ['standard', 'discount'])
+def test_completion_events(loop):
+    system = RewriteSystem.from_equations(order, equations)
+    seen = record(system.events)
+    system.complete(order, loop=loop)
+    kinds = [event for event, _ in seen]
+    assert kinds[-1] == Event.COMPLETION_FINISHED
+    assert seen[-1][1] == {'status': 'complete', 'rules': 10}
+    assert Event.PAIR_SELECTED in kinds
+    assert Event.PAIR_JOINED in kinds
+    assert Event.RULE_DELETED in kinds or Event.RULE_SIMPLIFIED in kinds
+    # Rules found by the completion were announced under their ids
+    added = {payload['id']: payload['rule'] for event, payload in seen
+             if event == Event.RULE_ADDED}
+    added.update((payload['new_id'], payload['new_rule'])
+                 for event, payload in seen
+                 if event == Event.RULE_SIMPLIFIED)
+    found = [r for r in system.rules
+             if system.rule_id(r) >= len(equations)]
+    assert found
+    for r in found:
+        assert added[system.rule_id(r)] == str(r)
+
+
+def test_rule_events_carry_ids():
+    system = RewriteSystem()
+    seen = record(system.events)
+    rule_id = system.append_rule(
+        RewriteRule(plus(x, i(x)), e), generation=2)
+    system.delete_rule(rule_id, 'test')
+    assert [event for event, _ in seen] == [
+        Event.RULE_ADDED, Event.EXTENSION_CREATED,
+        Event.RULE_DELETED, Event.RULE_DELETED]
+    assert seen[0][1]['generation'] == 2
+    assert seen[1][1]['parent'] == rule_id
+    assert {payload['id'] for _, payload in seen[2:]} == {
+        rule_id, seen[1][1]['id']}
+    assert all(payload['reason'] == 'test' for _, payload in seen[2:])
+
+
+def test_unification_events():
+    seen = record(unification.events)
+    try:
+        list(unification.unify_expressions(plus(x, x), plus(y, e, e)))
+    finally:
+        unification.events.observers.clear()
+    assert Event.REDUNDANT_AC_SOLUTIONS in [event for event, _ in seen]
+
+
+def test_json_lines_sink():
+    out = io.StringIO()
+    system = RewriteSystem.from_equations(order, equations)
+    with JsonLinesSink(out) as sink:
+        system.events.subscribe(sink)
+        system.complete(order)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert records[-1] == {'event': 'completion finished',
+                           'status': 'complete', 'rules': 10}
+    assert any(r['event'] == 'rule added' for r in records)
+
+
+def test_json_lines_sink_to_path(tmpdir):
+    path = str(tmpdir.join('events.jsonl'))
+    with JsonLinesSink(path) as sink:
+        sink(Event.PAIR_SELECTED, {'left': 'x', 'right': 'y',
+                                   'parents': (1, 2)})
+    with open(path) as f:
+        assert json.loads(f.read()) == {'event': 'pair selected',
+                                        'left': 'x', 'right': 'y',
+                                        'parents': [1, 2]}
+
+
+def test_text_sink():
+    out = io.StringIO()
+    TextSink(out)(Event.RULE_ADDED, {'id': 3, 'rule': 'e -> e'})
+    assert out.getvalue() == "Rule added: id=3, rule=e -> e\n"
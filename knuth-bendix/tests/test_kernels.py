@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from knuth_bendix.benchmarks.kernels import (KERNELS, Kernel, sweep,
+                                             format_sweep, time_call, main)
+
+import json
+import pytest
+
+
+@pytest.mark.parametrize("name", list(KERNELS))
+def test_kernel_runs(name):
+    kernel = KERNELS[name]
+    rows = sweep(kernel, kernel.sizes[:2], min_time=0)
+    assert [row['size'] for row in rows] == list(kernel.sizes[:2])
+    assert rows[0]['ratio'] is None
+    assert rows[1]['ratio'] == rows[1]['seconds'] / rows[0]['seconds']
+    assert name in format_sweep(kernel, rows)
+
+
+def test_outputs():
+    rows = sweep(KERNELS['unify_syntactic'], [2], min_time=0)
+    assert rows[0]['output'] == 1
+    rows = sweep(KERNELS['apply_all_terms'], [2], min_time=0)
+    # i(a0 * a1) normalizes to i(a1) * i(a0)
+    assert rows[0]['output'] == 5
+    rows = sweep(KERNELS['kbo'], [2], min_time=0)
+    assert rows[0]['output'] is None
+
+
+def test_time_call_repeats():
+    calls = []
+    seconds, result = time_call(lambda: calls.append(1) or len(calls),
+                                min_time=0.01)
+    assert len(calls) > 1
+    assert result == len(calls)
+    assert 0 < seconds < 0.01
+
+
+def test_sweep_stops_at_max_time():
+    kernel = Kernel('slow', "Slow", lambda n: lambda: sum(range(n)),
+                    [10, 20, 30])
+    rows = sweep(kernel, min_time=0, max_time=0)
+    assert len(rows) == 1
+
+
+def test_main(tmpdir, capsys):
+    output = str(tmpdir.join('kernels.json'))
+    assert main(['kernels', '-s', '2,3', '--min-time', '0',
+                 '-o', output, 'kbo', 'lpo']) == 0
+    with open(output) as f:
+        results = json.load(f)
+    assert list(results) == ['kbo', 'lpo']
+    assert [row['size'] for row in results['lpo']] == [2, 3]
+    assert 'LexPathOrdering' in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        main(['kernels', 'no_such_kernel'])
@@ -15,7 +15,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import pytest
-from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
+from knuth_bendix.knuth_bendix_ordering import (KnuthBendixOrdering,
+                                                WEIGHT_CACHE_SIZE)
+from knuth_bendix.random_terms import RandomTerms
+from knuth_bendix.utils import (operands, to_operator, Comparison,
+                                compare_terms)
 from matchpy import (Operation, Arity, make_dot_variable, Symbol)
 
 x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
@@ -41,3 +45,103 @@ order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
 def test_knuth_bendix_order(left, right):
     assert order(left, right)
     assert not order(right, left)
+
+
+def textbook(s, t):
+    """The ordering as it is usually defined, to check against"""
+    if not s.variables >= t.variables or s == t:
+        return False
+    w_s, w_t = order.weight(s), order.weight(t)
+    if w_s != w_t:
+        return w_s > w_t
+    s_head, t_head = to_operator(s), to_operator(t)
+    if s_head is None:
+        return False
+    if t_head is None:
+        # Only f(f(... f(t))) for some unary f of weight 0
+        return True
+    if s_head != t_head:
+        return (s_head, t_head) in order.op_gt
+    for s_i, t_i in zip(operands(s), operands(t)):
+        if s_i != t_i:
+            return textbook(s_i, t_i)
+    return False
+
+
+def test_matches_definition():
+    terms = RandomTerms([times, i, e], seed=0, variable_probability=0.4)
+    for _ in range(500):
+        s, t = terms.term(12), terms.term(8)
+        for left, right in [(s, t), (t, s), (s, terms.generalize(s, 0.3))]:
+            assert order(left, right) == textbook(left, right)
+
+
+def test_deep_terms():
+    leaves = [make_dot_variable('x{}'.format(k)) for k in range(300)]
+    left = leaves[0]
+    for leaf in leaves[1:]:
+        left = times(left, leaf)
+    right = leaves[-1]
+    for leaf in reversed(leaves[:-1]):
+        right = times(leaf, right)
+    assert order(left, right)
+    assert not order(right, left)
+
+
+def test_weight_cache():
+    term = times(i(x), times(e, y))
+    assert order.weight(term) == 3
+    assert order._weights[id(term)] == (term, 3)
+    for _ in range(WEIGHT_CACHE_SIZE):
+        order.weight(i(e))
+    assert id(term) not in order._weights
+    assert order.weight(term) == 3
+
+
+@pytest.mark.parametrize("left,right,expected", [
+    (times(x, e), x, Comparison.GREATER),
+    (x, times(x, e), Comparison.LESS),
+    (times(i(x), y), times(i(x), y), Comparison.EQUAL),
+    (times(x, y), times(y, x), Comparison.INCOMPARABLE),
+    (x, y, Comparison.INCOMPARABLE),
+])
+def test_compare(left, right, expected):
+    assert order.compare(left, right) == expected
+
+
+def test_compare_agrees():
+    terms = RandomTerms([times, i, e], seed=1, variable_probability=0.4)
+    for _ in range(200):
+        s, t = terms.term(10), terms.term(8)
+        for left, right in [(s, t), (s, terms.generalize(s, 0.3)), (s, s)]:
+            expected = compare_terms(lambda a, b: order(a, b), left, right)
+            assert order.compare(left, right) == expected
+
+
+def test_compare_many():
+    terms = RandomTerms([times, i, e], seed=2, variable_probability=0.4)
+    pairs = []
+    for _ in range(300):
+        s, t = terms.term(10), terms.term(8)
+        pairs += [(s, t), (t, s), (s, terms.generalize(s, 0.3)), (s, s)]
+    assert order.compare_many(pairs) == [order.compare(s, t)
+                                         for s, t in pairs]
+    assert order.compare_many([]) == []
+
+
+def test_compare_many_only_compares_ties(monkeypatch):
+    compared = []
+
+    def compare(self, s, t):
+        compared.append((s, t))
+        return Comparison.INCOMPARABLE
+    monkeypatch.setattr(KnuthBendixOrdering, 'compare', compare)
+    pairs = [(times(x, e), x),
+             (times(x, y), times(y, x)),
+             (times(x, e), y),
+             (i(x), times(x, x))]
+    assert order.compare_many(pairs) == [Comparison.GREATER,
+                                         Comparison.INCOMPARABLE,
+                                         Comparison.INCOMPARABLE,
+                                         Comparison.LESS]
+    assert compared == [pairs[1]]
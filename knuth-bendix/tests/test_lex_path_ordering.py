@@ -16,7 +16,11 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import pytest
 from knuth_bendix.lex_path_ordering import LexPathOrdering
-from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+from knuth_bendix.random_terms import RandomTerms
+from knuth_bendix.utils import (operands, to_operator, Comparison,
+                                compare_terms)
+from matchpy import (Operation, Arity, make_dot_variable, Symbol,
+                     get_variables)
 
 x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
 times = Operation.new('*', Arity.binary, 'times', infix=True)
@@ -40,3 +44,97 @@ order = LexPathOrdering({(i, times), (times, e)})
 def test_knuth_bendix_order(left, right):
     assert order(left, right)
     assert not order(right, left)
+
+
+@pytest.mark.parametrize("left,right", [
+    (e, x),
+    (i(e), x),
+    (times(x, e), y),
+])
+def test_unrelated_variable(left, right):
+    assert not order(left, right)
+    assert not order(right, left)
+
+
+def unmemoized(s, t):
+    """The ordering as a plain recursive definition, to check against"""
+    s_head, t_head = to_operator(s), to_operator(t)
+    if s_head is None:
+        return False
+    if t_head is None:
+        return t.variable_name in get_variables(s)
+    if any(unmemoized(a, t) or a == t for a in operands(s)):
+        return True
+    if ((s_head, t_head) in order.op_gt
+            and all(unmemoized(s, a) for a in operands(t))):
+        return True
+    if s_head == t_head:
+        for s_i, t_i in zip(operands(s), operands(t)):
+            if unmemoized(s_i, t_i):
+                return all(unmemoized(s, a) for a in operands(t)[1:])
+            if s_i != t_i:
+                return False
+        return (len(operands(s)) > len(operands(t))
+                and all(unmemoized(s, a) for a in operands(t)[1:]))
+    return False
+
+
+def test_matches_definition():
+    terms = RandomTerms([times, i, e], seed=0, variable_probability=0.4)
+    cached = LexPathOrdering(order.op_gt, cache_size=50)
+    for _ in range(200):
+        s, t = terms.term(12), terms.term(8)
+        assert order(s, t) == unmemoized(s, t)
+        assert order(t, s) == unmemoized(t, s)
+        assert cached(s, t) == order(s, t)
+
+
+def comb(leaves, left):
+    if left:
+        term = leaves[0]
+        for leaf in leaves[1:]:
+            term = times(term, leaf)
+    else:
+        term = leaves[-1]
+        for leaf in reversed(leaves[:-1]):
+            term = times(leaf, term)
+    return term
+
+
+def test_deep_terms():
+    # Exponential without memoization
+    leaves = [make_dot_variable('x{}'.format(k)) for k in range(60)]
+    assert order(comb(leaves, True), comb(leaves, False))
+    assert not order(comb(leaves, False), comb(leaves, True))
+
+
+def test_cache():
+    cached = LexPathOrdering(order.op_gt, cache_size=2)
+    pairs = [(times(x, e), x), (i(e), e), (i(i(x)), x)]
+    for s, t in pairs + pairs[2:]:
+        assert cached(s, t)
+    assert (cached.hits, cached.misses) == (1, 3)
+    assert len(cached.cache) == 2
+    # The first pair was dropped to make room
+    assert cached(*pairs[0])
+    assert (cached.hits, cached.misses) == (1, 4)
+
+
+@pytest.mark.parametrize("left,right,expected", [
+    (times(x, e), x, Comparison.GREATER),
+    (x, times(x, e), Comparison.LESS),
+    (times(i(x), y), times(i(x), y), Comparison.EQUAL),
+    (times(x, y), times(y, x), Comparison.INCOMPARABLE),
+    (x, y, Comparison.INCOMPARABLE),
+])
+def test_compare(left, right, expected):
+    assert order.compare(left, right) == expected
+
+
+def test_compare_agrees():
+    terms = RandomTerms([times, i, e], seed=1, variable_probability=0.4)
+    for _ in range(200):
+        s, t = terms.term(10), terms.term(8)
+        for left, right in [(s, t), (s, terms.generalize(s, 0.3)), (s, s)]:
+            expected = compare_terms(lambda a, b: order(a, b), left, right)
+            assert order.compare(left, right) == expected
@@ -6,6 +6,7 @@ from pytest import raises
 #     from pytest.mark import parametrize
 #
 import pytest
+import json
 from knuth_bendix.main import main
 
 parametrize = pytest.mark.parametrize
@@ -34,3 +35,65 @@ class TestMain(object):
         # Should print out version.
         # Should exit with zero return code.
         assert exc_info.value.code == 0
+
+    @pytest.fixture
+    def group(self, tmpdir):
+        path = tmpdir.join('group.p')
+        path.write("fof(assoc, axiom, m(m(X, Y), Z) = m(X, m(Y, Z))).\n"
+                   "fof(left_id, axiom, m(e, X) = X).\n"
+                   "fof(left_inv, axiom, m(i(X), X) = e).\n")
+        return str(path)
+
+    def test_text(self, group, capsys):
+        assert main(['progname', group, '--weights', 'm=0, i=0',
+                     '--precedence', 'i > m > e']) == 0
+        out, err = capsys.readouterr()
+        assert out.startswith(group + ': complete')
+        assert 'i(e) -> e' in out
+
+    def test_json(self, group, capsys):
+        assert main(['progname', group, '--order', 'lpo',
+                     '--format', 'json', '--stats']) == 0
+        out, err = capsys.readouterr()
+        record = json.loads(out)
+        assert record['status'] == 'complete'
+        assert len(record['rules']) == 10
+        assert 'stats' in record
+
+    def test_events(self, group, tmpdir, capsys):
+        events = str(tmpdir.join('events.jsonl'))
+        assert main(['progname', group, '--order', 'lpo', '-v',
+                     '--events', events]) == 0
+        out, err = capsys.readouterr()
+        assert 'Rule added' in out
+        with open(events) as f:
+            assert f.readline()
+
+    def test_limit(self, group, capsys):
+        assert main(['progname', group, '--order', 'lpo',
+                     '--max-rules', '3']) == 1
+        out, err = capsys.readouterr()
+        assert 'rule limit' in out
+
+    def test_batch(self, group, tmpdir, capsys):
+        missing = str(tmpdir.join('missing.p'))
+        assert main(['progname', group, missing, '--order', 'lpo',
+                     '--format', 'json', '--timeout', '60']) == 1
+        out, err = capsys.readouterr()
+        records = [json.loads(line) for line in out.splitlines()]
+        assert {r['problem']: r['status'] for r in records} ==\
+            {group: 'complete', missing: 'error'}
+
+    @parametrize('args', [
+        ['--weights', 'm'],
+        ['--precedence', 'i > > m'],
+        ['--order', 'rpo'],
+        ['--order', 'acrpo'],
+        ['--order', 'lpo', '--weights', 'm=0'],
+        ['--jobs', '0'],
+        ['--timeout', '5', '-v'],
+    ])
+    def test_bad_arguments(self, group, args, capsys):
+        with raises(SystemExit) as exc_info:
+            main(['progname', group] + args)
+        assert exc_info.value.code == 2
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import pytest
+from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
+from knuth_bendix.parallel import OverlapPool
+from knuth_bendix.rewrite_rule import RewriteRule
+from knuth_bendix.rewrite_system import (RewriteSystem,
+                                         critical_pairs_between)
+
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+
+x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+plus = Operation.new('+', Arity.polyadic, 'plus', infix=True,
+                     associative=True, commutative=True)
+i = Operation.new('i', Arity.unary)
+e = Symbol('e')
+order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                            {(i, times), (times, e)})
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with OverlapPool(2, min_rules=1) as p:
+        yield p
+
+
+def sequential_pairs(system, rule):
+    return [critical_pairs_between(rule, system.partner(rule),
+                                   other, system.partner(other))
+            for other in system.rules]
+
+
+@pytest.mark.parametrize("rules", [
+    [RewriteRule(times(times(x, y), z), times(x, times(y, z))),
+     RewriteRule(times(e, x), x),
+     RewriteRule(times(i(x), x), e)],
+    [RewriteRule(plus(x, i(x)), e),
+     RewriteRule(plus(x, e), x),
+     RewriteRule(i(i(x)), x)],
+])
+def test_same_pairs_as_sequential(pool, rules):
+    system = RewriteSystem(rules)
+    for rule in system.rules:
+        assert (pool.critical_pairs(rule, system.rules, system.partner)
+                == sequential_pairs(system, rule))
+
+
+@pytest.mark.parametrize("rules", [
+    [RewriteRule(times(times(x, y), z), times(x, times(y, z))),
+     RewriteRule(times(e, x), x),
+     RewriteRule(times(i(x), x), e)],
+    [RewriteRule(plus(x, i(x)), e),
+     RewriteRule(plus(x, e), x),
+     RewriteRule(i(i(x)), x)],
+])
+def test_system_matcher(rules):
+    system = RewriteSystem(rules)
+    # Match with the whole system first, to fill the matcher's caches
+    for rule in system.rules:
+        system.normalize(rule.left)
+    for rule in system.rules:
+        assert ([critical_pairs_between(rule, system.partner(rule),
+                                        other, system.partner(other),
+                                        [system.rules])
+                 for other in system.rules]
+                == sequential_pairs(system, rule))
+
+
+def test_parallel_completion():
+    equations = [(times(times(x, y), z), times(x, times(y, z))),
+                 (times(e, x), x),
+                 (times(i(x), x), e)]
+    sequential = RewriteSystem.from_equations(order, equations)
+    sequential.complete(order)
+    parallel = RewriteSystem.from_equations(order, equations)
+    parallel.complete(order, workers=2)
+    assert ([(r.left, r.right) for r in sequential.rules]
+            == [(r.left, r.right) for r in parallel.rules])
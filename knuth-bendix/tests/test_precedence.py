@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from knuth_bendix.precedence import Precedence, as_precedence
+from knuth_bendix.utils import transitive_closure
+from matchpy import (Operation, Arity, Symbol)
+import random
+import time
+import pytest
+
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+i = Operation.new('i', Arity.unary)
+e = Symbol('e')
+a = Symbol('a')
+
+
+def test_closure():
+    prec = Precedence({(i, times), (times, e)})
+    assert prec.greater(i, e)
+    assert not prec.greater(e, i)
+    assert not prec.greater(i, i)
+    assert (i, e) in prec
+    assert set(prec) == {(i, times), (times, e), (i, e)}
+    assert len(prec) == 3
+    assert prec.cyclic() == []
+
+
+def test_unknown_operators():
+    prec = Precedence({(i, times)}, [e])
+    assert not prec.greater(i, a)
+    assert not prec.greater(a, i)
+    assert not prec.greater(e, None)
+    assert prec.ranks == {e: 0, times: 1, i: 2}
+    assert not prec.total
+
+
+@pytest.mark.parametrize("pairs,total", [
+    ([(i, times), (times, e)], True),
+    ([(i, times), (i, e)], False),
+    ([(i, times), (a, e), (times, a)], True),
+    ([(times, e), (a, e), (i, a)], False),
+])
+def test_ranks(pairs, total):
+    prec = Precedence(pairs)
+    assert prec.total == total
+    assert sorted(prec.ranks.values()) == list(range(len(prec.operators)))
+    for f, g in prec:
+        assert prec.ranks[f] > prec.ranks[g]
+
+
+def test_cyclic_ranks():
+    prec = Precedence({(i, times), (times, i)})
+    assert prec.ranks is None
+    assert not prec.total
+    assert prec.greater(i, times) and prec.greater(times, i)
+
+
+def test_cycles():
+    prec = Precedence({(i, times), (times, e), (e, i), (a, e)})
+    assert set(prec.cyclic()) == {i, times, e}
+    assert not prec.greater(e, a)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_naive_closure(seed):
+    rng = random.Random(seed)
+    pairs = {(rng.randrange(20), rng.randrange(20)) for _ in range(25)}
+    prec = Precedence(pairs)
+    closure = transitive_closure(pairs)
+    assert set(prec) == closure
+    assert all(prec.greater(f, g) == ((f, g) in closure)
+               for f in prec.operators for g in prec.operators)
+
+
+def test_many_operators():
+    ops = [Symbol('c{}'.format(k)) for k in range(500)]
+    start = time.perf_counter()
+    prec = Precedence(zip(ops[1:], ops))
+    assert time.perf_counter() - start < 5
+    assert prec.greater(ops[-1], ops[0])
+    assert not prec.greater(ops[0], ops[-1])
+    assert prec.ranks == {op: k for k, op in enumerate(ops)}
+    assert prec.total
+
+
+def test_as_precedence():
+    prec = Precedence({(i, times)})
+    assert as_precedence(prec) is prec
+    assert as_precedence({(i, times)}) == prec
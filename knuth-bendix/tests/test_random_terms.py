@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from knuth_bendix.benchmarks.problems import PROBLEMS, times, i, e, plus
+from knuth_bendix.random_terms import RandomTerms
+from knuth_bendix.rewrite_system import RewriteSystem
+from knuth_bendix.selection import subexpression_count, term_depth
+from knuth_bendix.unification import unify_expressions
+from knuth_bendix.utils import substitute
+
+from matchpy import (Operation, Arity, Symbol, get_variables)
+import pytest
+
+neg = Operation.new('-', Arity.unary, 'neg')
+zero = Symbol('0')
+group_ops = [times, i, e]
+ac_ops = [plus, neg, zero]
+
+
+def test_seeded():
+    assert (RandomTerms(group_ops, seed=3).equations(5, 20)
+            == RandomTerms(group_ops, seed=3).equations(5, 20))
+    assert (RandomTerms(group_ops, seed=3).term(20)
+            != RandomTerms(group_ops, seed=4).term(20))
+
+
+@pytest.mark.parametrize("size", [1, 10, 100, 1000, 10000])
+def test_size(size):
+    term = RandomTerms(group_ops, seed=size).term(size)
+    assert subexpression_count(term) == size
+
+
+@pytest.mark.parametrize("max_depth", [0, 1, 5])
+def test_max_depth(max_depth):
+    terms = RandomTerms(group_ops + ac_ops, seed=0)
+    for _ in range(20):
+        term = terms.term(100, max_depth)
+        assert term_depth(term) <= max_depth
+
+
+def test_ac_operands():
+    terms = RandomTerms(ac_ops, seed=0, max_ac_operands=3)
+    for _ in range(20):
+        for sub, _ in terms.term(50).preorder_iter():
+            if isinstance(sub, plus):
+                assert len(sub.operands) >= 2
+
+
+@pytest.mark.parametrize("sharing", [0, 1])
+def test_variable_sharing(sharing):
+    terms = RandomTerms(group_ops, seed=1, variable_probability=1,
+                        sharing=sharing)
+    term = terms.term(41)
+    n_leaves = sum(1 for sub, _ in term.preorder_iter()
+                   if not isinstance(sub, (times, i)))
+    expected = n_leaves if sharing == 0 else 1
+    assert len(get_variables(term)) == expected
+
+
+def test_bad_operators():
+    assoc = Operation.new('a', Arity.binary, associative=True)
+    with pytest.raises(ValueError):
+        RandomTerms([assoc])
+    with pytest.raises(TypeError):
+        RandomTerms(['x'])
+
+
+def test_rules():
+    order = PROBLEMS['group_kbo'].order
+    terms = RandomTerms(group_ops, seed=5)
+    for rule in terms.rules(20, 8, order):
+        assert order(rule.left, rule.right)
+        assert get_variables(rule.right) <= get_variables(rule.left)
+    for s, t in terms.equations(20, 8):
+        assert get_variables(t) <= get_variables(s)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("size", [10, 100])
+def test_normalize_idempotent(seed, size):
+    problem = PROBLEMS['group_kbo']
+    system = RewriteSystem.from_equations(problem.order, problem.equations)
+    system.complete(problem.order)
+    term = RandomTerms(group_ops, seed=seed).term(size, max_depth=20)
+    normal_form = system.normalize(term)
+    assert system.normalize(normal_form) == normal_form
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("size", [10, 100, 1000, 10000])
+def test_unifiers_unify(seed, size):
+    terms = RandomTerms(group_ops, seed=seed)
+    s, t = terms.unifiable_pair(size, max_depth=40)
+    assert not get_variables(s) & get_variables(t)
+    unifiers = unify_expressions(s, t)
+    assert unifiers
+    for sigma in unifiers:
+        assert substitute(s, sigma) == substitute(t, sigma)
+
+
+# AC unification has exponentially many cases, so these stay small
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("size", [6, 10])
+def test_ac_unifiers_unify(seed, size):
+    terms = RandomTerms(ac_ops, seed=seed, max_ac_operands=3,
+                        variable_probability=0.5)
+    s, t = terms.unifiable_pair(size, max_depth=4, probability=0.3)
+    try:
+        unifiers = unify_expressions(s, t)
+    except NotImplementedError:
+        # Repeated variables on both sides aren't supported
+        return
+    for sigma in unifiers:
+        assert substitute(s, sigma) == substitute(t, sigma)
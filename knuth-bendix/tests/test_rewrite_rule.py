@@ -103,3 +103,78 @@ def test_new_variable_failure():
     f = Operation.new('f', Arity.binary)
     with pytest.raises(ValueError):
         RewriteRule(f(x, y), f(z, x))
+
+
+def test_rewrite_once_accept():
+    f = Operation.new('f', Arity.binary)
+    x = make_dot_variable('x')
+    y = make_dot_variable('y')
+    a = Symbol('a')
+    b = Symbol('b')
+    rules = RewriteRuleList(RewriteRule(f(x, y), f(y, x)))
+
+    assert rules.rewrite_once(f(a, f(b, a))) == f(f(b, a), a)
+    # Refusing the outer rewrite moves on to the inner one
+    assert (rules.rewrite_once(f(a, f(b, a)),
+                               lambda old, new: old == f(b, a))
+            == f(a, f(a, b)))
+    assert rules.rewrite_once(a) is None
+    assert rules.rewrite_once(f(a, b), lambda old, new: False) is None
+
+
+def test_removed_rules_stop_matching(inv_pattern):
+    inv = inv_pattern['inv']
+    a = Symbol('a')
+    b = Symbol('b')
+    to_b = RewriteRule(inv(a), b)
+    rules = RewriteRuleList(to_b, inv_pattern['rule'])
+    assert rules.apply_all(inv(a)) == b
+    rules.remove(to_b)
+    assert list(rules) == [inv_pattern['rule']]
+    assert rules.apply_all(inv(a)) == a
+    rules.swap(inv_pattern['rule'], to_b)
+    assert list(rules) == [to_b]
+    assert rules.apply_all(inv(a)) == b
+    assert rules.apply_all(inv(b)) == inv(b)
+
+
+def test_rules_added_after_ac_matching():
+    plus = Operation.new('+', Arity.polyadic, 'plus', infix=True,
+                         associative=True, commutative=True)
+    f = Operation.new('f', Arity.unary)
+    zero = Symbol('0')
+    x = make_dot_variable('x')
+    y = make_dot_variable('y')
+    rules = RewriteRuleList(RewriteRule(plus(zero, x), x))
+    # Matching this caches that f(0) matches none of the operand patterns
+    assert list(rules.match(plus(x, f(zero)))) == []
+
+    new_rule = RewriteRule(plus(f(zero), f(x)), f(x))
+    rules.append(new_rule)
+    assert [r for r, _ in rules.match(plus(f(zero), f(y)))] == [new_rule]
+    rules.swap(new_rule, RewriteRule(plus(f(zero), f(zero)), zero))
+    assert len(list(rules.match(plus(f(zero), f(zero))))) == 1
+
+
+def test_removal_leaves_slots(inv_pattern):
+    inv = inv_pattern['inv']
+    consts = [Symbol('c{}'.format(n)) for n in range(40)]
+    to_rules = [RewriteRule(inv(c), c) for c in consts]
+    rules = RewriteRuleList(*to_rules)
+    for rule in to_rules[::2]:
+        rules.remove(rule)
+    assert list(rules) == to_rules[1::2]
+    assert len(rules) == 20
+    assert rules[1] is to_rules[3]
+    assert len(rules.rules) == 20
+    with pytest.raises(ValueError):
+        rules.remove(to_rules[0])
+
+    # Enough swaps to rebuild the matcher partway through
+    for n, rule in enumerate(to_rules[1::2]):
+        new_rule = RewriteRule(inv(consts[2 * n + 1]), consts[0])
+        rules.swap(rule, new_rule)
+        assert [r for r, _ in rules.match(new_rule.left)] == [new_rule]
+    assert len(rules) == 20
+    assert all(rules.apply_all(inv(c)) == consts[0] for c in consts[1::2])
+    assert rules.apply_all(inv(consts[2])) == inv(consts[2])
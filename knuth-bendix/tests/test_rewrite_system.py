@@ -16,8 +16,10 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
 from knuth_bendix.lex_path_ordering import LexPathOrdering
+from knuth_bendix.random_terms import RandomTerms
 from knuth_bendix.rewrite_system import RewriteSystem
 from knuth_bendix.rewrite_rule import RewriteRule
+from knuth_bendix.budget import CompletionBudget, CompletionStatus
 from knuth_bendix.unification import equal_mod_renaming
 
 from matchpy import (Operation, Arity, make_dot_variable, Symbol)
@@ -60,3 +62,210 @@ def test_group_theory_completion(order):
                    and equal_mod_renaming(r.right, s.right)
                    for s in system.rules)
     assert len(expected_system) == len(system.rules)
+
+
+@pytest.mark.parametrize("loop", ['standard', 'discount'])
+@pytest.mark.parametrize("order", [
+    KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                        {(i, times), (times, e)}),
+    LexPathOrdering({(i, times), (times, e)})
+])
+def test_add_equations(order, loop, monkeypatch):
+    equations = [(times(times(x, y), z), times(x, times(y, z))),
+                 (times(e, x), x),
+                 (times(i(x), x), e)]
+    from_scratch = RewriteSystem.from_equations(order, equations)
+    from_scratch.complete(order, loop=loop)
+
+    system = RewriteSystem.from_equations(order, equations[:2])
+    system.complete(order, loop=loop)
+    old_rules = list(system.rules)
+
+    # Pairs among the old rules aren't looked for again
+    seen = []
+    original = RewriteSystem._add_critical_pairs_with
+
+    def record(self, rule, pool=None):
+        seen.append(rule)
+        original(self, rule, pool)
+    monkeypatch.setattr(RewriteSystem, '_add_critical_pairs_with', record)
+    status = system.add_equations(equations[2:], order, loop=loop)
+    assert status == CompletionStatus.COMPLETE
+    assert not any(r is old for r in seen for old in old_rules)
+
+    assert len(system.rules) == len(from_scratch.rules)
+    for r in from_scratch.rules:
+        assert any(equal_mod_renaming(r.left, s.left)
+                   and equal_mod_renaming(r.right, s.right)
+                   for s in system.rules)
+
+
+def test_add_unorientable_equation():
+    order = LexPathOrdering({(i, times), (times, e)})
+    system = RewriteSystem.from_equations(order, [(times(e, x), x)])
+    system.complete(order)
+    with pytest.raises(ValueError):
+        system.add_equations([(times(x, y), times(y, x))], order)
+    assert not system.critical_pairs
+    assert len(system.rules) == 1
+
+
+def test_rule_ids():
+    order = LexPathOrdering({(i, times), (times, e)})
+    equations = [(times(times(x, y), z), times(x, times(y, z))),
+                 (times(e, x), x),
+                 (times(i(x), x), e)]
+    system = RewriteSystem.from_equations(order, equations)
+    first = list(system.rules)
+    assert [system.rule_id(r) for r in first] == [0, 1, 2]
+    system.complete(order)
+
+    ids = [system.rule_id(r) for r in system.rules]
+    assert len(set(ids)) == len(ids)
+    assert len(system.table) == len(system.rules)
+    generations = [system.table.generation[n] for n in ids]
+    assert min(generations) == 0
+    assert max(generations) > 1
+
+    rule = system.rules[0]
+    system.delete_rule(system.rule_id(rule))
+    assert rule not in list(system.rules)
+    assert system.table.get_id(rule) is None
+    assert len(system.table) == len(system.rules)
+
+
+def test_extensions_by_id():
+    ac_plus = Operation.new('+', Arity.polyadic, 'ac_plus', infix=True,
+                            associative=True, commutative=True)
+    zero = Symbol('0')
+    system = RewriteSystem([RewriteRule(ac_plus(x, i(x)), zero)])
+    rule = system.rules[0]
+    extension = system.extension(rule)
+    assert extension is not None
+    assert system.is_extension(extension)
+    assert system.extended_rule(extension) is rule
+    assert system.partner(extension) is rule
+
+    new_id = system.replace_rule(system.rule_id(rule),
+                                 RewriteRule(ac_plus(i(x), x), zero))
+    assert new_id == 2
+    assert len(system.rules) == 2
+    assert system.is_extension(system.rules[1])
+
+    system.delete_rule(system.rule_id(system.rules[1]))
+    assert len(system.rules) == 0
+    assert len(system.table) == 0
+
+
+def test_replace_extension():
+    ac_plus = Operation.new('+', Arity.polyadic, 'ac_plus', infix=True,
+                            associative=True, commutative=True)
+    zero = Symbol('0')
+    system = RewriteSystem([RewriteRule(ac_plus(x, i(x)), zero)])
+    rule = system.rules[0]
+    ext_id = system.rule_id(system.extension(rule))
+    new_extension = RewriteRule(system.table[ext_id].left, zero)
+    new_id = system.replace_rule(ext_id, new_extension)
+    assert system.extension(rule) is new_extension
+    assert system.extended_rule(new_extension) is rule
+    assert system.table.parent_of(ext_id) is None
+    assert list(system.rules) == [rule, new_extension]
+
+    system.delete_rule(new_id)
+    assert len(system.rules) == 0
+
+
+plus = Operation.new('+', Arity.binary, 'plus', infix=True)
+zero = Symbol('0')
+a = Symbol('a')
+b = Symbol('b')
+c = Symbol('c')
+unfailing_orders = [
+    KnuthBendixOrdering({plus: 0, zero: 1, a: 1, b: 1, c: 1}, 1,
+                        {(plus, c), (c, b), (b, a), (a, zero)}),
+    LexPathOrdering({(plus, c), (c, b), (b, a), (a, zero)}),
+]
+
+
+@pytest.mark.parametrize("order", unfailing_orders)
+def test_unorientable_fails(order):
+    with pytest.raises(ValueError):
+        RewriteSystem.from_equations(order, [(plus(x, y), plus(y, x))])
+
+
+@pytest.mark.parametrize("loop", ['standard', 'discount'])
+@pytest.mark.parametrize("order", unfailing_orders)
+def test_unfailing_completion(order, loop):
+    equations = [(plus(x, y), plus(y, x)),
+                 (plus(x, zero), x)]
+    system = RewriteSystem.from_equations(order, equations, unfailing=True)
+    assert len(system.equations) == 1
+    assert system.complete(order, loop=loop) == CompletionStatus.COMPLETE
+
+    assert any(equal_mod_renaming(r.left, plus(zero, x))
+               and equal_mod_renaming(r.right, x)
+               for r in system.rules)
+    assert len(system.equations) == 1
+    assert system.normalize(plus(b, a)) == system.normalize(plus(a, b))
+    assert system.normalize(plus(zero, plus(c, a))) ==\
+        system.normalize(plus(plus(a, zero), c))
+
+
+@pytest.mark.parametrize("order", unfailing_orders)
+def test_unfailing_ground_normal_forms(order):
+    equations = [(plus(x, y), plus(y, x)),
+                 (plus(plus(x, y), z), plus(x, plus(y, z)))]
+    system = RewriteSystem.from_equations(order, equations, unfailing=True)
+    # Without a ground joinability test, this keeps finding
+    # permuted forms of associativity, so it's cut off
+    status = system.complete(order, budget=CompletionBudget(max_pending=400))
+    assert status == CompletionStatus.QUEUE_LIMIT
+
+    terms = [plus(c, plus(b, a)), plus(plus(a, c), b), plus(b, plus(a, c))]
+    normal_forms = {system.normalize(t) for t in terms}
+    assert len(normal_forms) == 1
+
+
+class CountingOrder(KnuthBendixOrdering):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.calls = 0
+        self.compares = 0
+
+    def __call__(self, s, t):
+        self.calls += 1
+        return super().__call__(s, t)
+
+    def compare(self, s, t):
+        self.compares += 1
+        return super().compare(s, t)
+
+
+def test_orient_compares_once():
+    order = CountingOrder({times: 0, i: 0, e: 1}, 1,
+                          {(i, times), (times, e)})
+    assert RewriteSystem.orient(e, times(i(x), x), order) ==\
+        (times(i(x), x), e)
+    assert RewriteSystem.try_orient(times(x, y), times(y, x), order) is None
+    assert (order.compares, order.calls) == (2, 0)
+
+
+def test_orient_with_plain_function():
+    def order(s, t):
+        return s == times(x, e) and t == x
+    assert RewriteSystem.orient(x, times(x, e), order) == (times(x, e), x)
+    assert RewriteSystem.try_orient(x, x, order) is None
+    with pytest.raises(ValueError):
+        RewriteSystem.orient(x, e, order)
+
+
+@pytest.mark.parametrize("order", [
+    KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                        {(i, times), (times, e)}),
+    LexPathOrdering({(i, times), (times, e)})
+])
+def test_orient_many(order):
+    equations = RandomTerms([times, i, e], seed=0).equations(200, 10)
+    assert (RewriteSystem.orient_many(equations, order)
+            == [RewriteSystem.try_orient(s, t, order)
+                for s, t in equations])
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from knuth_bendix.rewrite_rule import RewriteRule
+from knuth_bendix.rule_table import RuleTable
+
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+import pytest
+
+x = make_dot_variable('x')
+f = Operation.new('f', Arity.unary)
+a = Symbol('a')
+b = Symbol('b')
+
+
+def test_ids_are_stable():
+    table = RuleTable()
+    r1 = RewriteRule(f(a), a)
+    r2 = RewriteRule(f(b), b)
+    r3 = RewriteRule(f(f(x)), x)
+    assert table.add(r1) == 0
+    assert table.add(r2, generation=2) == 1
+    table.kill(0)
+    assert table.add(r3) == 2
+    assert len(table) == 2
+    assert list(table.live_ids()) == [1, 2]
+    assert table[1] is r2
+    assert table.id_of(r3) == 2
+    assert table.generation[1] == 2
+    assert table.get_id(r1) is None
+    with pytest.raises(KeyError):
+        table[0]
+
+
+def test_extension_links():
+    table = RuleTable()
+    base = table.add(RewriteRule(f(a), a))
+    ext = table.add(RewriteRule(f(f(a)), f(a)), parent=base)
+    assert table.extension_of(base) == ext
+    assert table.parent_of(ext) == base
+    assert table.parent_of(base) is None
+    table.unlink(ext)
+    assert table.extension_of(base) is None
+    assert table.parent_of(ext) is None
+
+
+def test_restore():
+    table = RuleTable()
+    rule = RewriteRule(f(a), a)
+    table.restore(3, rule, generation=4)
+    assert table[3] is rule
+    assert table.generation[3] == 4
+    assert not table.is_alive(1)
+    assert len(table) == 1
+    assert table.add(RewriteRule(f(b), b)) == 4
+    with pytest.raises(ValueError):
+        table.restore(3, rule)
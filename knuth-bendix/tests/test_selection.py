@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import pytest
+from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
+from knuth_bendix.rewrite_rule import RewriteRule, RewriteRuleList
+from knuth_bendix.rewrite_system import RewriteSystem
+from knuth_bendix.selection import (CriticalPairQueue, SizeSelection,
+                                    WeightSelection, AgeSelection,
+                                    DepthSelection, PickRatioSelection,
+                                    term_depth)
+from knuth_bendix.unification import equal_mod_renaming
+
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+
+x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+i = Operation.new('i', Arity.unary)
+e = Symbol('e')
+order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                            {(i, times), (times, e)})
+
+
+@pytest.mark.parametrize("term,depth", [
+    (x, 0),
+    (e, 0),
+    (i(x), 1),
+    (times(i(i(x)), e), 3),
+])
+def test_term_depth(term, depth):
+    assert term_depth(term) == depth
+
+
+def test_queue_keys():
+    queue = CriticalPairQueue(order.weight)
+    deep = (i(i(i(e))), e)
+    heavy = (times(e, e), times(e, e))
+    big = (times(x, times(y, z)), x)
+    for pair in [deep, heavy, big]:
+        queue.push(pair)
+    assert len(queue) == 3
+    assert queue.pop('weight') == deep
+    assert queue.pop('depth') == heavy
+    assert queue.pop('age') == big
+    assert not queue
+
+
+def test_queue_skips_popped_pairs():
+    queue = CriticalPairQueue()
+    pairs = [(i(e), e), (times(e, e), e), (i(i(e)), e)]
+    for pair in pairs:
+        queue.push(pair)
+    assert queue.pop('size') == pairs[0]
+    assert queue.pop('age') == pairs[1]
+    assert queue.pairs() == [pairs[2]]
+    assert queue.pop('depth') == pairs[2]
+    with pytest.raises(IndexError):
+        queue.pop('size')
+
+
+def test_heaps_made_when_needed():
+    weighed = []
+
+    def weight(term):
+        weighed.append(term)
+        return order.weight(term)
+    queue = CriticalPairQueue(weight)
+    pairs = [(i(e), e), (times(e, e), e), (i(i(e)), e)]
+    for pair in pairs:
+        queue.push(pair)
+    assert not queue.heaps
+    assert not weighed
+    assert queue.pop('weight') == pairs[0]
+    assert list(queue.heaps) == ['weight']
+    assert len(weighed) == 6
+    queue.push((e, e))
+    assert len(weighed) == 8
+    assert queue.pop('age') == pairs[1]
+    assert sorted(queue.heaps) == ['age', 'weight']
+    assert len(weighed) == 8
+    with pytest.raises(KeyError):
+        queue.pop('colour')
+
+
+def test_pick_ratio():
+    strategy = PickRatioSelection(age=1, weight=2)
+    assert ([strategy.next_key() for _ in range(6)]
+            == ['age', 'weight', 'weight', 'age', 'weight', 'weight'])
+    with pytest.raises(ValueError):
+        PickRatioSelection(age=0, weight=0)
+
+
+@pytest.mark.parametrize("strategy", [
+    SizeSelection(),
+    WeightSelection(),
+    AgeSelection(),
+    DepthSelection(),
+    PickRatioSelection(),
+])
+def test_strategies_complete_groups(strategy):
+    equations = [(times(times(x, y), z), times(x, times(y, z))),
+                 (times(e, x), x),
+                 (times(i(x), x), e)]
+    expected = [(times(x, e), x),
+                (times(e, x), x),
+                (times(i(x), x), e),
+                (times(x, i(x)), e),
+                (times(times(x, y), z), times(x, times(y, z))),
+                (i(e), e),
+                (times(i(x), times(x, y)), y),
+                (times(x, times(i(x), y)), y),
+                (i(i(x)), x),
+                (i(times(y, x)), times(i(x), i(y)))]
+
+    system = RewriteSystem.from_equations(order, equations)
+    system.complete(order, strategy)
+
+    for left, right in expected:
+        assert any(equal_mod_renaming(left, r.left)
+                   and equal_mod_renaming(right, r.right)
+                   for r in system.rules)
+    # Other selection orders may leave rules that are
+    # redundant, but they must follow from the expected ones
+    canonical = RewriteRuleList(*(RewriteRule(left, right)
+                                  for left, right in expected))
+    for r in system.rules:
+        assert canonical.apply_all(r.left) == canonical.apply_all(r.right)
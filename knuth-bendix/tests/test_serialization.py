@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import pytest
+from knuth_bendix.serialization import (encode_term, operators_of,
+                                        TermEncoder, TermDecoder)
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+import json
+
+plus = Operation.new('+', Arity.polyadic, 'plus', infix=True,
+                     associative=True, commutative=True)
+f = Operation.new('f', Arity.binary)
+g = Operation.new('g', Arity.unary)
+x = make_dot_variable('x')
+y = make_dot_variable('y')
+a = Symbol('a')
+
+
+@pytest.mark.parametrize("term", [
+    x,
+    a,
+    g(x),
+    f(g(a), y),
+    plus(x, a, g(y)),
+])
+def test_round_trip(term):
+    encoder = TermEncoder()
+    data = json.loads(json.dumps(encoder.encode(term)))
+    decoder = TermDecoder(encoder.operations, operators_of([term]))
+    assert decoder.decode(data) == term
+
+
+def test_encoding():
+    assert encode_term(f(g(a), x)) == ['f', 'f', ['f', 'g', ['s', 'a']],
+                                       ['v', 'x']]
+
+
+def test_recreated_operations():
+    encoder = TermEncoder()
+    data = encoder.encode(plus(x, g(a)))
+    decoder = TermDecoder(encoder.operations)
+    term = decoder.decode(data)
+    new_plus = type(term)
+    assert new_plus is not plus
+    assert new_plus.name == '+'
+    assert new_plus.associative and new_plus.commutative
+    assert decoder.decode(data) == term
+
+
+def test_name_clash():
+    other_g = Operation.new('g', Arity.unary, 'other_g')
+    with pytest.raises(ValueError):
+        operators_of([f(g(x), other_g(x))])
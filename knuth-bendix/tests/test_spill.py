@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
+from knuth_bendix.rewrite_system import RewriteSystem
+from knuth_bendix.selection import (CriticalPairQueue, AgeSelection,
+                                    WeightSelection)
+from knuth_bendix.spill import SpillingCriticalPairQueue
+from knuth_bendix.unification import equal_mod_renaming
+
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+import os
+import random
+import pytest
+
+x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+i = Operation.new('i', Arity.unary)
+e = Symbol('e')
+order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                            {(i, times), (times, e)})
+
+
+def nested(n, term):
+    for _ in range(n):
+        term = i(term)
+    return term
+
+
+def random_pairs(seed, n):
+    rng = random.Random(seed)
+    return [(nested(rng.randrange(8), x),
+             times(nested(rng.randrange(8), e), y))
+            for _ in range(n)]
+
+
+def sizes(pairs):
+    return [order.weight(s) + order.weight(t) for s, t in pairs]
+
+
+@pytest.mark.parametrize("max_runs", [16, 1])
+def test_spilled_order_matches(max_runs):
+    plain = CriticalPairQueue(order.weight)
+    spilling = SpillingCriticalPairQueue(8, order.weight, 'weight',
+                                         max_runs=max_runs)
+    rng = random.Random(1)
+    plain_popped = []
+    spilling_popped = []
+    for pair in random_pairs(0, 200):
+        plain.push(pair)
+        spilling.push(pair)
+        if rng.random() < 0.3:
+            plain_popped.append(plain.pop('weight'))
+            spilling_popped.append(spilling.pop('weight'))
+        assert len(plain) == len(spilling)
+        assert len(spilling.live) <= 8
+    assert spilling.spills > 0
+    assert len(spilling.runs) <= max_runs + 1
+    # Ties may be broken differently, so only the weights must agree
+    assert sorted(sizes(spilling.pairs())) == sorted(sizes(plain.pairs()))
+
+    while plain:
+        plain_popped.append(plain.pop('weight'))
+        spilling_popped.append(spilling.pop('weight'))
+    assert not spilling
+    assert sizes(spilling_popped) == sizes(plain_popped)
+    assert sorted(map(str, spilling_popped)) ==\
+        sorted(map(str, plain_popped))
+
+
+def test_weight_set_after_spilling():
+    plain = CriticalPairQueue()
+    spilling = SpillingCriticalPairQueue(8, spill_key='weight')
+    for pair in random_pairs(6, 100):
+        plain.push(pair)
+        spilling.push(pair)
+    assert spilling.spilled
+    plain.set_weight(order.weight)
+    spilling.set_weight(order.weight)
+    plain_popped = [plain.pop('weight') for _ in range(100)]
+    assert [spilling.pop('weight') for _ in range(100)] == plain_popped
+
+
+class RecordingSelection(WeightSelection):
+    def __init__(self):
+        self.popped = []
+
+    def select(self, queue):
+        pair = super().select(queue)
+        self.popped.append(pair)
+        return pair
+
+
+def test_queued_pairs_spilled_by_order_weight():
+    def popped(max_pairs_in_memory):
+        system = RewriteSystem.from_equations(order, [])
+        for n in range(12):
+            system.critical_pairs.push((times(e, nested(n, y)),
+                                        nested(n, y)))
+            system.critical_pairs.push((nested(2 * n, x), x))
+        system.critical_pairs.push((times(times(x, y), z),
+                                    times(x, times(y, z))))
+        system.critical_pairs.push((times(i(x), x), e))
+        strategy = RecordingSelection()
+        system.complete(order, strategy=strategy,
+                        max_pairs_in_memory=max_pairs_in_memory)
+        return strategy.popped
+    # The pairs queued before the completion are spilled by the weight
+    # of the ordering, not by the number of nodes
+    assert popped(4) == popped(None)
+
+
+def test_other_keys_drain_disk():
+    queue = SpillingCriticalPairQueue(4, order.weight, 'weight')
+    pairs = random_pairs(2, 30)
+    for pair in pairs:
+        queue.push(pair)
+    assert queue.pairs() == pairs
+    popped = [queue.pop('age') for _ in range(30)]
+    assert not queue
+    assert sorted(map(str, popped)) == sorted(map(str, pairs))
+
+
+@pytest.mark.parametrize("max_runs", [16, 1])
+def test_entries_streamed_in_age_order(max_runs):
+    queue = SpillingCriticalPairQueue(4, order.weight, 'weight',
+                                      max_runs=max_runs)
+    pairs = random_pairs(4, 60)
+    for n, pair in enumerate(pairs):
+        queue.push(pair, (n, n))
+    runs = set(os.listdir(queue.directory))
+    entries = queue.entries()
+    assert next(entries) == (pairs[0], (0, 0))
+    # The pairs on disk are sorted in batches no bigger than the memory
+    assert len(os.listdir(queue.directory)) > len(runs)
+    assert list(entries) == [(pair, (n, n))
+                             for n, pair in enumerate(pairs)][1:]
+    assert set(os.listdir(queue.directory)) == runs
+    assert len(queue) == len(pairs)
+    assert queue.pop('weight') is not None
+
+
+def test_abandoned_entries_cleaned_up():
+    queue = SpillingCriticalPairQueue(4)
+    for pair in random_pairs(5, 30):
+        queue.push(pair)
+    runs = set(os.listdir(queue.directory))
+    entries = queue.entries()
+    next(entries)
+    entries.close()
+    assert set(os.listdir(queue.directory)) == runs
+
+
+def test_close_removes_files():
+    queue = SpillingCriticalPairQueue(4)
+    for pair in random_pairs(3, 20):
+        queue.push(pair)
+    directory = queue.directory
+    assert os.listdir(directory)
+    queue.close()
+    assert not os.path.exists(directory)
+    assert len(queue) == len(queue.live)
+
+
+def test_bad_limits():
+    with pytest.raises(ValueError):
+        SpillingCriticalPairQueue(1)
+    with pytest.raises(ValueError):
+        SpillingCriticalPairQueue(10, spill_key='colour')
+
+
+@pytest.mark.parametrize("strategy", [None, AgeSelection()])
+def test_bounded_completion(strategy):
+    equations = [(times(times(x, y), z), times(x, times(y, z))),
+                 (times(e, x), x),
+                 (times(i(x), x), e)]
+    expected = RewriteSystem.from_equations(order, equations)
+    expected.complete(order, loop='discount')
+
+    system = RewriteSystem.from_equations(order, equations)
+    system.complete(order, strategy=strategy, loop='discount',
+                    max_pairs_in_memory=4)
+    assert isinstance(system.critical_pairs, SpillingCriticalPairQueue)
+    assert system.critical_pairs.spills > 0
+    assert len(system.rules) == len(expected.rules)
+    for r in expected.rules:
+        assert any(equal_mod_renaming(r.left, s.left)
+                   and equal_mod_renaming(r.right, s.right)
+                   for s in system.rules)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from knuth_bendix.knuth_bendix_ordering import KnuthBendixOrdering
+from knuth_bendix.rewrite_system import RewriteSystem
+from knuth_bendix.stats import CompletionStats, PHASES, active
+from knuth_bendix.unification import unify_expressions
+
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+import json
+import pytest
+
+x, y, z = (make_dot_variable(t) for t in ['x', 'y', 'z'])
+times = Operation.new('*', Arity.binary, 'times', infix=True)
+plus = Operation.new('+', Arity.polyadic, 'plus', infix=True,
+                     associative=True, commutative=True)
+i = Operation.new('i', Arity.unary)
+e = Symbol('e')
+a = Symbol('a')
+order = KnuthBendixOrdering({times: 0, i: 0, e: 1}, 1,
+                            {(i, times), (times, e)})
+equations = [(times(times(x, y), z), times(x, times(y, z))),
+             (times(e, x), x),
+             (times(i(x), x), e)]
+
+
+@pytest.mark.parametrize("loop", ['standard', 'discount'])
+def test_counters(loop):
+    system = RewriteSystem.from_equations(order, equations)
+    system.complete(order, loop=loop)
+    stats = system.stats
+    assert stats.pairs_oriented >= len(system.rules) - len(equations)
+    assert stats.pairs_joined > 0
+    assert stats.pairs_generated > 0
+    assert stats.max_rules >= len(system.rules)
+    assert stats.max_queue > 0
+    # Without profiling, nothing is timed
+    assert not stats.calls
+
+
+def test_profile():
+    system = RewriteSystem.from_equations(order, equations)
+    system.complete(order, profile=True)
+    stats = system.stats
+    for phase in ['find_overlaps', 'normalize', 'order', 'canonicalize']:
+        assert stats.calls[phase] > 0
+        assert stats.time[phase] > 0
+    assert set(stats.calls) <= set(PHASES)
+    assert not stats.profiling
+    assert active() is not stats
+    data = json.loads(json.dumps(stats.as_dict()))
+    assert data['phases']['normalize']['calls'] == stats.calls['normalize']
+    assert 'Pairs oriented' in stats.report()
+    assert CompletionStats.from_dict(data).report() == stats.report()
+    # The ordering is put back afterwards
+    assert system.equation_order is None
+
+
+def test_profile_unfailing_keeps_order():
+    commutes = [(times(x, y), times(y, x))]
+    system = RewriteSystem.from_equations(order, commutes, unfailing=True)
+    system.complete(order, profile=True)
+    assert system.equation_order is order
+    assert system.stats.pairs_kept_as_equations == 0
+    assert system.stats.calls['order'] > 0
+
+
+def test_ac_unifiers():
+    stats = CompletionStats()
+    with stats.profile():
+        unifiers = unify_expressions(plus(x, y), plus(a, e))
+    assert stats.ac_unifications == 1
+    assert stats.ac_unifiers == len(unifiers) == 2
+    assert stats.max_ac_unifiers == 2
+    assert stats.calls['ac_operand_lists'] == 1
+    # Outside the block, nothing more is counted
+    unify_expressions(plus(x, y), plus(a, e))
+    assert stats.ac_unifications == 1
+    assert 'AC unifiers per problem: 2.00' in stats.report()
+
+
+def test_call_without_profiling():
+    stats = CompletionStats()
+    assert stats.call('normalize', max, 1, 2) == 2
+    assert stats.timed('order', min)(1, 2) == 1
+    assert not stats.calls
+    with stats.profile():
+        assert stats.timed('order', min)(1, 2) == 1
+    assert stats.calls['order'] == 1
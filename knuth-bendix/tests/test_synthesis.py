@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from knuth_bendix.benchmarks.problems import (PROBLEMS, group, abelian_group,
+                                              times, e)
+from knuth_bendix.lex_path_ordering import LexPathOrdering
+from knuth_bendix.budget import CompletionStatus
+from knuth_bendix.random_terms import RandomTerms
+from knuth_bendix.rewrite_system import RewriteSystem
+from knuth_bendix import synthesis
+from knuth_bendix.synthesis import (synthesize_kbo, synthesize_lpo,
+                                    UnorientableEquations,
+                                    ExtensibleLexPathOrdering)
+from knuth_bendix.utils import Comparison
+
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+import pytest
+import time
+
+x, y = (make_dot_variable(t) for t in ['x', 'y'])
+f = Operation.new('f', Arity.binary)
+g = Operation.new('g', Arity.binary)
+h = Operation.new('h', Arity.unary)
+a = Symbol('a')
+# f(x, y) = g(x, x) needs f > g, and g(x, y) = f(x, x) needs g > f
+conflicting = [(f(a, x), x), (f(x, y), g(x, x)),
+               (g(x, a), x), (g(x, y), f(x, x))]
+
+
+def orients(order, equations):
+    return all(RewriteSystem.try_orient(s, t, order) is not None
+               for s, t in equations)
+
+
+@pytest.mark.parametrize("synthesize", [synthesize_lpo, synthesize_kbo])
+def test_group(synthesize):
+    order = synthesize(group)
+    assert orients(order, group)
+    system = RewriteSystem.from_equations(order, group)
+    assert system.complete(order) == CompletionStatus.COMPLETE
+    assert len(system.rules) == 10
+
+
+@pytest.mark.parametrize("name", list(PROBLEMS))
+def test_lpo_for_problems(name):
+    equations = PROBLEMS[name].equations
+    assert orients(synthesize_lpo(equations), equations)
+
+
+def test_kbo_weights():
+    order = synthesize_kbo(group)
+    # The inverse is weightless, and so above everything else
+    assert [op.name for op, w in order.weights.items() if w == 0] == ['i']
+    assert all(order.op_gt.greater(*pair) for pair in order.op_gt)
+
+
+@pytest.mark.parametrize("synthesize", [synthesize_lpo, synthesize_kbo])
+def test_conflict(synthesize):
+    with pytest.raises(UnorientableEquations) as info:
+        synthesize(conflicting)
+    conflict = info.value.equations
+    assert conflict and set(conflict) <= set(conflicting)
+    for k in range(len(conflict)):
+        synthesize(conflict[:k] + conflict[k + 1:])
+
+
+def test_lpo_conflict_is_the_cycle():
+    with pytest.raises(UnorientableEquations) as info:
+        synthesize_lpo(conflicting)
+    assert info.value.equations == [conflicting[1], conflicting[3]]
+
+
+def test_commutativity():
+    with pytest.raises(UnorientableEquations) as info:
+        synthesize_lpo([(h(x), x), (f(x, y), f(y, x))])
+    assert info.value.equations == [(f(x, y), f(y, x))]
+
+
+@pytest.mark.parametrize("synthesize", [synthesize_lpo, synthesize_kbo])
+def test_large_conflict_is_quick(synthesize):
+    k = Operation.new('k', Arity.unary)
+    b = Symbol('b')
+    equations = (group + conflicting
+                 + RandomTerms([f, g, h, a, k, b], seed=1).equations(40, 6))
+    start = time.perf_counter()
+    with pytest.raises(UnorientableEquations) as info:
+        synthesize(equations)
+    # Shrinking reuses the constraints worked out for every equation,
+    # where it took over 10 seconds for KBO without
+    assert time.perf_counter() - start < 5
+    assert info.value.minimal
+    assert set(info.value.equations) <= set(equations)
+
+
+def test_shrinking_gives_up(monkeypatch):
+    monkeypatch.setattr(synthesis, 'MAX_SHRINK_STEPS', 0)
+    with pytest.raises(UnorientableEquations) as info:
+        synthesize_lpo(conflicting)
+    assert not info.value.minimal
+    assert info.value.equations == conflicting
+
+
+def test_kbo_needs_fixed_arity():
+    with pytest.raises(ValueError):
+        synthesize_kbo(abelian_group)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("synthesize", [synthesize_lpo, synthesize_kbo])
+def test_random_equations(seed, synthesize):
+    equations = RandomTerms([f, g, h, a], seed=seed).equations(8, 8)
+    try:
+        order = synthesize(equations)
+    except UnorientableEquations as e:
+        for k in range(len(e.equations)):
+            synthesize(e.equations[:k] + e.equations[k + 1:])
+    else:
+        assert orients(order, equations)
+
+
+def test_extension_during_completion():
+    with pytest.raises(ValueError):
+        order = LexPathOrdering({(times, e)})
+        RewriteSystem.from_equations(order, group).complete(order)
+
+    order = ExtensibleLexPathOrdering({(times, e)})
+    system = RewriteSystem.from_equations(order, group)
+    assert system.complete(order) == CompletionStatus.COMPLETE
+    assert len(system.rules) == 10
+    assert order.extensions
+    assert all(order.op_gt.greater(*pair)
+               for pair in order.extensions + [(times, e)])
+
+
+def test_extension_is_smallest():
+    order = ExtensibleLexPathOrdering({(f, g)}, cache_size=10)
+    assert not order(h(x), g(x, x))
+    assert order.extend_to_orient(h(x), g(x, x)) == Comparison.GREATER
+    assert order.extensions == [(h, g)]
+    assert order(h(x), g(x, x))
+    assert not order.op_gt.greater(h, f)
+
+
+def test_no_extension():
+    order = ExtensibleLexPathOrdering({(f, g)})
+    assert (order.extend_to_orient(f(x, y), f(y, x))
+            == Comparison.INCOMPARABLE)
+    # Would need g > f
+    assert (order.extend_to_orient(g(x, y), f(x, x))
+            == Comparison.INCOMPARABLE)
+    assert order.extensions == []
+    assert set(order.op_gt) == {(f, g)}
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# knuth-bendix - Implementation of the Knuth-Bendix algorithm
+# Copyright (C) 2017 Krzysztof Drewniak <krzysdrewniak@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import pytest
+from knuth_bendix.tptp import (TptpReader, TptpSyntaxError, statements,
+                               read_equations)
+from matchpy import (Operation, Arity, make_dot_variable, Symbol)
+import io
+import os
+import time
+
+plus = Operation.new('plus', Arity.polyadic, associative=True,
+                     commutative=True)
+x = make_dot_variable('X')
+y = make_dot_variable('Y')
+z = make_dot_variable('Z')
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), '..', '..', 'E', 'test.p')
+
+
+def read(text, signature=None):
+    reader = TptpReader(signature)
+    return reader, reader.read(io.StringIO(text))
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("a. b.", [(1, "a"), (1, "b")]),
+    ("% comment.\nfof(x, axiom,\n  f(a) = b).", [(2, "fof(x, axiom,   f(a) = b)")]),  # NOQA
+    ("# comment\ncnf(x, axiom, 'a.b' = c). % c.", [(2, "cnf(x, axiom, 'a.b' = c)")]),  # NOQA
+    ("f(a.b).\n\ng.", [(1, "f(a.b)"), (3, "g")]),
+])
+def test_statements(text, expected):
+    assert list(statements(io.StringIO(text))) == expected
+
+
+@pytest.mark.parametrize("text", ["a. b", "a('b"])
+def test_statements_errors(text):
+    with pytest.raises(TptpSyntaxError):
+        list(statements(io.StringIO(text)))
+
+
+def test_tff():
+    reader, equations = read("""
+tff(t, type, term: $tType).
+tff(p_type, type, p: (term * term) > term).
+tff(i_type, type, (i: term > term)).
+tff(e_type, type, e: term).
+tff(q_type, type, q: term > $o).
+tff(assoc, axiom, ! [X: term, Y: term, Z: term] :
+    p(p(X, Y), Z) = p(X, p(Y, Z))).
+tff(left_id, axiom, ! [X: term] : (p(e, X) = X)).
+tff(inv, axiom, ! [X: term] : ! [Y: term] : p(i(X), X) = e).
+tff(pred, axiom, ! [X: term] : q(i(X))).
+tff(neq, axiom, i(e) != p(e, e)).
+tff(goal, conjecture, ! [X: term] : i(i(X)) = X).
+""")
+    p = reader.operators['p']
+    i = reader.operators['i']
+    e = reader.operators['e']
+    assert p.arity == Arity.binary
+    assert i.arity == Arity.unary
+    assert e == Symbol('e')
+    assert reader.predicates == {'q'}
+    assert equations == [
+        (p(p(x, y), z), p(x, p(y, z))),
+        (p(e, x), x),
+        (p(i(x), x), e),
+    ]
+    assert [name for name, _ in reader.skipped] == ['pred', 'neq']
+    assert reader.conjectures == [(i(i(x)), x)]
+
+
+def test_fof_operators_from_use():
+    reader, equations = read("fof(a, axiom, f(X, c) = g(X)).\n"
+                             "fof(b, axiom, (g(c)) = c).")
+    f = reader.operators['f']
+    g = reader.operators['g']
+    c = reader.operators['c']
+    assert equations == [(f(x, c), g(x)), (g(c), c)]
+
+
+@pytest.mark.parametrize("text", [
+    "fof(a, axiom, (X = Y & Y = Z)).",
+    "fof(b, axiom, ![X]: (X = a | X = b)).",
+    "fof(c, axiom, ((f(X)) = a => f(X) = b)).",
+    "fof(d, axiom, (f(X) = a) & f(X) = b).",
+    "tff(e, axiom, ! [X: t] : (~ (f(X) = a))).",
+])
+def test_skipped_formulas(text):
+    reader, equations = read(text + "\nfof(ok, axiom, g(X) = X).")
+    assert len(equations) == 1
+    assert len(reader.skipped) == 1
+
+
+def test_signature():
+    _, equations = read("tff(comm, axiom, ! [X: t, Y: t] : "
+                        "plus(X, plus(Y, a)) = plus(a, X, Y)).",
+                        {'plus': plus})
+    [(left, right)] = equations
+    assert left == right == plus(x, y, Symbol('a'))
+
+
+@pytest.mark.parametrize("text", [
+    "fof(a, axiom, f(X) = f(X, X)).",
+    "tff(f_type, type, f: (t * t) > t).\nfof(a, axiom, f(X) = X).",
+    "fof(a, axiom, c = c(X)).",
+    "fof(a, axiom, f(X) = X",
+    "include('Axioms/GRP001.ax').",
+    "fof(a, axiom, f(X) = X) junk.",
+])
+def test_errors(text):
+    with pytest.raises(TptpSyntaxError):
+        read(text)
+
+
+def test_error_line():
+    with pytest.raises(TptpSyntaxError) as info:
+        read("fof(a, axiom, f(X) = X).\n\nfof(b, axiom,\n f(X, X) = X).")
+    assert info.value.line == 3
+
+
+def test_streaming():
+    reader = TptpReader()
+    lines = iter(["fof(a, axiom, f(X) = X).\n", "fof(b, axiom, f(X, X) = X)."])
+    equations = reader.equations(lines)
+    assert next(equations)[1] == x
+    with pytest.raises(TptpSyntaxError):
+        next(equations)
+
+
+@pytest.mark.skipif(not os.path.exists(EXAMPLE), reason="No example file")
+def test_example_file():
+    reader = TptpReader()
+    equations = reader.read(EXAMPLE)
+    assert len(equations) == 7
+    assert set(reader.operators) == {'plus', 'times', 'transpose', 'mat'}
+    assert ('test_false', 'a disequation') in reader.skipped
+    assert str(read_equations(EXAMPLE)) == str(equations)
+
+
+def test_linear_time():
+    def timed(n):
+        text = ''.join("fof(a{0}, axiom, f{0}(X, g(Y)) = g(f{0}(Y, X))).\n"
+                       .format(k) for k in range(n))
+        start = time.perf_counter()
+        equations = read_equations(io.StringIO(text))
+        assert len(equations) == n
+        return time.perf_counter() - start
+    small = timed(2000)
+    large = timed(20000)
+    assert large < 30 * small
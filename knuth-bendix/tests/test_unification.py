@@ -21,6 +21,7 @@ from knuth_bendix.unification import (
     unify_expressions,
     find_overlaps,
     equal_mod_renaming,
+    is_instance,
     proper_contains)
 from matchpy import (Operation, Arity, make_dot_variable, Symbol,
                      get_variables, substitute)
@@ -129,6 +130,21 @@ def test_equal_mod_renaming(t1, t2, expected):
     assert equal_mod_renaming(t1, t2) == expected
 
 
+@pytest.mark.parametrize("term,pattern,expected", [
+    (x, x, True),
+    (x, y, True),
+    (f(x, x), f(y, z), True),
+    (f(y, z), f(x, x), False),
+    (f(g(a), b), f(x, y), True),
+    (f(x, y), f(x, a), False),
+    (f(x, a), f(x, y), True),
+    (plus(a, g(x)), plus(g(y), z), True),
+    (g(x), f(x, y), False),
+])
+def test_is_instance(term, pattern, expected):
+    assert is_instance(term, pattern) == expected
+
+
 @pytest.mark.parametrize("term,within,expected", [
     (x, x, False),
     (x, y, False),